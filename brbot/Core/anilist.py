@@ -1,9 +1,284 @@
 import httpx
 import logging
-from asyncio import sleep
+from asyncio import (
+    Future,
+    Task,
+    TimerHandle,
+    create_task,
+    gather,
+    get_running_loop,
+    sleep,
+)
+from typing import Iterable
+
+import brbot.Core.botdata as bd
+from brbot.Core.mediacache import MediaCache
+from brbot.Core.ratelimit import Priority, RequestScheduler
+from brbot.Core.singleflight import single_flight
 
 logger = logging.getLogger(__name__)
 
+_client: httpx.AsyncClient | None = None
+media_cache: MediaCache | None = None
+# All anilist requests share one rate limit budget
+scheduler = RequestScheduler(
+    limit_per_minute=bd.anilist_rate_limit, burst=bd.anilist_burst
+)
+
+
+def start_client() -> httpx.AsyncClient:
+    """
+    Creates the shared, connection-pooled anilist client if it is not already running
+    Returns:
+        Shared anilist client
+    """
+    global _client
+    if _client is not None and not _client.is_closed:
+        return _client
+
+    # HTTP/2 multiplexes concurrent requests over one connection, requires httpx[http2]
+    _client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=bd.anilist_max_connections,
+            max_keepalive_connections=bd.anilist_max_keepalive,
+            keepalive_expiry=bd.anilist_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(bd.anilist_timeout, connect=bd.anilist_connect_timeout),
+    )
+    logger.info(f"Started anilist client for {bd.anilist_url}")
+    return _client
+
+
+async def close_client() -> None:
+    """
+    Closes the shared anilist client and its pooled connections
+    Returns:
+        None
+    """
+    global _client
+    if _client is None:
+        return None
+    await _client.aclose()
+    _client = None
+    logger.info("Closed anilist client")
+    return None
+
+
+def open_media_cache(filepath: str) -> MediaCache:
+    """
+    Opens the persistent anilist media cache shared by all games if it is not already open
+    Args:
+        filepath: Path of the SQLite cache file
+    Returns:
+        Shared media cache
+    """
+    global media_cache
+    if media_cache is None:
+        media_cache = MediaCache(
+            filepath=filepath, max_bytes=bd.media_cache_max_mb * 1024 * 1024
+        )
+        logger.info(
+            f"Opened anilist media cache at {filepath} ({media_cache.total_bytes} bytes)"
+        )
+    return media_cache
+
+
+def close_media_cache() -> None:
+    """
+    Closes the persistent anilist media cache
+    Returns:
+        None
+    """
+    global media_cache
+    if media_cache is not None:
+        media_cache.close()
+        media_cache = None
+    return None
+
+
+def cache_entries(kind: str, entries: dict[int, dict]) -> None:
+    """
+    Seeds the media cache with anilist data obtained elsewhere, such as copies stored in older game files
+    Args:
+        kind: Entity kind ("media" or "character")
+        entries: Dict of anilist ID to GraphQL data
+    Returns:
+        None
+    """
+    if media_cache is not None and entries:
+        media_cache.put_many(kind, entries)
+    return None
+
+
+@single_flight
+async def post_query(
+    query: str,
+    variables: dict,
+    timeout: float | None = None,
+    priority: Priority = Priority.INTERACTIVE,
+) -> httpx.Response:
+    """
+    Sends a GraphQL query to anilist over the shared client once the rate limit allows it. Rate limited requests
+    are resent after the pause requested by anilist.
+    Args:
+        query: GraphQL query document
+        variables: GraphQL query variables
+        timeout: Request timeout override in seconds, uses the client default if not specified
+        priority: Scheduling priority, interactive requests are sent ahead of background requests
+    Returns:
+        Raw anilist HTTP response
+    """
+    for attempt in range(bd.anilist_rate_limit_retries + 1):
+        await scheduler.acquire(priority)
+        response = await start_client().post(
+            url=bd.anilist_url,
+            json={"query": query, "variables": variables},
+            timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout,
+        )
+        scheduler.update(response)
+        if response.status_code != 429:
+            break
+    return response
+
+
+MEDIA_FIELDS = """
+          id
+          status
+          episodes
+          genres
+          format
+          meanScore
+          popularity
+          season
+          source
+          startDate {
+            year
+          }
+          tags {
+            name
+            rank
+          }
+          title {
+            english
+          }
+        """
+CHARACTER_FIELDS = """
+          id
+          image {
+            medium
+          }
+          name {
+            full
+          }
+          siteUrl
+        """
+
+
+class BatchLoader:
+    """
+    Merges concurrent lookups of one anilist entity type into a single paged id_in query, then fans the results
+    back out to every waiting caller.
+
+    Attributes:
+        name (str): Entity name used in logs
+        kind (str): Media cache entity kind, checked before querying anilist
+        query (str): Page query taking $ids and $perPage variables
+        page_field (str): Field of Page holding the returned entities
+        window (float): Seconds to wait for more lookups before sending a batch
+        max_size (int): Most IDs sent in one query (anilist pages hold at most 50 entries)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        query: str,
+        page_field: str,
+        window: float,
+        max_size: int = 50,
+    ):
+        self.name = name
+        self.kind = kind
+        self.query = query
+        self.page_field = page_field
+        self.window = window
+        self.max_size = max_size
+        self._pending: dict[int, list[Future]] = {}
+        self._timer: TimerHandle | None = None
+        self._tasks: set[Task] = set()
+
+    async def load(self, entity_id: int) -> dict | None:
+        if media_cache is not None:
+            cached = media_cache.get(self.kind, entity_id)
+            if cached is not None:
+                return cached
+
+        loop = get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(entity_id, []).append(future)
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return None
+        task = create_task(self._resolve(batch))
+        self._tasks.add(task)  # Keep a reference until the batch is resolved
+        task.add_done_callback(self._tasks.discard)
+        return None
+
+    async def _resolve(self, batch: dict[int, list[Future]]) -> None:
+        try:
+            results = await self._fetch(list(batch))
+        except Exception as e:
+            logger.error(f"Unexpected error while fetching {self.name} batch: {e}")
+            results = {}
+
+        if media_cache is not None:
+            media_cache.put_many(self.kind, results)
+            # Fall back to expired entries rather than failing if anilist is unavailable
+            missing = [entity_id for entity_id in batch if entity_id not in results]
+            results.update(media_cache.get_many(self.kind, missing, allow_stale=True))
+        for entity_id, futures in batch.items():
+            for future in futures:
+                if not future.done():  # Caller may have been cancelled
+                    future.set_result(results.get(entity_id))
+
+    async def _fetch(self, ids: list[int]) -> dict[int, dict]:
+        variables = {"ids": ids, "perPage": len(ids)}
+        logger.debug(f"Fetching {self.name} data for {len(ids)} IDs in one batch")
+
+        max_attempts = 2
+        for attempt in range(max_attempts):
+            try:
+                response = await post_query(query=self.query, variables=variables)
+                if response.status_code == 200:
+                    entities = response.json()["data"]["Page"][self.page_field]
+                    return {entity["id"]: entity for entity in entities}
+                else:
+                    logger.warning(
+                        f"Error {response.status_code} while fetching {self.name} data for {ids} ({attempt + 1}/{max_attempts} attempts)"
+                    )
+                    if response.status_code == 404:
+                        break
+            except (httpx.ReadTimeout, httpx.RequestError) as e:
+                logger.warning(
+                    f"Error {e} while fetching {self.name} data for {ids} ({attempt + 1}/{max_attempts} attempts)"
+                )
+            await sleep(1)
+        logger.error(
+            f"Failed to retrieve {self.name} data for {ids} after {max_attempts} attempts"
+        )
+        return {}
+
 
 def anilist_id_from_url(url: str, is_character: bool = False) -> int | None:
     """
@@ -30,66 +305,32 @@ def anilist_id_from_url(url: str, is_character: bool = False) -> int | None:
     return None
 
 
+@single_flight
 async def query_media(*, media_id: int):
     """
-    Retrieves anilist data used in anime games for a media
+    Retrieves anilist data used in anime games for a media. Concurrent lookups are batched into one request.
     Args:
         media_id: Anilist ID of media to query
     Returns:
          GraphQL data of media from anilist, or None if request failed after retries
     """
-    query = """
-    query Media($mediaId: Int) {
-      Media(id: $mediaId) {
-        episodes
-        genres
-        format
-        meanScore
-        popularity
-        season
-        source
-        startDate {
-          year
-        }
-        tags {
-          name
-          rank
-        }
-        title {
-          english
-        }
-      }
-    }
-    """
-    variables = {"mediaId": media_id}
+    return await _media_loader.load(media_id)
 
-    max_attempts = 2
-    for attempt in range(max_attempts):
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url="https://graphql.anilist.co",
-                    json={"query": query, "variables": variables},
-                )
-            if response.status_code == 200:
-                return response.json()["data"]["Media"]
-            else:
-                logger.warning(
-                    f"Error {response.status_code} while fetching show data for show {media_id} ({attempt + 1}/{max_attempts} attempts)"
-                )
-                if response.status_code == 404:
-                    break
-        except (httpx.ReadTimeout, httpx.RequestError) as e:
-            logger.warning(
-                f"Error {e} while fetching show data for show {media_id} ({attempt + 1}/{max_attempts} attempts)"
-            )
-        await sleep(1)
-    logger.error(
-        f"Failed to retrieve show data for show {media_id} after {max_attempts} attempts"
-    )
-    return None
+
+async def query_media_batch(media_ids: Iterable[int]) -> dict[int, dict | None]:
+    """
+    Retrieves anilist data used in anime games for several media at once
+    Args:
+        media_ids: Anilist IDs of media to query
+    Returns:
+         Dict of media ID to GraphQL media data, or None for media that could not be retrieved
+    """
+    media_ids = list(dict.fromkeys(media_ids))
+    results = await gather(*(query_media(media_id=media_id) for media_id in media_ids))
+    return dict(zip(media_ids, results))
 
 
+@single_flight
 async def query_user_id(username: str) -> int | None:
     """
     Obtains user anilist ID for linking discord profiles
@@ -112,11 +353,7 @@ async def query_user_id(username: str) -> int | None:
 
     for attempt in range(max_attempts):
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url="https://graphql.anilist.co",
-                    json={"query": query, "variables": variables},
-                )
+            response = await post_query(query=query, variables=variables)
             if response.status_code == 200:
                 return response.json()["data"]["User"]["id"]
             else:
@@ -137,11 +374,15 @@ async def query_user_id(username: str) -> int | None:
     return None
 
 
-async def query_user_animelist(anilist_user_id: int) -> list | None:
+@single_flight
+async def query_user_animelist(
+    anilist_user_id: int, priority: Priority = Priority.INTERACTIVE
+) -> list | None:
     """
     Retrieves user anime list data used in anime games
     Args:
         anilist_user_id: Anilist ID of user to query list
+        priority: Scheduling priority of the request
     Returns:
          GraphQL data of the media list collection from anilist, or None if request failed after retries
     """
@@ -166,11 +407,9 @@ async def query_user_animelist(anilist_user_id: int) -> list | None:
     max_attempts = 2
     for attempt in range(max_attempts):
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url="https://graphql.anilist.co",
-                    json={"query": query, "variables": variables},
-                )
+            response = await post_query(
+                query=query, variables=variables, priority=priority
+            )
             if response.status_code == 200:
                 full_user_list: list = []
                 for anime_list in response.json()["data"]["MediaListCollection"][
@@ -197,11 +436,15 @@ async def query_user_animelist(anilist_user_id: int) -> list | None:
     return None
 
 
-async def query_user_genres(anilist_user_id: int) -> str | None:
+@single_flight
+async def query_user_genres(
+    anilist_user_id: int, priority: Priority = Priority.INTERACTIVE
+) -> str | None:
     """
     Retrieves anilist user genre statistics data used in anime games
     Args:
         anilist_user_id: Anilist ID of media to query
+        priority: Scheduling priority of the request
     Returns:
          GraphQL data of genre statistics from anilist, or None if request failed after retries
     """
@@ -225,11 +468,9 @@ async def query_user_genres(anilist_user_id: int) -> str | None:
     max_attempts = 2
     for attempt in range(max_attempts):
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url="https://graphql.anilist.co",
-                    json={"query": query, "variables": variables},
-                )
+            response = await post_query(
+                query=query, variables=variables, priority=priority
+            )
             if response.status_code == 200:
                 user_genres = response.json()["data"]["User"]["statistics"]["anime"][
                     "genres"
@@ -269,54 +510,58 @@ async def query_user_genres(anilist_user_id: int) -> str | None:
     return None
 
 
+@single_flight
 async def query_character(*, character_id: int):
     """
-    Retrieves character data used in anime games
+    Retrieves character data used in anime games. Concurrent lookups are batched into one request.
     Args:
         character_id: Anilist ID of character to query
     Returns:
          GraphQL character data from anilist, or None if request failed after retries
     """
-    query = """
-    query Character($characterId: Int) {
-      Character(id: $characterId) {
-        image {
-          medium
-        }
-        name {
-          full
-        }
-        siteUrl
-      }
-    }
-    """
-    variables = {"characterId": character_id}
+    return await _character_loader.load(character_id)
 
-    max_attempts = 2
 
-    for attempt in range(max_attempts):
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url="https://graphql.anilist.co",
-                    json={"query": query, "variables": variables},
-                )
-            if response.status_code == 200:
-                return response.json()["data"]["Character"]
+async def query_character_batch(
+    character_ids: Iterable[int],
+) -> dict[int, dict | None]:
+    """
+    Retrieves character data used in anime games for several characters at once
+    Args:
+        character_ids: Anilist IDs of characters to query
+    Returns:
+         Dict of character ID to GraphQL character data, or None for characters that could not be retrieved
+    """
+    character_ids = list(dict.fromkeys(character_ids))
+    results = await gather(
+        *(query_character(character_id=character_id) for character_id in character_ids)
+    )
+    return dict(zip(character_ids, results))
 
-            else:
-                logger.warning(
-                    f"Error {response.status_code} while fetching anilist character data for {character_id} ({attempt + 1}/{max_attempts} attempts)"
-                )
-                if response.status_code == 404:
-                    break
-        except (httpx.ReadTimeout, httpx.RequestError) as e:
-            logger.warning(
-                f"Error {e} while fetching character data for anillist character {character_id} ({attempt + 1}/{max_attempts} attempts)"
-            )
-        await sleep(1)
 
-    logger.error(
-        f"Failed to retrieve list data for anilist character {character_id} after {max_attempts} attempts"
-    )
-    return None
+_media_loader = BatchLoader(
+    name="show",
+    kind="media",
+    query=f"""
+    query MediaBatch($ids: [Int], $perPage: Int) {{
+      Page(perPage: $perPage) {{
+        media(id_in: $ids) {{{MEDIA_FIELDS}}}
+      }}
+    }}
+    """,
+    page_field="media",
+    window=bd.anilist_batch_window,
+)
+_character_loader = BatchLoader(
+    name="character",
+    kind="character",
+    query=f"""
+    query CharacterBatch($ids: [Int], $perPage: Int) {{
+      Page(perPage: $perPage) {{
+        characters(id_in: $ids) {{{CHARACTER_FIELDS}}}
+      }}
+    }}
+    """,
+    page_field="characters",
+    window=bd.anilist_batch_window,
+)
@@ -1,10 +1,16 @@
 import logging
+from asyncio import to_thread
 from pathlib import Path
 
 from discord import Intents, CustomActivity, Status
 from discord.ext import commands
 from brbot.Core.botutils import init_guilds, load_fonts, load_anilist_caches
+import brbot.Core.anilist as al
+import brbot.Core.renderpool as rp
+from brbot.Core.gamesaves import saves
+from brbot.Core.imagestore import images
 import brbot.Core.botdata as bd
+from brbot.Shared.emoji_atlas import check_emoji_rendering
 
 logger = logging.getLogger(__name__)
 
@@ -54,8 +60,24 @@ class BrBot(commands.AutoShardedBot):
         """
         Setup hook called before the bot starts
         """
+        # Warns if boards would be drawn without emoji
+        await to_thread(check_emoji_rendering)
+        al.start_client()
         await self.load_cogs()
 
+    async def close(self) -> None:
+        """
+        Shuts down shared resources before closing the bot connection
+        """
+        try:
+            await super().close()
+        finally:
+            await al.close_client()
+            al.close_media_cache()
+            await saves.flush()
+            await images.flush()
+            rp.shutdown()
+
     async def on_ready(self) -> None:
         """
         Called when the bot has successfully connected to Discord
@@ -1,6 +1,6 @@
 # File containing global variables for bot.
 
-from os import environ, path
+from os import cpu_count, environ, path
 from dotenv import load_dotenv
 import logging
 
@@ -28,6 +28,38 @@ bot_avatar_url: str = ""
 train_zones_url: str = "https://i.imgur.com/CRgbw7R.png"
 date_format: str = "%Y/%m/%d %H:%M:%S"
 
+# Shared anilist client settings
+anilist_url: str = environ.get("ANILIST_URL", "https://graphql.anilist.co")
+anilist_timeout: float = float(environ.get("ANILIST_TIMEOUT", 10))
+anilist_connect_timeout: float = float(environ.get("ANILIST_CONNECT_TIMEOUT", 5))
+anilist_max_connections: int = int(environ.get("ANILIST_MAX_CONNECTIONS", 20))
+anilist_max_keepalive: int = int(environ.get("ANILIST_MAX_KEEPALIVE", 10))
+anilist_keepalive_expiry: float = float(environ.get("ANILIST_KEEPALIVE_EXPIRY", 30))
+anilist_batch_window: float = float(environ.get("ANILIST_BATCH_WINDOW", 0.05))
+anilist_rate_limit: int = int(environ.get("ANILIST_RATE_LIMIT", 90))
+anilist_burst: int = int(environ.get("ANILIST_BURST", 10))
+anilist_rate_limit_retries: int = int(environ.get("ANILIST_RATE_LIMIT_RETRIES", 3))
+media_cache_max_mb: int = int(environ.get("MEDIA_CACHE_MAX_MB", 64))
+
+# Board rendering
+render_workers: int = int(environ.get("RENDER_WORKERS", min(cpu_count() or 1, 4)))
+image_cache_max_mb: int = int(environ.get("IMAGE_CACHE_MAX_MB", 32))
+image_write_delay: float = float(environ.get("IMAGE_WRITE_DELAY", 10))
+
+# Pre-generated trains boards, play area sizes as "WIDTHxHEIGHT" separated by commas
+trains_board_pool_sizes: list[tuple[int, int]] = [
+    (int(size.split("x")[0]), int(size.split("x")[1]))
+    for size in environ.get("TRAINS_BOARD_POOL_SIZES", "16x16").split(",")
+    if size.strip()
+]
+trains_board_pool_depth: int = int(environ.get("TRAINS_BOARD_POOL_DEPTH", 2))
+
+# Game journals
+journal_snapshot_interval: int = int(environ.get("JOURNAL_SNAPSHOT_INTERVAL", 50))
+
+# Game saves
+game_save_delay: float = float(environ.get("GAME_SAVE_DELAY", 5))
+
 responses, mentions, config = {}, {}, {}
 active_msgs: list = []
 active_trains: dict = {}
@@ -1,5 +1,5 @@
 import json
-from os import makedirs, listdir, path
+from os import makedirs, path
 from shutil import rmtree
 from re import findall
 from typing import Sequence
@@ -9,10 +9,15 @@ from discord.app_commands import Choice
 import logging
 import matplotlib.font_manager
 
+import brbot.Core.anilist as al
 import brbot.Core.botdata as bd
+from brbot.Core.gameindex import forget_game, get_index, invalid_game_errors
+from brbot.Core.gamesaves import saves
+from brbot.Core.imagestore import images
+from brbot.Core.journal import forget_journal
 from brbot.Features.Responses.data import load_responses
-from brbot.Features.Trains.service import load_trains_game
-from brbot.Features.Bingo.data import load_bingo_game
+from brbot.Features.Trains.service import load_trains_game, read_trains_summary
+from brbot.Features.Bingo.data import load_bingo_game, read_bingo_summary
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +46,10 @@ def del_game_files(guild_id: int, game_name: str, game_type: str):
     Returns:
         None
     """
+    images.forget(f"{bd.parent}/Guilds/{guild_id}/{game_type}/{game_name}")
+    forget_journal(f"{bd.parent}/Guilds/{guild_id}/{game_type}/{game_name}")
+    saves.forget(f"{bd.parent}/Guilds/{guild_id}/{game_type}/{game_name}")
+    forget_game(f"{bd.parent}/Guilds/{guild_id}/{game_type}/{game_name}")
     try:
         rmtree(f"{bd.parent}/Guilds/{guild_id}/{game_type}/{game_name}")
     except PermissionError:
@@ -59,6 +68,7 @@ def load_anilist_caches() -> None:
             json.dump({}, f, separators=(",", ":"))
     with open(f"{bd.parent}/Data/linked_profiles.json", "r") as f:
         bd.linked_profiles = {int(key): int(val) for key, val in json.load(f).items()}
+    al.open_media_cache(f"{bd.parent}/Data/media_cache.sqlite3")
 
 
 def load_config(guild: Guild) -> None:
@@ -152,62 +162,93 @@ async def init_guilds(guilds: Sequence[Guild]) -> None:
         None
     """
     for guild in guilds:
-        # Make guild folder if it doesn't exist
-        if not path.exists(f"{bd.parent}/Guilds/{guild.id}/Trains"):
-            makedirs(f"{bd.parent}/Guilds/{guild.id}/Trains")
-            logger.info(f"Created guild trains folder for {guild.name}")
-        if not path.exists(f"{bd.parent}/Guilds/{guild.id}/Bingo"):
-            makedirs(f"{bd.parent}/Guilds/{guild.id}/Bingo")
-            logger.info(f"Created guild bingo folder for {guild.name}")
-
-        load_config(guild)
-        bd.responses[guild.id] = load_responses(
-            f"{bd.parent}/Guilds/{guild.id}/responses.json"
-        )
-
-        logger.info(f"Responses loaded for {guild.name}")
+        # One guild failing to load must not stop the others from loading
+        try:
+            await init_guild(guild)
+        except Exception as e:
+            logger.exception(f"Could not initialize guild {guild.name}: {e}")
 
-        # Load trains games
 
-        for name in listdir(f"{bd.parent}/Guilds/{guild.id}/Trains"):
-            try:
-                game = await load_trains_game(
-                    filepath=f"{bd.parent}/Guilds/{guild.id}/Trains/{name}",
-                    guild=guild,
-                    active_only=True,
-                )
-                if game.active:
-                    bd.active_trains[guild.id] = game
-                    break
-            except (FileNotFoundError, TypeError, ValueError, KeyError) as e:
-                logger.warning(f"Error loading train data for guild {guild.name}: {e}")
-                del_game_files(guild_id=guild.id, game_name=name, game_type="Trains")
-                logger.warning(
-                    f'Invalid trains game "{name}" in guild {guild.name}, attempted delete.'
-                )
-            except NotADirectoryError:
-                logger.debug(f"Unknown file {name} exists in guild trains directory")
-
-        # Load bingo games
-
-        for name in listdir(f"{bd.parent}/Guilds/{guild.id}/Bingo"):
-            try:
-                game = await load_bingo_game(
-                    filepath=f"{bd.parent}/Guilds/{guild.id}/Bingo/{name}",
-                    guild=guild,
-                    active_only=True,
-                )
-                if game.active:
-                    bd.active_bingos[guild.id] = game
-                    break
-            except (FileNotFoundError, TypeError, ValueError, KeyError) as e:
-                logger.warning(f"Error loading bingo data for guild {guild.name}: {e}")
-                del_game_files(guild_id=guild.id, game_name=name, game_type="Bingo")
-                logger.warning(
-                    f'Invalid bingo game "{name}" in guild {guild.name}, attempted delete.'
-                )
-            except NotADirectoryError:
-                logger.debug(f"Unknown file {name} exists in guild trains directory")
+async def init_guild(guild: Guild) -> None:
+    """
+    Validates directory structure and configuration of a guild, creates files, corrects errors, loads guild games
+    Args:
+        guild: Guild the bot is connected to
+    Returns:
+        None
+    """
+    # Make guild folder if it doesn't exist
+    if not path.exists(f"{bd.parent}/Guilds/{guild.id}/Trains"):
+        makedirs(f"{bd.parent}/Guilds/{guild.id}/Trains")
+        logger.info(f"Created guild trains folder for {guild.name}")
+    if not path.exists(f"{bd.parent}/Guilds/{guild.id}/Bingo"):
+        makedirs(f"{bd.parent}/Guilds/{guild.id}/Bingo")
+        logger.info(f"Created guild bingo folder for {guild.name}")
+
+    load_config(guild)
+    bd.responses[guild.id] = load_responses(
+        f"{bd.parent}/Guilds/{guild.id}/responses.json"
+    )
+
+    logger.info(f"Responses loaded for {guild.name}")
+
+    # Bring the game index in line with the game folders, reading only games it does not know yet
+    index = get_index(f"{bd.parent}/Guilds/{guild.id}")
+    for game_type, read_summary in (
+        ("Trains", read_trains_summary),
+        ("Bingo", read_bingo_summary),
+    ):
+        for name in index.reconcile(game_type, read_summary):
+            del_game_files(guild_id=guild.id, game_name=name, game_type=game_type)
+            logger.warning(
+                f'Invalid {game_type.lower()} game "{name}" in guild {guild.name}, attempted delete.'
+            )
+
+    # Load trains games
+
+    for name in index.active_games("Trains"):
+        try:
+            game = await load_trains_game(
+                filepath=f"{bd.parent}/Guilds/{guild.id}/Trains/{name}",
+                guild=guild,
+                active_only=True,
+            )
+            if game.active:
+                bd.active_trains[guild.id] = game
+                break
+        except invalid_game_errors as e:
+            logger.warning(f"Error loading train data for guild {guild.name}: {e}")
+            del_game_files(guild_id=guild.id, game_name=name, game_type="Trains")
+            logger.warning(
+                f'Invalid trains game "{name}" in guild {guild.name}, attempted delete.'
+            )
+        except OSError as e:
+            logger.warning(
+                f"Could not read trains game {name} in guild {guild.name}: {e}"
+            )
+
+    # Load bingo games
+
+    for name in index.active_games("Bingo"):
+        try:
+            game = await load_bingo_game(
+                filepath=f"{bd.parent}/Guilds/{guild.id}/Bingo/{name}",
+                guild=guild,
+                active_only=True,
+            )
+            if game.active:
+                bd.active_bingos[guild.id] = game
+                break
+        except invalid_game_errors as e:
+            logger.warning(f"Error loading bingo data for guild {guild.name}: {e}")
+            del_game_files(guild_id=guild.id, game_name=name, game_type="Bingo")
+            logger.warning(
+                f'Invalid bingo game "{name}" in guild {guild.name}, attempted delete.'
+            )
+        except OSError as e:
+            logger.warning(
+                f"Could not read bingo game {name} in guild {guild.name}: {e}"
+            )
 
 
 def setup_guild(guild: Guild) -> None:
@@ -224,7 +265,9 @@ def setup_guild(guild: Guild) -> None:
         with open(f"{bd.parent}/Guilds/{int(guild.id)}/config.json", "w") as f:
             json.dump(bd.default_config, f, indent=4)
         bd.config[int(guild.id)] = bd.default_config
-        bd.responses[int(guild.id)] = []
+        bd.responses[int(guild.id)] = load_responses(
+            f"{bd.parent}/Guilds/{int(guild.id)}/responses.json"
+        )
         return None
 
     elif not path.isfile(f"{bd.parent}/Guilds/{int(guild.id)}/config.json"):
@@ -0,0 +1,203 @@
+import json
+import logging
+from datetime import datetime
+from os import listdir, path
+from typing import Callable
+
+import brbot.Core.botdata as bd
+from brbot.Core.gamesaves import saves
+
+logger = logging.getLogger(__name__)
+
+index_name: str = "games.json"
+game_types: tuple[str, ...] = ("Trains", "Bingo")
+
+# Errors raised reading a game whose files are missing or corrupt. Unreadable gamedata.brb files raise ValueError.
+invalid_game_errors: tuple[type[Exception], ...] = (
+    FileNotFoundError,
+    TypeError,
+    ValueError,
+    KeyError,
+    IndexError,
+)
+
+
+class GameIndex:
+    """
+    Manifest of the games of a guild, stored in games.json in the guild folder. Each game is summarized by its
+    active status, board size, player member IDs, creation date and last save, so the active games of a guild and
+    the names of its games are known without opening every game file.
+
+    Attributes:
+        directory (str): Guild folder
+        games (dict[str, dict[str, dict]]): Summary of each game by game type and game name
+        stored (bool): Whether the manifest was read from disk
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.games: dict[str, dict[str, dict]] = {
+            game_type: {} for game_type in game_types
+        }
+        self.stored = False
+        try:
+            with open(f"{directory}/{index_name}", "r") as f:
+                stored = json.load(f)
+            for game_type, games in stored["games"].items():
+                self.games.setdefault(game_type, {}).update(games)
+            self.stored = True
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, KeyError, AttributeError) as e:
+            logger.warning(f"Unreadable game index in {directory}, rebuilding: {e}")
+
+    def asdict(self) -> dict:
+        return {
+            "games": {
+                game_type: {name: dict(summary) for name, summary in games.items()}
+                for game_type, games in self.games.items()
+            }
+        }
+
+    def save(self) -> None:
+        saves.schedule(f"{self.directory}/{index_name}", self.asdict, indent=4)
+        return None
+
+    def record(self, game_type: str, name: str, summary: dict) -> None:
+        """
+        Stores the summary of a game after it is saved
+        Args:
+            game_type: Game type, e.g. "Trains"
+            name: Game name
+            summary: Game summary, see TrainGame.summary
+        Returns:
+            None
+        """
+        self.games.setdefault(game_type, {})[name] = {
+            **summary,
+            "updated": datetime.now().strftime(bd.date_format),
+        }
+        self.save()
+        return None
+
+    def remove(self, game_type: str, name: str) -> None:
+        if self.games.get(game_type, {}).pop(name, None) is not None:
+            self.save()
+        return None
+
+    def active_games(self, game_type: str) -> list[str]:
+        return [
+            name
+            for name, summary in self.games.get(game_type, {}).items()
+            if summary["active"]
+        ]
+
+    def names(
+        self, game_type: str, current: str = "", active: bool | None = None
+    ) -> list[str]:
+        """
+        Finds the names of games, most recently saved first
+        Args:
+            game_type: Game type, e.g. "Trains"
+            current: Text the names must contain
+            active: Only include games with this active status
+        Returns:
+            Matching game names
+        """
+        games = sorted(
+            self.games.get(game_type, {}).items(),
+            # Dates are zero padded, so they sort in time order as strings
+            key=lambda game: game[1].get("updated") or "",
+            reverse=True,
+        )
+        return [
+            name
+            for name, summary in games
+            if current in name and (active is None or summary["active"] == active)
+        ]
+
+    def reconcile(
+        self, game_type: str, read_summary: Callable[[str], dict]
+    ) -> list[str]:
+        """
+        Brings the index in line with the game folders on disk. Only games missing from the index are read, so
+        building the index reads every game once and later startups read none.
+        Args:
+            game_type: Game type, e.g. "Trains"
+            read_summary: Function reading the summary of a game from its folder
+        Returns:
+            Names of games whose files are missing or corrupt. Games that could not be read for other reasons, e.g.
+            missing permissions, are left out of the index and retried on the next reconcile.
+        """
+        folder = f"{self.directory}/{game_type}"
+        try:
+            names = {name for name in listdir(folder) if path.isdir(f"{folder}/{name}")}
+        except FileNotFoundError:
+            names = set()
+        indexed = self.games.setdefault(game_type, {})
+        changed = False
+        for name in indexed.keys() - names:
+            del indexed[name]
+            changed = True
+
+        invalid = []
+        for name in sorted(names - indexed.keys()):
+            try:
+                summary = read_summary(f"{folder}/{name}")
+                updated = path.getmtime(f"{folder}/{name}")
+            except invalid_game_errors as e:
+                logger.warning(f"Could not index {game_type} game {name}: {e}")
+                invalid.append(name)
+                continue
+            except OSError as e:
+                logger.warning(f"Could not read {game_type} game {name}, skipping: {e}")
+                continue
+            indexed[name] = {
+                **summary,
+                "updated": datetime.fromtimestamp(updated).strftime(bd.date_format),
+            }
+            changed = True
+
+        if changed or not self.stored:
+            logger.info(f"Indexed {len(indexed)} {game_type} games in {self.directory}")
+            self.save()
+        return invalid
+
+
+_indexes: dict[str, GameIndex] = {}
+
+
+def get_index(guild_directory: str) -> GameIndex:
+    """
+    Retrieves the game index of a guild, reading it from disk on first use
+    Args:
+        guild_directory: Guild folder
+    Returns:
+        Game index of the guild
+    """
+    guild_directory = guild_directory.rstrip("/")
+    if guild_directory not in _indexes:
+        _indexes[guild_directory] = GameIndex(guild_directory)
+    return _indexes[guild_directory]
+
+
+def record_game(game_directory: str, summary: dict) -> None:
+    """
+    Updates the game index of the guild a game belongs to
+    Args:
+        game_directory: Game folder, e.g. Guilds/{guild_id}/Trains/{name}
+        summary: Game summary
+    Returns:
+        None
+    """
+    type_directory, name = path.split(game_directory.rstrip("/"))
+    guild_directory, game_type = path.split(type_directory)
+    get_index(guild_directory).record(game_type, name, summary)
+    return None
+
+
+def forget_game(game_directory: str) -> None:
+    type_directory, name = path.split(game_directory.rstrip("/"))
+    guild_directory, game_type = path.split(type_directory)
+    get_index(guild_directory).remove(game_type, name)
+    return None
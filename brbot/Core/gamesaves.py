@@ -0,0 +1,152 @@
+import json
+import logging
+from asyncio import Event, Lock, Task, create_task, to_thread, wait_for
+from functools import partial
+from os import replace
+from typing import Callable
+
+import brbot.Core.botdata as bd
+
+logger = logging.getLogger(__name__)
+
+
+def write_json(filepath: str, state: dict, indent: int | None = None) -> None:
+    with open(filepath, "w") as f:
+        json.dump(state, f, indent=indent, separators=(",", ":"))
+    return None
+
+
+def write_files(
+    states: dict[str, tuple[object, Callable[[str, object], None]]],
+) -> None:
+    """
+    Writes game states to disk, replacing each file atomically so a crash never leaves a partly written file
+    Args:
+        states: Serialized state and the function writing it to a given path, by file path
+    Returns:
+        None
+    """
+    for filepath, (state, write) in states.items():
+        try:
+            write(f"{filepath}.tmp", state)
+            replace(f"{filepath}.tmp", filepath)
+        except FileNotFoundError:
+            logger.debug(f"Skipped saving {filepath}, its folder was removed")
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Could not save {filepath}: {e}")
+    return None
+
+
+class SaveManager:
+    """
+    Saves game files in the background. Saves requested while a save is pending are coalesced, so a burst of
+    actions in a game is written once, and files are serialized and written in a worker thread.
+
+    Attributes:
+        save_delay (float): Seconds to wait for further changes before saving
+    """
+
+    def __init__(self, save_delay: float):
+        self.save_delay = save_delay
+        self._pending: dict[
+            str, tuple[Callable[[], object], Callable[[str, object], None]]
+        ] = {}
+        self._writer: Task | None = None
+        self._flush_now = Event()
+        # Held while writing, so older and newer saves of a file are never written out of order
+        self._write_lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def schedule(
+        self,
+        filepath: str,
+        state: Callable[[], object],
+        indent: int | None = None,
+        write: Callable[[str, object], None] | None = None,
+    ) -> None:
+        """
+        Requests a game file to be saved
+        Args:
+            filepath: Path of the file
+            state: Function returning the serialized state to save, called once when the file is written
+            indent: JSON indent of the file
+            write: Function writing the serialized state to a path in a worker thread, defaults to writing JSON
+        Returns:
+            None
+        """
+        if write is None:
+            write = partial(write_json, indent=indent)
+        self._pending[filepath] = (state, write)
+        if self._writer is None or self._writer.done():
+            self._writer = create_task(self._write_behind())
+        return None
+
+    async def _write(
+        self,
+        pending: dict[str, tuple[Callable[[], object], Callable[[str, object], None]]],
+    ):
+        # Game objects are only serialized on the event loop, where they are not being changed
+        states = {}
+        for filepath, (state, write) in pending.items():
+            try:
+                states[filepath] = (state(), write)
+            except Exception as e:
+                logger.error(f"Could not serialize {filepath}: {e}")
+        await to_thread(write_files, states)
+        return None
+
+    async def _write_behind(self) -> None:
+        while self._pending:
+            try:
+                await wait_for(self._flush_now.wait(), timeout=self.save_delay)
+            except TimeoutError:
+                pass
+            async with self._write_lock:
+                pending, self._pending = self._pending, {}
+                await self._write(pending)
+        return None
+
+    async def settle(self, filepath: str) -> None:
+        """
+        Writes a file immediately if it has a pending save, used before reading a game file from disk
+        Args:
+            filepath: Path of the file
+        Returns:
+            None
+        """
+        async with self._write_lock:
+            if filepath in self._pending:
+                await self._write({filepath: self._pending.pop(filepath)})
+        return None
+
+    def forget(self, directory: str) -> None:
+        """
+        Cancels pending saves of files in a directory, used when game files are deleted
+        Args:
+            directory: Directory of the files
+        Returns:
+            None
+        """
+        prefix = f"{directory.rstrip('/')}/"
+        for filepath in [key for key in self._pending if key.startswith(prefix)]:
+            del self._pending[filepath]
+        return None
+
+    async def flush(self) -> None:
+        """
+        Writes all pending saves immediately, used on shutdown
+        Returns:
+            None
+        """
+        self._flush_now.set()
+        try:
+            if self._writer is not None:
+                await self._writer
+        finally:
+            self._flush_now.clear()
+        return None
+
+
+saves = SaveManager(save_delay=bd.game_save_delay)
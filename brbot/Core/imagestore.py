@@ -0,0 +1,144 @@
+import logging
+from asyncio import Event, Task, create_task, to_thread, wait_for
+from collections import OrderedDict
+from os import replace
+
+import brbot.Core.botdata as bd
+
+logger = logging.getLogger(__name__)
+
+
+def write_images(images: dict[str, bytes]) -> None:
+    """
+    Writes encoded images to disk, replacing each file atomically
+    Args:
+        images: Encoded images by file path
+    Returns:
+        None
+    """
+    for filepath, data in images.items():
+        try:
+            with open(f"{filepath}.tmp", "wb") as f:
+                f.write(data)
+            replace(f"{filepath}.tmp", filepath)
+        except FileNotFoundError:
+            logger.debug(f"Skipped writing {filepath}, its folder was removed")
+        except OSError as e:
+            logger.warning(f"Could not write image {filepath}: {e}")
+    return None
+
+
+class ImageStore:
+    """
+    Encoded images kept in memory by file path. Images that are needed after a restart are written to disk in the
+    background, coalescing repeated updates of a file into one write.
+
+    Attributes:
+        max_bytes (int): Most bytes of images kept in memory
+        write_delay (float): Seconds to wait for further updates before writing images to disk
+    """
+
+    def __init__(self, max_bytes: int, write_delay: float):
+        self.max_bytes = max_bytes
+        self.write_delay = write_delay
+        self._images: OrderedDict[str, bytes] = OrderedDict()
+        self._size: int = 0
+        self._pending: dict[str, bytes] = {}
+        self._writer: Task | None = None
+        self._flush_now = Event()
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def _remember(self, filepath: str, data: bytes) -> None:
+        if filepath in self._images:
+            self._size -= len(self._images.pop(filepath))
+        self._images[filepath] = data
+        self._size += len(data)
+        while self._size > self.max_bytes and len(self._images) > 1:
+            self._size -= len(self._images.popitem(last=False)[1])
+        return None
+
+    def put(self, filepath: str, data: bytes, persist: bool = True) -> None:
+        """
+        Stores an encoded image
+        Args:
+            filepath: File path of the image
+            data: Encoded image
+            persist: Whether to write the image to disk in the background
+        Returns:
+            None
+        """
+        self._remember(filepath, data)
+        if not persist:
+            return None
+        self._pending[filepath] = data
+        if self._writer is None or self._writer.done():
+            self._writer = create_task(self._write_behind())
+        return None
+
+    def get(self, filepath: str) -> bytes | None:
+        """
+        Retrieves an encoded image from memory, reading it from disk if it is not in memory
+        Args:
+            filepath: File path of the image
+        Returns:
+            Encoded image, or None if it was never stored
+        """
+        if filepath in self._images:
+            self._images.move_to_end(filepath)
+            return self._images[filepath]
+        if filepath in self._pending:
+            return self._pending[filepath]
+        try:
+            with open(filepath, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        self._remember(filepath, data)
+        return data
+
+    def forget(self, directory: str) -> None:
+        """
+        Drops all images in a directory from memory and cancels their pending writes, used when game files are deleted
+        Args:
+            directory: Directory of the images
+        Returns:
+            None
+        """
+        prefix = f"{directory.rstrip('/')}/"
+        for filepath in [key for key in self._images if key.startswith(prefix)]:
+            self._size -= len(self._images.pop(filepath))
+        for filepath in [key for key in self._pending if key.startswith(prefix)]:
+            del self._pending[filepath]
+        return None
+
+    async def _write_behind(self) -> None:
+        # Single writer so writes of the same file are never reordered
+        while self._pending:
+            try:
+                await wait_for(self._flush_now.wait(), timeout=self.write_delay)
+            except TimeoutError:
+                pass
+            pending, self._pending = self._pending, {}
+            await to_thread(write_images, pending)
+        return None
+
+    async def flush(self) -> None:
+        """
+        Writes all pending images to disk immediately, used on shutdown
+        Returns:
+            None
+        """
+        self._flush_now.set()
+        try:
+            if self._writer is not None:
+                await self._writer
+        finally:
+            self._flush_now.clear()
+        return None
+
+
+images = ImageStore(
+    max_bytes=bd.image_cache_max_mb * 1024 * 1024, write_delay=bd.image_write_delay
+)
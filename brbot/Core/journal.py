@@ -0,0 +1,153 @@
+import json
+import logging
+from datetime import datetime
+from os import listdir, makedirs, replace
+from typing import Callable
+
+import brbot.Core.botdata as bd
+
+logger = logging.getLogger(__name__)
+
+events_name: str = "events.jsonl"
+
+
+class GameJournal:
+    """
+    Append-only record of the actions taken in a game, with periodic snapshots of the full game state. Recording an
+    action appends one line instead of copying the game, and the state after any recorded action can be rebuilt by
+    replaying the actions after the snapshot before it.
+
+    Files are kept in a journal folder inside the game folder: events.jsonl holds one JSON object per action, and
+    snapshot-{seq}.json holds the game state after action seq.
+
+    Attributes:
+        directory (str): Journal folder
+        snapshot_interval (int): Actions recorded between snapshots
+        seq (int): Sequence number of the last recorded action
+        snapshots (list[int]): Sequence numbers of the stored snapshots, in ascending order
+    """
+
+    def __init__(self, directory: str, snapshot_interval: int):
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        self.seq: int = 0
+        self.snapshots: list[int] = []
+        try:
+            files = listdir(directory)
+        except FileNotFoundError:
+            return
+        self.snapshots = sorted(
+            int(name[9:-5])
+            for name in files
+            if name.startswith("snapshot-") and name.endswith(".json")
+        )
+        self.seq = self.snapshots[-1] if self.snapshots else 0
+        for entry in self.entries():
+            self.seq = max(self.seq, entry["seq"])
+
+    def entries(self) -> list[dict]:
+        """
+        Reads every recorded action
+        Returns:
+            Recorded actions in the order they were taken
+        """
+        try:
+            with open(f"{self.directory}/{events_name}", "r") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A crash while appending can leave a partial last line
+                logger.warning(f"Skipped unreadable journal line in {self.directory}")
+        return entries
+
+    def snapshot(self, state: dict) -> None:
+        """
+        Stores the full game state after the last recorded action
+        Args:
+            state: Serialized game state
+        Returns:
+            None
+        """
+        makedirs(self.directory, exist_ok=True)
+        filepath = f"{self.directory}/snapshot-{self.seq:06d}.json"
+        with open(f"{filepath}.tmp", "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+        replace(f"{filepath}.tmp", filepath)
+        if not self.snapshots or self.snapshots[-1] != self.seq:
+            self.snapshots.append(self.seq)
+        return None
+
+    def append(self, event: str, state: Callable[[], dict], **data) -> int:
+        """
+        Records an action taken in the game, storing a snapshot if one is due
+        Args:
+            event: Action type, e.g. "shot" or "undo"
+            state: Function returning the serialized game state after the action, called only for snapshots
+            **data: Action details, must be JSON serializable
+        Returns:
+            Sequence number of the action
+        """
+        makedirs(self.directory, exist_ok=True)
+        self.seq += 1
+        entry = {
+            "seq": self.seq,
+            "event": event,
+            "at": datetime.now().strftime(bd.date_format),
+            **data,
+        }
+        with open(f"{self.directory}/{events_name}", "a") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+        if (
+            not self.snapshots
+            or self.seq - self.snapshots[-1] >= self.snapshot_interval
+        ):
+            self.snapshot(state())
+        return self.seq
+
+    def history(self, seq: int | None = None) -> tuple[dict, list[dict]]:
+        """
+        Finds what is needed to rebuild the game state after an action
+        Args:
+            seq: Sequence number of the action, defaults to the last recorded action
+        Returns:
+            Snapshot taken at or before the action, and the actions to replay on top of it
+        """
+        if seq is None:
+            seq = self.seq
+        usable = [snapshot for snapshot in self.snapshots if snapshot <= seq]
+        if not usable:
+            raise ValueError(f"No snapshot in {self.directory} before action {seq}")
+        start = usable[-1]
+        with open(f"{self.directory}/snapshot-{start:06d}.json", "r") as f:
+            state = json.load(f)
+        entries = [entry for entry in self.entries() if start < entry["seq"] <= seq]
+        return state, entries
+
+
+_journals: dict[str, GameJournal] = {}
+
+
+def get_journal(game_directory: str) -> GameJournal:
+    """
+    Retrieves the journal of a game, reading its position from disk on first use
+    Args:
+        game_directory: Game folder
+    Returns:
+        Journal of the game
+    """
+    if game_directory not in _journals:
+        _journals[game_directory] = GameJournal(
+            f"{game_directory}/journal", bd.journal_snapshot_interval
+        )
+    return _journals[game_directory]
+
+
+def forget_journal(game_directory: str) -> None:
+    _journals.pop(game_directory, None)
+    return None
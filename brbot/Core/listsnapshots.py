@@ -0,0 +1,153 @@
+import logging
+from collections.abc import Iterable, Sequence
+from os import path
+from zipfile import BadZipFile
+
+import numpy as np
+
+from brbot.Core.gamesaves import saves
+
+logger = logging.getLogger(__name__)
+
+snapshots_name: str = "starting_anilists.npz"
+
+
+def pack_anilist(anilist: list[dict]) -> dict[str, np.ndarray]:
+    """
+    Converts anilist entries to parallel arrays
+    Args:
+        anilist: Anilist entries with mediaId, status and progress
+    Returns:
+        Arrays of media IDs, statuses and progress. Missing progress is stored as -1.
+    """
+    return {
+        "media": np.array([entry["mediaId"] for entry in anilist], dtype=np.int32),
+        "status": np.array([entry["status"] for entry in anilist], dtype=np.str_),
+        "progress": np.array(
+            [
+                -1 if entry.get("progress") is None else entry["progress"]
+                for entry in anilist
+            ],
+            dtype=np.int32,
+        ),
+    }
+
+
+def unpack_anilist(
+    media: np.ndarray, status: np.ndarray, progress: np.ndarray
+) -> list[dict]:
+    """
+    Converts parallel arrays back to anilist entries
+    Args:
+        media: Media IDs
+        status: List statuses
+        progress: Episode progress, -1 for missing progress
+    Returns:
+        Anilist entries in the same form as returned by anilist
+    """
+    return [
+        {
+            "mediaId": media_id,
+            "status": entry_status,
+            "progress": None if entry_progress == -1 else entry_progress,
+        }
+        for media_id, entry_status, entry_progress in zip(
+            media.tolist(), status.tolist(), progress.tolist()
+        )
+    ]
+
+
+def pack_starting_anilists(
+    anilists: dict[int, Iterable[dict] | None],
+) -> dict[str, np.ndarray]:
+    """
+    Converts the starting anilists of a game's players to the arrays of a sidecar file
+    Args:
+        anilists: Starting anilist entries by member ID
+    Returns:
+        Arrays of every player, named {member_id}.{column}
+    """
+    arrays = {}
+    for member_id, anilist in anilists.items():
+        for column, values in pack_anilist(list(anilist or [])).items():
+            arrays[f"{member_id}.{column}"] = values
+    return arrays
+
+
+def write_starting_anilists(filepath: str, arrays: dict[str, np.ndarray]) -> None:
+    with open(filepath, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    return None
+
+
+def store_starting_anilists(
+    directory: str, anilists: dict[int, Iterable[dict] | None]
+) -> bool:
+    """
+    Saves the starting anilists of a game's players in a compressed sidecar file next to the game data, through
+    the save manager so the file is replaced atomically. Call with every save of the game until it returns True, so
+    a failed write is retried.
+    Args:
+        directory: Game folder
+        anilists: Starting anilist entries by member ID
+    Returns:
+        True if the sidecar file is already on disk, False if it was scheduled to be saved
+    """
+    filepath = f"{directory}/{snapshots_name}"
+    if path.exists(filepath):
+        return True
+    saves.schedule(
+        filepath,
+        lambda: pack_starting_anilists(anilists),
+        write=write_starting_anilists,
+    )
+    return False
+
+
+class LazyAnilist(Sequence):
+    """
+    Starting anilist of a player stored in a game's sidecar file. Entries are only read when first used, e.g. for
+    end-of-game scoring, and can then be used like the list of entries they replace. Reading raises ValueError if
+    the sidecar file is missing, corrupt or has no list for the player, as an empty list would score every entry of
+    the ending list as a change.
+
+    Attributes:
+        directory (str): Game folder
+        member_id (int): Member ID of the player
+    """
+
+    def __init__(self, directory: str, member_id: int):
+        self.directory = directory
+        self.member_id = member_id
+        self._entries: list[dict] | None = None
+
+    @property
+    def entries(self) -> list[dict]:
+        if self._entries is None:
+            try:
+                with np.load(f"{self.directory}/{snapshots_name}") as data:
+                    self._entries = unpack_anilist(
+                        data[f"{self.member_id}.media"],
+                        data[f"{self.member_id}.status"],
+                        data[f"{self.member_id}.progress"],
+                    )
+            except (OSError, KeyError, ValueError, EOFError, BadZipFile) as e:
+                raise ValueError(
+                    f"Could not read starting anilist of {self.member_id} in {self.directory}: {e}"
+                ) from e
+        return self._entries
+
+    def __getitem__(self, idx):
+        return self.entries[idx]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __repr__(self) -> str:
+        loaded = (
+            "not loaded" if self._entries is None else f"{len(self._entries)} entries"
+        )
+        return f"<LazyAnilist {self.member_id} {loaded}>"
@@ -0,0 +1,265 @@
+import json
+import logging
+import sqlite3
+from time import time
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+# Seconds until each class of anilist field is considered stale
+field_class_ttls: dict[str, int] = {
+    "static": 30 * 86400,
+    "volatile": 7 * 86400,
+    "airing": 86400,
+}
+
+# Field classes of each cached entity kind. Fields not listed are treated as volatile.
+field_classes: dict[str, dict[str, str]] = {
+    "media": {
+        "id": "static",
+        "title": "static",
+        "format": "static",
+        "source": "static",
+        "season": "static",
+        "startDate": "static",
+        "genres": "static",
+        "status": "airing",
+        "episodes": "airing",
+        "meanScore": "volatile",
+        "popularity": "volatile",
+        "tags": "volatile",
+    },
+    "character": {
+        "id": "static",
+        "name": "static",
+        "siteUrl": "static",
+        "image": "volatile",
+    },
+}
+
+# Access times are only used to pick entries to evict, so they are recorded coarsely and written in batches
+access_resolution: int = 60
+access_flush_interval: int = 60
+
+
+def entry_ttl(kind: str, data: dict) -> int:
+    """
+    Finds how long an anilist entity can be cached, based on the most volatile field class it contains
+    Args:
+        kind: Entity kind ("media" or "character")
+        data: GraphQL data of the entity
+    Returns:
+        Time to live in seconds
+    """
+    classes = field_classes.get(kind, {})
+    ttls = []
+    for field in data:
+        field_class = classes.get(field, "volatile")
+        # Episode counts and statuses of finished shows no longer change
+        if field_class == "airing" and data.get("status") == "FINISHED":
+            field_class = "static"
+        ttls.append(field_class_ttls[field_class])
+    return min(ttls, default=field_class_ttls["volatile"])
+
+
+class MediaCache:
+    """
+    Process-wide SQLite cache of anilist entities, shared across all games and guilds.
+
+    Entries expire according to the field classes they contain, and the least recently used entries are evicted
+    once the cache grows past its size budget. Access times of cache hits are kept in memory and written in one
+    batch at most every access_flush_interval seconds, so reads do not commit to the database.
+
+    Attributes:
+        filepath (str): Path of the SQLite database file
+        max_bytes (int): Size budget of the cached JSON data
+    """
+
+    def __init__(self, filepath: str, max_bytes: int):
+        self.filepath = filepath
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(filepath)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                kind TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires REAL NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (kind, id)
+            ) WITHOUT ROWID
+            """
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+        )
+        self.db.commit()
+        self.total_bytes: int = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        self._accessed: dict[tuple[str, int], float] = {}
+        self._accessed_flushed: float = time()
+
+    def get(self, kind: str, entity_id: int, allow_stale: bool = False) -> dict | None:
+        """
+        Retrieves a cached anilist entity
+        Args:
+            kind: Entity kind ("media" or "character")
+            entity_id: Anilist ID of the entity
+            allow_stale: Return the entry even if it has expired
+        Returns:
+            GraphQL data of the entity, or None if it is not cached
+        """
+        return self.get_many(kind, (entity_id,), allow_stale=allow_stale).get(entity_id)
+
+    def get_many(
+        self, kind: str, entity_ids: Iterable[int], allow_stale: bool = False
+    ) -> dict[int, dict]:
+        """
+        Retrieves several cached anilist entities of the same kind
+        Args:
+            kind: Entity kind ("media" or "character")
+            entity_ids: Anilist IDs of the entities
+            allow_stale: Return entries even if they have expired
+        Returns:
+            Dict of entity ID to GraphQL data for every cached entity
+        """
+        entity_ids = list(entity_ids)
+        if not entity_ids:
+            return {}
+        now = time()
+        placeholders = ",".join("?" * len(entity_ids))
+        rows = self.db.execute(
+            f"SELECT id, data, expires, accessed FROM entries WHERE kind = ? AND id IN ({placeholders})",
+            (kind, *entity_ids),
+        ).fetchall()
+
+        found = {}
+        for entity_id, data, expires, accessed in rows:
+            if allow_stale or expires > now:
+                found[entity_id] = json.loads(data)
+                if now - accessed >= access_resolution:
+                    self._accessed[(kind, entity_id)] = now
+        if now - self._accessed_flushed >= access_flush_interval:
+            self.flush_accessed()
+        return found
+
+    def flush_accessed(self) -> None:
+        """
+        Writes the access times of cache hits since the last flush
+        Returns:
+            None
+        """
+        if self._accessed:
+            self.db.executemany(
+                "UPDATE entries SET accessed = ? WHERE kind = ? AND id = ?",
+                (
+                    (accessed, kind, entity_id)
+                    for (kind, entity_id), accessed in self._accessed.items()
+                ),
+            )
+            self.db.commit()
+            self._accessed.clear()
+        self._accessed_flushed = time()
+        return None
+
+    def put(self, kind: str, entity_id: int, data: dict) -> None:
+        """
+        Adds or refreshes a cached anilist entity
+        Args:
+            kind: Entity kind ("media" or "character")
+            entity_id: Anilist ID of the entity
+            data: GraphQL data of the entity
+        Returns:
+            None
+        """
+        self.put_many(kind, {entity_id: data})
+
+    def put_many(self, kind: str, entities: dict[int, dict]) -> None:
+        """
+        Adds or refreshes several cached anilist entities of the same kind, evicting old entries if over budget
+        Args:
+            kind: Entity kind ("media" or "character")
+            entities: Dict of entity ID to GraphQL data
+        Returns:
+            None
+        """
+        if not entities:
+            return None
+        now = time()
+        rows = []
+        for entity_id, data in entities.items():
+            serialized = json.dumps(data, separators=(",", ":"))
+            rows.append(
+                (
+                    kind,
+                    entity_id,
+                    serialized,
+                    len(serialized),
+                    now + entry_ttl(kind, data),
+                    now,
+                )
+            )
+        placeholders = ",".join("?" * len(entities))
+        old_bytes = self.db.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM entries WHERE kind = ? AND id IN ({placeholders})",
+            (kind, *entities),
+        ).fetchone()[0]
+        self.db.executemany(
+            """
+            INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (kind, id) DO UPDATE SET
+                data = excluded.data,
+                size = excluded.size,
+                expires = excluded.expires,
+                accessed = excluded.accessed
+            """,
+            rows,
+        )
+        self.db.commit()
+        self.total_bytes += sum(row[3] for row in rows) - old_bytes
+
+        if self.total_bytes > self.max_bytes:
+            self.evict(target_bytes=int(self.max_bytes * 0.9))
+        return None
+
+    def evict(self, target_bytes: int) -> None:
+        """
+        Removes least recently used entries until the cache is within the target size
+        Args:
+            target_bytes: Size to shrink the cached data to
+        Returns:
+            None
+        """
+        # Access times decide what is evicted, so pending ones are written first
+        self.flush_accessed()
+        # Deletes the least recently used entries whose sizes add up to the excess over the target
+        freed = self.db.execute(
+            """
+            DELETE FROM entries WHERE (kind, id) IN (
+                SELECT kind, id FROM (
+                    SELECT kind, id, size,
+                        SUM(size) OVER (ORDER BY accessed, kind, id ROWS UNBOUNDED PRECEDING) AS running
+                    FROM entries
+                )
+                WHERE running - size < ?
+            )
+            RETURNING size
+            """,
+            (self.total_bytes - target_bytes,),
+        ).fetchall()
+        self.db.commit()
+        evicted = len(freed)
+        self.total_bytes -= sum(size for (size,) in freed)
+        logger.info(
+            f"Evicted {evicted} anilist cache entries, {self.total_bytes} bytes remain"
+        )
+        return None
+
+    def close(self) -> None:
+        self.flush_accessed()
+        self.db.close()
@@ -0,0 +1,152 @@
+import logging
+from asyncio import Future, TimerHandle, get_running_loop
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from heapq import heappop, heappush
+from itertools import count
+from time import monotonic, time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Request priorities, lower values are sent first"""
+
+    INTERACTIVE = 0  # Commands a user is actively waiting on
+    BACKGROUND = 1  # Bulk refreshes such as recommendation list data
+
+
+class RequestScheduler:
+    """
+    Token bucket shared by all requests to a rate limited API. Requests wait for a token in priority order, and the
+    bucket is kept in sync with the rate limit headers returned by the API.
+
+    Attributes:
+        rate (float): Tokens added per second
+        capacity (float): Largest burst of requests sent without waiting
+        tokens (float): Tokens currently available
+        paused_until (float): Monotonic time until which no requests are sent (after a 429 response)
+    """
+
+    def __init__(self, limit_per_minute: int, burst: int):
+        self.rate: float = limit_per_minute / 60
+        self.capacity: float = burst
+        self.tokens: float = burst
+        self.paused_until: float = 0.0
+        self._updated: float = monotonic()
+        self._waiters: list[tuple[int, int, Future]] = []
+        self._order = count()
+        self._wakeup: TimerHandle | None = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE) -> None:
+        """
+        Waits until a request of the given priority may be sent
+        Args:
+            priority: Request priority, higher priority requests are let through first
+        Returns:
+            None
+        """
+        future = get_running_loop().create_future()
+        heappush(self._waiters, (priority, next(self._order), future))
+        self._dispatch()
+        await future
+
+    def update(self, response: httpx.Response) -> None:
+        """
+        Adjusts the bucket to the rate limit headers of a response
+        Args:
+            response: Response from the rate limited API
+        Returns:
+            None
+        """
+        headers = response.headers
+        try:
+            limit = int(headers["X-RateLimit-Limit"])
+            if limit > 0 and limit / 60 != self.rate:
+                logger.info(f"Anilist rate limit set to {limit} requests per minute")
+                self.rate = limit / 60
+                self.capacity = min(self.capacity, limit)
+        except (KeyError, ValueError):
+            pass
+
+        self._refill()
+        try:  # The server's count is authoritative if it is lower than ours
+            self.tokens = min(self.tokens, int(headers["X-RateLimit-Remaining"]))
+        except (KeyError, ValueError):
+            pass
+
+        if response.status_code == 429:
+            retry_after = self.retry_after_seconds(response)
+            logger.warning(
+                f"Anilist rate limit reached, pausing requests for {retry_after:.1f} seconds"
+            )
+            self.tokens = 0
+            self.paused_until = max(self.paused_until, monotonic() + retry_after)
+        self._dispatch()
+
+    def retry_after_seconds(self, response: httpx.Response) -> float:
+        """
+        Reads how long to wait after a rate limited response
+        Args:
+            response: 429 response from the rate limited API
+        Returns:
+            Seconds to wait before sending more requests
+        """
+        headers = response.headers
+        if "Retry-After" in headers:
+            try:
+                return max(float(headers["Retry-After"]), 0)
+            except ValueError:  # Retry-After may also be an HTTP date
+                try:
+                    return max(
+                        parsedate_to_datetime(headers["Retry-After"]).timestamp()
+                        - time(),
+                        0,
+                    )
+                except (TypeError, ValueError):
+                    pass
+        if "X-RateLimit-Reset" in headers:
+            try:
+                return max(float(headers["X-RateLimit-Reset"]) - time(), 0)
+            except ValueError:
+                pass
+        return 60.0
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def _dispatch(self) -> None:
+        # Hand out available tokens to waiting requests in priority order
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        self._refill()
+
+        while self._waiters:
+            if self._waiters[0][2].done():  # Waiting request was cancelled
+                heappop(self._waiters)
+                continue
+
+            now = monotonic()
+            if now < self.paused_until:
+                delay = self.paused_until - now
+            elif self.tokens < 1:
+                delay = (1 - self.tokens) / self.rate
+            else:
+                self.tokens -= 1
+                heappop(self._waiters)[2].set_result(None)
+                continue
+
+            self._wakeup = get_running_loop().call_later(delay, self._dispatch)
+            return None
+        return None
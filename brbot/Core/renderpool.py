@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Callable
+
+import brbot.Core.botdata as bd
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def init_worker() -> None:
+    """
+    Prepares a render worker process. Worker processes are spawned fresh, so fonts registered with matplotlib by the
+    bot are registered again.
+    Returns:
+        None
+    """
+    import matplotlib.font_manager
+
+    for font in matplotlib.font_manager.findSystemFonts(f"{bd.parent}/Shared"):
+        matplotlib.font_manager.fontManager.addfont(font)
+    return None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Starts the render worker pool on first use
+    Returns:
+        Shared render process pool
+    """
+    global _pool
+    if _pool is None:
+        # Forking a process running the event loop and client threads is unsafe, start workers from scratch instead
+        _pool = ProcessPoolExecutor(
+            max_workers=bd.render_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+        )
+        logger.info(f"Started render pool with {bd.render_workers} workers")
+    return _pool
+
+
+async def render(func: Callable, *args, **kwargs):
+    """
+    Runs a CPU-bound render function in a worker process, keeping the event loop free while it runs
+    Args:
+        func: Module-level function to run. Arguments and return value must be picklable
+        *args: Positional arguments of the function
+        **kwargs: Keyword arguments of the function
+    Returns:
+        Return value of the function
+    """
+    loop = asyncio.get_running_loop()
+    call = partial(func, *args, **kwargs)
+    try:
+        return await loop.run_in_executor(get_pool(), call)
+    except BrokenProcessPool:
+        logger.warning("A render worker exited unexpectedly, restarting render pool")
+        shutdown(wait=False)
+        return await loop.run_in_executor(get_pool(), call)
+
+
+def shutdown(wait: bool = True) -> None:
+    """
+    Stops the render worker pool
+    Args:
+        wait: Whether to wait for queued renders to finish
+    Returns:
+        None
+    """
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=wait, cancel_futures=not wait)
+        _pool = None
+    return None
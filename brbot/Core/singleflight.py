@@ -0,0 +1,63 @@
+import logging
+from asyncio import Task, create_task, shield
+from functools import wraps
+from typing import Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+def freeze(value) -> Hashable:
+    """
+    Converts call arguments into a hashable key, recursing into dicts, lists and sets
+    Args:
+        value: Argument value
+    Returns:
+        Hashable equivalent of the value
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(val)) for key, val in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(val) for val in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(val) for val in value)
+    return value
+
+
+def single_flight(func: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """
+    Coalesces concurrent calls of a coroutine function with identical arguments into one call. Callers arriving
+    while a call is in flight await the same result instead of starting a duplicate call. Results are shared between
+    callers and should not be mutated.
+
+    Cancelling one caller does not cancel the shared call for the others.
+    Args:
+        func: Coroutine function to wrap
+    Returns:
+        Wrapped coroutine function
+    """
+    in_flight: dict[Hashable, Task] = {}
+
+    def discard(key: Hashable, task: Task) -> None:
+        if in_flight.get(key) is task:
+            del in_flight[key]
+        if not task.cancelled():
+            task.exception()  # Mark exceptions as retrieved if every caller was cancelled
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            key = (freeze(args), freeze(kwargs))
+            hash(key)
+        except TypeError:  # Arguments cannot be compared, call directly
+            return await func(*args, **kwargs)
+
+        task = in_flight.get(key)
+        if task is None:
+            task = create_task(func(*args, **kwargs))
+            in_flight[key] = task
+            task.add_done_callback(lambda done: discard(key, done))
+        else:
+            logger.debug(f"Joined in-flight call of {func.__qualname__}")
+        return await shield(task)
+
+    return wrapper
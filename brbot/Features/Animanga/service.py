@@ -1,11 +1,14 @@
 import logging
-from asyncio import gather, sleep, Semaphore
+from asyncio import gather, sleep
 from datetime import datetime
 from random import uniform
 from typing import Optional, Dict, List, Tuple
 from brbot.Features.Animanga.data import MediaRec, RecScoringModel
 from brbot.Core.botdata import parent
-from httpx import AsyncClient, ReadTimeout, RequestError, post
+import brbot.Core.anilist as al
+from brbot.Core.ratelimit import Priority
+from brbot.Core.singleflight import single_flight
+from httpx import ReadTimeout, RequestError
 from discord import Embed
 from json import load, dump
 
@@ -90,9 +93,8 @@ class RecService:
         logger.info(f"Querying user statistics for {anilist_id} ({media_type})")
 
         try:
-            response = post(
-                url="https://graphql.anilist.co",
-                json={"query": query, "variables": variables},
+            response = await al.post_query(
+                query=query, variables=variables, priority=Priority.BACKGROUND
             )
         except ReadTimeout as e:
             logger.error(f"Request timed out fetching {anilist_id}: {e}")
@@ -172,9 +174,9 @@ class RecService:
         """
 
         chunk_size = 100
-        max_concurrent = Semaphore(6)
 
-        async def query_list_recommendations(session: AsyncClient, chunk):
+        async def query_list_recommendations(chunk):
+            # Request pacing and rate limit pauses are handled by the shared anilist scheduler
             max_attempts = 3
             for attempt in range(max_attempts):
                 req_vars = {
@@ -187,19 +189,19 @@ class RecService:
                     "chunk": chunk,
                 }
                 logger.debug(f"Querying chunk {chunk} for {anilist_id}")
-                async with max_concurrent:
-                    try:
-                        data = await session.post(
-                            url="https://graphql.anilist.co",
-                            json={"query": query, "variables": req_vars},
-                            timeout=10,
-                        )
-                        if data.status_code == 200:
-                            return data
-                    except ReadTimeout:
-                        logger.warning(
-                            f"List data chunk {chunk} for {anilist_id} timed out"
-                        )
+                try:
+                    data = await al.post_query(
+                        query=query,
+                        variables=req_vars,
+                        timeout=10,
+                        priority=Priority.BACKGROUND,
+                    )
+                    if data.status_code == 200:
+                        return data
+                except ReadTimeout:
+                    logger.warning(
+                        f"List data chunk {chunk} for {anilist_id} timed out"
+                    )
                 logger.warning(
                     f"Attempt {attempt + 1}/{max_attempts} failed for chunk {chunk}"
                 )
@@ -213,11 +215,10 @@ class RecService:
         tasks: list = []
 
         logger.info(f"Querying user list data for {anilist_id} ({media_type})")
-        async with AsyncClient() as client:
-            for i in range(1, watched_count // chunk_size + 2):
-                tasks.append(query_list_recommendations(client, i))
+        for i in range(1, watched_count // chunk_size + 2):
+            tasks.append(query_list_recommendations(i))
 
-            raw_list_data = await gather(*tasks)
+        raw_list_data = await gather(*tasks)
 
         full_rec_list: list = []
         for data_chunk in raw_list_data:
@@ -232,6 +233,7 @@ class RecService:
 
         return full_rec_list
 
+    @single_flight
     async def fetch_recommendations(
         self, anilist_id: int, media_type: str
     ) -> Tuple[List, Dict, List]:
@@ -1,10 +1,11 @@
 import brbot.Features.Bingo.data as bi
 import brbot.Core.anilist as al
 import brbot.Core.botdata as bd
+from brbot.Core.gameindex import get_index
+from brbot.Core.journal import get_journal
 import asyncio
-from os import path, listdir, mkdir
+from os import path, mkdir
 import brbot.Core.botutils as bu
-from shutil import copytree, ignore_patterns
 from datetime import datetime
 from discord import app_commands, Interaction, Member
 from discord.ext import commands
@@ -100,14 +101,6 @@ class BingoCog(commands.GroupCog, name="bingo"):
             return True
 
         game = bd.active_bingos[ctx.guild_id]
-
-        # This is bad and needs to be reworked
-        copytree(
-            f"{bd.parent}/Guilds/{ctx.guild_id}/Bingo/{game.name}",
-            f"{bd.parent}/Guilds/{ctx.guild_id}/BingoBackups/[BACKUP] {game.name}",
-            dirs_exist_ok=True,
-            ignore=ignore_patterns("*.png"),
-        )
         # Get player, validate shot
 
         sender_idx, player = game.get_player(int(ctx.user.id))
@@ -146,7 +139,10 @@ class BingoCog(commands.GroupCog, name="bingo"):
             return True
 
         # Fetch anilist information if it isn't already cached
-        if anilist_id not in game.known_entries:
+        known_entries = (
+            game.known_characters if shot_type == "character" else game.known_entries
+        )
+        if anilist_id not in known_entries:
             if shot_type == "character":
                 anilist_info = await al.query_character(character_id=anilist_id)
             else:
@@ -157,7 +153,7 @@ class BingoCog(commands.GroupCog, name="bingo"):
                     content="Error connecting to anilist, please check URL and try again."
                 )
                 return True
-            game.known_entries[anilist_id] = anilist_info
+            known_entries[anilist_id] = anilist_info
 
         poll_msg = None
 
@@ -170,11 +166,19 @@ class BingoCog(commands.GroupCog, name="bingo"):
             await poll_msg.add_reaction("🔻")
             await asyncio.sleep(7200)
 
-        valid = await shot.is_valid(
-            anilist_info=game.known_entries[anilist_id],
-            starting_anilist=player.starting_anilist,
-            poll_msg=poll_msg,
-        )
+        try:
+            valid = await shot.is_valid(
+                anilist_info=known_entries[anilist_id],
+                starting_anilist=player.starting_anilist,
+                poll_msg=poll_msg,
+            )
+        except ValueError:
+            # Starting anilists are read from the game's sidecar file, which is missing or corrupt
+            await ctx.followup.send(
+                content="Error reading your starting anilist, please contact an admin.",
+                ephemeral=True,
+            )
+            return True
 
         if not valid:
             await ctx.followup.send(
@@ -202,6 +206,15 @@ class BingoCog(commands.GroupCog, name="bingo"):
         game.update_game_after_shot(
             ctx=ctx, shot=shot, player_idx=sender_idx, hit_tile=hit_tile
         )
+        get_journal(f"{bd.parent}/Guilds/{ctx.guild_id}/Bingo/{game.name}").append(
+            "shot",
+            game.asdict,
+            player_id=ctx.user.id,
+            hit_tile=hit_tile,
+            entry_id=anilist_id,
+            character=shot_type == "character",
+            **shot.__dict__,
+        )
         return False
 
     @shot.autocomplete("tag")
@@ -237,11 +250,14 @@ class BingoCog(commands.GroupCog, name="bingo"):
             )
             return True
 
-        embed, image = game.gen_board_embed(page=0, sender_idx=player_idx)
+        embed, image = await game.gen_board_embed(page=0, sender_idx=player_idx)
         view = bi.GameBoardView(game=game, sender_idx=player_idx)
-        await ctx.response.send_message(
-            embed=embed, file=image, view=view, ephemeral=True
-        )
+        if image:
+            await ctx.response.send_message(
+                embed=embed, file=image, view=view, ephemeral=True
+            )
+        else:
+            await ctx.response.send_message(embed=embed, view=view, ephemeral=True)
         return False
 
     @app_commands.command(
@@ -282,8 +298,11 @@ class BingoCog(commands.GroupCog, name="bingo"):
         name="restore",
         description="Restore an incomplete, archived game to active status. (admin only)",
     )
-    @app_commands.describe(name="Name of game to be restored")
-    async def restore(self, ctx: Interaction, name: str):
+    @app_commands.describe(
+        name="Name of game to be restored",
+        seq="Journal shot (seq in journal/events.jsonl) to roll back to, defaults to the saved game",
+    )
+    async def restore(self, ctx: Interaction, name: str, seq: int | None = None):
         if not ctx.user.guild_permissions.administrator:
             await ctx.response.send_message(
                 content="You must be an administrator to use this command!",
@@ -295,14 +314,27 @@ class BingoCog(commands.GroupCog, name="bingo"):
                 "There is already an active game in this server!"
             )
             return True
+        filepath = f"{bd.parent}/Guilds/{ctx.guild_id}/Bingo/{name}"
         try:
-            test_game = await bi.load_bingo_game(
-                filepath=f"{bd.parent}/Guilds/{ctx.guild_id}/Bingo/{name}",
-                guild=ctx.guild,
-            )
+            if seq is None:
+                test_game = await bi.load_bingo_game(filepath=filepath, guild=ctx.guild)
+            else:
+                test_game = await bi.rebuild_bingo_game(
+                    filepath=filepath, guild=ctx.guild, seq=seq
+                )
         except FileNotFoundError:
             await ctx.response.send_message(content="Game name does not exist.")
             return True
+        except ConnectionError:
+            await ctx.response.send_message(
+                content="Error connecting to anilist, please try again in a few minutes."
+            )
+            return True
+        except ValueError:
+            await ctx.response.send_message(
+                content="No readable game state to restore."
+            )
+            return True
         if any(player.done is True for player in test_game.players):
             await ctx.response.send_message(
                 "You can not restore a completed game to active status."
@@ -310,15 +342,23 @@ class BingoCog(commands.GroupCog, name="bingo"):
             return True
 
         test_game.active = True
-        test_game.save_game(f"{bd.parent}/Guilds/{ctx.guild_id}/Bingo/{test_game.name}")
+        test_game.save_game(filepath)
+        if seq is not None:
+            # Later rebuilds start from this snapshot instead of replaying the shots that were rolled back
+            journal = get_journal(filepath)
+            journal.append(
+                "restore", test_game.asdict, player_id=ctx.user.id, to_seq=seq
+            )
+            journal.snapshot(test_game.asdict())
         bd.active_bingos[ctx.guild_id] = test_game
         await ctx.response.send_message(content=bd.pass_str)
         return False
 
     @restore.autocomplete("name")
     async def restore_autocomplete(self, ctx: Interaction, current: str):
-        games = listdir(f"{bd.parent}/Guilds/{ctx.guild_id}/Bingo")
-        games = [gamename for gamename in games if current in gamename]
+        games = get_index(f"{bd.parent}/Guilds/{ctx.guild_id}").names(
+            "Bingo", current, active=False
+        )
         choices = list(map(bu.autocomplete_filter, games))
         if len(choices) > 25:
             choices = choices[:24]
@@ -1,14 +1,23 @@
 import io
 import json
+import logging
+from asyncio import gather
 from dataclasses import dataclass
 from random import sample
 from brbot.Shared.buttons import PrevPgButton, NextPgButton
 from discord.ui import View
 from discord import Interaction, Guild, Embed, File, Member, DMChannel, Message
 
-from PIL import Image, ImageFont, ImageDraw
-
+import brbot.Core.anilist as al
 import brbot.Core.botdata as bd
+import brbot.Core.renderpool as rp
+from brbot.Core.gameindex import record_game
+from brbot.Core.gamesaves import saves
+from brbot.Core.journal import get_journal
+from brbot.Core.listsnapshots import LazyAnilist, store_starting_anilists
+from brbot.Features.Bingo.render import render_bingo_png
+
+logger = logging.getLogger(__name__)
 
 
 bingo_tags = (
@@ -222,7 +231,6 @@ class BingoPlayer:
             "shots": shot_list,
             "donetime": self.donetime,
             "anilist_id": self.anilist_id,
-            "starting_anilist": self.starting_anilist,
             "board": board_dict,
         }
 
@@ -280,150 +288,21 @@ class BingoPlayer:
             return True
         return False
 
-    def draw_board_img(
-        self,
-        filepath: str,
-        board_name: str,
-        draw_tags: bool = False,
-    ) -> None | str:
-        # Generate board image. If player board: only generate tiles which are rendered.
-        # Grey out other tiles.
-
-        # Adjustments
-        label_offset: int = 1
-        size = 5
-        label_font_size: int = 72
-        font = ImageFont.truetype(
-            f"{bd.parent}/Shared/ggsans/ggsans-Bold.ttf", label_font_size
+    async def draw_board_img(self, draw_tags: bool = False) -> bytes | None:
+        # Generate board image in a render worker. Tags of tiles that are not hit are only drawn if draw_tags.
+        col_labels = (
+            ("B", "E", "N", "G", "O")
+            if self.member.id == 302266697488924672
+            else ("B", "I", "N", "G", "O")
         )
-        tile_pixels: int = 150
-        border_color: tuple[int, int, int] = (190, 190, 190)
-        font_color: tuple[int, int, int] = (0, 0, 0)
-        empty_color: tuple[int, int, int] = (255, 255, 255)
-        hit_color: tuple[int, int, int] = (0, 255, 0)
-
-        board_img = Image.new(
-            mode="RGB",
-            size=(
-                (size + label_offset) * tile_pixels,
-                (size + label_offset) * tile_pixels,
-            ),
-            color=0xFFFFFF,
-        )
-        draw: ImageDraw = ImageDraw.Draw(board_img)
-
-        # Draw column labels/tile borders
-
-        for label_x in range(1, size + 1):
-            col_labels = (
-                ("B", "E", "N", "G", "O")
-                if self.member.id == 302266697488924672
-                else ("B", "I", "N", "G", "O")
-            )
-            draw.rectangle(
-                xy=(
-                    (label_x * tile_pixels, 1),
-                    ((label_x + 1) * tile_pixels, tile_pixels),
-                ),
-                fill=empty_color,
-                outline=border_color,
-                width=1,
-            )
-            draw.text(
-                xy=(label_x * tile_pixels + tile_pixels / 2, tile_pixels / 2),
-                text=col_labels[label_x - 1],
-                font=font,
-                anchor="mm",
-                fill=font_color,
-            )
-        # Draw row labels/tile borders
-        for label_y in range(1, size + 1):
-            draw.rectangle(
-                xy=(
-                    (1, label_y * tile_pixels),
-                    (tile_pixels, (label_y + 1) * tile_pixels),
-                ),
-                fill=empty_color,
-                outline=border_color,
-                width=1,
-            )
-            draw.text(
-                xy=(
-                    round(tile_pixels / 2),
-                    label_y * tile_pixels + round(tile_pixels / 2),
-                ),
-                text=str(label_y),
-                font=font,
-                anchor="mm",
-                fill=font_color,
-            )
-        # Draw game tiles
-
-        default_font_size: int = 24
-        font_size = default_font_size
-        font = ImageFont.truetype(
-            f"{bd.parent}/Shared/ggsans/ggsans-Bold.ttf", font_size
-        )
-
-        for coords in self.board.keys():
-            (row, col) = coords
-            # Fill tiles with correct color, if empty, skip to next
-            if self.board[coords].hit:
-                draw.rectangle(
-                    xy=(
-                        (col * tile_pixels, row * tile_pixels),
-                        ((col + 1) * tile_pixels, (row + 1) * tile_pixels),
-                    ),
-                    fill=hit_color,
-                    outline=border_color,
-                    width=1,
-                )
-            else:
-                draw.rectangle(
-                    xy=(
-                        (col * tile_pixels, row * tile_pixels),
-                        ((col + 1) * tile_pixels, (row + 1) * tile_pixels),
-                    ),
-                    fill=empty_color,
-                    outline=border_color,
-                    width=1,
-                )
-
-            text_pixels = draw.textlength(text=self.board[coords].tag, font=font)
-            if self.board[coords].hit or draw_tags:
-                while text_pixels > 0.8 * tile_pixels and font_size > 6:
-                    font_size -= 2
-                    font = ImageFont.truetype(
-                        f"{bd.parent}/Shared/ggsans/ggsans-Bold.ttf", font_size
-                    )
-                    text_pixels = draw.textlength(
-                        text=self.board[coords].tag, font=font
-                    )
-
-                # Draw tile resource and rails
-
-                draw.text(
-                    xy=(
-                        col * tile_pixels + round(tile_pixels / 2),
-                        row * tile_pixels + round(tile_pixels / 2),
-                    ),
-                    text=self.board[coords].tag,
-                    anchor="mm",
-                    fill=font_color,
-                    font=font,
-                )
-
-                if font_size != default_font_size:
-                    font_size = default_font_size
-                    font = ImageFont.truetype(
-                        f"{bd.parent}/Shared/ggsans/ggsans-Bold.ttf", font_size
-                    )
-
+        tiles = {coords: (tile.tag, tile.hit) for coords, tile in self.board.items()}
         try:
-            board_img.save(f"{filepath}/{board_name}.png")
+            return await rp.render(
+                render_bingo_png, tiles, col_labels, draw_tags=draw_tags
+            )
         except PermissionError:
-            return "Could not write the board. Try again in a few seconds..."
-        return None
+            logger.error(f"Permission denied while drawing board of {self.member.id}")
+            return None
 
 
 class BingoGame:
@@ -435,11 +314,14 @@ class BingoGame:
         gameid: int = None,
         active: bool = True,
         known_entries: dict[int, dict] = None,
+        known_characters: dict[int, dict] = None,
     ):
         if players is None:
             players: list[BingoPlayer] = []
         if known_entries is None:
             known_entries = {}
+        if known_characters is None:
+            known_characters = {}
 
         self.name = name
         self.date = date
@@ -447,6 +329,9 @@ class BingoGame:
         self.gameid = gameid
         self.active = active
         self.known_entries = known_entries
+        self.known_characters = known_characters
+        # Whether the starting anilists of the players are stored in the game's sidecar file
+        self.anilists_stored = False
 
     def asdict(self) -> dict:
         player_list = []
@@ -458,7 +343,9 @@ class BingoGame:
             "players": player_list,
             "gameid": self.gameid,
             "active": self.active,
+            # Media/character data is stored with the game, so shots can be checked without anilist
             "known_entries": self.known_entries,
+            "known_characters": self.known_characters,
         }
 
     def __repr__(self) -> str:
@@ -467,6 +354,14 @@ class BingoGame:
             f"<active={self.active}>"
         )
 
+    def summary(self) -> dict:
+        return {
+            "active": self.active,
+            "size": None,
+            "players": [player.member.id for player in self.players],
+            "created": self.date,
+        }
+
     def is_done(self) -> bool:
         done = False
         for player in self.players:
@@ -485,8 +380,12 @@ class BingoGame:
         return player_idx, player
 
     def save_game(self, filepath: str) -> None:
-        with open(f"{filepath}/gamedata.json", "w") as f:
-            json.dump(self.asdict(), f, indent=4, separators=(",", ":"))
+        if not self.anilists_stored:
+            self.anilists_stored = store_starting_anilists(
+                filepath, {p.member.id: p.starting_anilist for p in self.players}
+            )
+        saves.schedule(f"{filepath}/gamedata.json", self.asdict, indent=4)
+        record_game(filepath, self.summary())
 
     def update_game_after_shot(
         self,
@@ -509,13 +408,45 @@ class BingoGame:
         self.save_game(f"{bd.parent}/Guilds/{ctx.guild_id}/Bingo/{self.name}")
         return None
 
+    def apply_event(self, entry: dict) -> None:
+        """
+        Replays a shot recorded in the game journal
+        Args:
+            entry: Journal entry of the shot
+        Returns:
+            None
+        """
+        if entry["event"] != "shot":
+            logger.warning(f"Unknown journal event {entry['event']} in {self.name}")
+            return None
+        player_idx, player = self.get_player(entry["player_id"])
+        player.shots.append(
+            BingoShot(
+                anilist_id=entry["anilist_id"],
+                tag=entry["tag"],
+                time=entry["time"],
+                info=entry["info"],
+                hit=entry["hit"],
+            )
+        )
+        if entry["hit_tile"]:
+            player.board[tuple(entry["hit_tile"])].hit = True
+            if player.has_bingo():
+                player.done = True
+                self.active = False
+        return None
+
     def update_boards_after_create(self, ctx: Interaction) -> None:
         # Update master board/game state
-        self.save_game(f"{bd.parent}/Guilds/{ctx.guild_id}/Bingo/{self.name}")
+        filepath = f"{bd.parent}/Guilds/{ctx.guild_id}/Bingo/{self.name}"
+        self.save_game(filepath)
+        get_journal(filepath).snapshot(self.asdict())
         bd.active_bingos[ctx.guild_id] = self
         return None
 
-    def gen_board_embed(self, page: int, sender_idx: int) -> tuple[Embed, File]:
+    async def gen_board_embed(
+        self, page: int, sender_idx: int
+    ) -> tuple[Embed, File | None]:
         embed: Embed = Embed()
         embed.set_author(name="Anime Bingo", icon_url=bd.bot_avatar_url)
         max_pages: int = len(self.players)
@@ -529,11 +460,7 @@ class BingoGame:
             draw_tags = False
         else:
             draw_tags = True
-        player.draw_board_img(
-            filepath=f"{bd.parent}/Guilds/{player.member.guild.id}/Bingo/{self.name}",
-            board_name=f"{sender_idx}",
-            draw_tags=draw_tags,
-        )
+        board_png = await player.draw_board_img(draw_tags=draw_tags)
 
         embed.set_thumbnail(url=player.member.avatar.url)
         embed.description = f"### Board for {player.member.mention}"
@@ -553,12 +480,9 @@ class BingoGame:
         else:
             embed.add_field(name="\u200b", value="\u200b", inline=False)
 
-        with open(
-            f"{bd.parent}/Guilds/{player.member.guild.id}/Bingo/{self.name}/{sender_idx}.png",
-            "rb",
-        ) as f:
-            file = io.BytesIO(f.read())
-        image = File(file, filename="bingo_board.png")
+        if board_png is None:
+            return embed, None
+        image = File(io.BytesIO(board_png), filename="bingo_board.png")
 
         embed.set_image(url="attachment://bingo_board.png")
         return embed, image
@@ -567,12 +491,46 @@ class BingoGame:
 async def load_bingo_game(
     filepath: str, guild: Guild, active_only: bool = False
 ) -> BingoGame | None:
+    await saves.settle(f"{filepath}/gamedata.json")
     with open(f"{filepath}/gamedata.json", "r") as f:
         game_dict = json.load(f)
     if (
         active_only and not game_dict["active"]
     ):  # Skip loading inactive games if specified for faster loads
         return BingoGame(active=False)
+    return await bingo_game_from_dict(game_dict, guild, filepath)
+
+
+def read_bingo_summary(filepath: str) -> dict:
+    """
+    Reads the summary of a stored game for the game index
+    Args:
+        filepath: Game folder
+    Returns:
+        Game summary, as returned by BingoGame.summary
+    """
+    with open(f"{filepath}/gamedata.json", "r") as f:
+        game_dict = json.load(f)
+    return {
+        "active": game_dict["active"],
+        "size": None,
+        "players": [player["member_id"] for player in game_dict["players"]],
+        "created": game_dict["date"],
+    }
+
+
+async def bingo_game_from_dict(
+    game_dict: dict, guild: Guild, filepath: str
+) -> BingoGame:
+    """
+    Creates a game from its serialized state
+    Args:
+        game_dict: Serialized game, as stored in gamedata.json
+        guild: Guild the game is played in
+        filepath: Game folder
+    Returns:
+        Game
+    """
     # Convert player dicts back into player classes
     player_list: list = []
     for player in game_dict["players"]:
@@ -602,7 +560,10 @@ async def load_bingo_game(
                 dmchannel=member.dm_channel,
                 shots=shot_list,
                 donetime=player["donetime"],
-                starting_anilist=player["starting_anilist"],
+                # Older games store starting anilists in the game data
+                starting_anilist=player.get(
+                    "starting_anilist", LazyAnilist(filepath, player["member_id"])
+                ),
                 anilist_id=player["anilist_id"],
                 board=board,
             )
@@ -614,7 +575,90 @@ async def load_bingo_game(
         players=player_list,
         gameid=game_dict["gameid"],
         active=game_dict["active"],
-        known_entries=game_dict["known_entries"],
+    )
+    game.anilists_stored = all(
+        "starting_anilist" not in player for player in game_dict["players"]
+    )
+
+    # Games store copies of media/character data. The oldest games store both in known_entries, games saved
+    # before the data was stored with them only store IDs.
+    media_ids: set[int] = set()
+    character_ids: set[int] = set()
+    if isinstance(game_dict["known_entries"], dict):
+        for anilist_id, entry in game_dict["known_entries"].items():
+            if "siteUrl" in entry:  # Only character queries request the site URL
+                game.known_characters[int(anilist_id)] = entry
+            else:
+                game.known_entries[int(anilist_id)] = entry
+    else:
+        media_ids = set(game_dict["known_entries"])
+    if isinstance(game_dict.get("known_characters"), dict):
+        for anilist_id, entry in game_dict["known_characters"].items():
+            game.known_characters[int(anilist_id)] = entry
+    else:
+        character_ids = set(game_dict.get("known_characters", []))
+    al.cache_entries("media", game.known_entries)
+    al.cache_entries("character", game.known_characters)
+
+    await resolve_known_entries(game, media_ids, character_ids)
+    return game
+
+
+async def resolve_known_entries(
+    game: BingoGame, media_ids: set[int], character_ids: set[int]
+) -> None:
+    """
+    Fetches the media and characters referenced by a game that it does not know yet, in batched requests
+    Args:
+        game: Game to resolve entries of
+        media_ids: Media IDs referenced by the game
+        character_ids: Character IDs referenced by the game
+    Returns:
+        None
+    Raises:
+        ConnectionError: If an entry could not be fetched
+    """
+    media_ids = media_ids - game.known_entries.keys()
+    character_ids = character_ids - game.known_characters.keys()
+    if not media_ids and not character_ids:
+        return None
+    media, characters = await gather(
+        al.query_media_batch(media_ids), al.query_character_batch(character_ids)
+    )
+    game.known_entries |= {k: v for k, v in media.items() if v is not None}
+    game.known_characters |= {k: v for k, v in characters.items() if v is not None}
+    missing = (media_ids - game.known_entries.keys()) | (
+        character_ids - game.known_characters.keys()
+    )
+    if missing:
+        raise ConnectionError(
+            f"Could not fetch anilist data of entries {sorted(missing)} for game {game.name}"
+        )
+    return None
+
+
+async def rebuild_bingo_game(
+    filepath: str, guild: Guild, seq: int | None = None
+) -> BingoGame:
+    """
+    Rebuilds the state of a game after a shot recorded in its journal
+    Args:
+        filepath: Game folder
+        guild: Guild the game is played in
+        seq: Sequence number of the shot, defaults to the last recorded shot
+    Returns:
+        Game as it was after the shot
+    """
+    state, entries = get_journal(filepath).history(seq)
+    game = await bingo_game_from_dict(state, guild, filepath)
+    for entry in entries:
+        game.apply_event(entry)
+
+    # Fetch media/characters shot since the snapshot
+    await resolve_known_entries(
+        game,
+        {entry["entry_id"] for entry in entries if not entry.get("character")},
+        {entry["entry_id"] for entry in entries if entry.get("character")},
     )
     return game
 
@@ -684,7 +728,7 @@ class GameBoardView(View):
         elif interaction.data["custom_id"] == "next_page":
             self.page += 1
 
-        embed, image = self.game.gen_board_embed(
+        embed, image = await self.game.gen_board_embed(
             page=self.page, sender_idx=self.sender_idx
         )
 
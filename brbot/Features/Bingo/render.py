@@ -0,0 +1,117 @@
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+from brbot.Shared.fonts import fit_font_size, get_font
+
+
+def render_bingo_png(
+    tiles: dict[tuple[int, int], tuple[str, bool]],
+    col_labels: tuple[str, ...],
+    draw_tags: bool = False,
+) -> bytes:
+    """
+    Renders a bingo board to PNG, run in render worker processes
+    Args:
+        tiles: Tag and hit state of every tile
+        col_labels: Column label letters
+        draw_tags: Whether to draw the tags of tiles that are not hit
+    Returns:
+        PNG encoded board image
+    """
+    # Adjustments
+    label_offset: int = 1
+    size = 5
+    label_font_size: int = 72
+    font = get_font(label_font_size)
+    tile_pixels: int = 150
+    border_color: tuple[int, int, int] = (190, 190, 190)
+    font_color: tuple[int, int, int] = (0, 0, 0)
+    empty_color: tuple[int, int, int] = (255, 255, 255)
+    hit_color: tuple[int, int, int] = (0, 255, 0)
+
+    board_img = Image.new(
+        mode="RGB",
+        size=(
+            (size + label_offset) * tile_pixels,
+            (size + label_offset) * tile_pixels,
+        ),
+        color=0xFFFFFF,
+    )
+    draw: ImageDraw = ImageDraw.Draw(board_img)
+
+    # Draw column labels/tile borders
+
+    for label_x in range(1, size + 1):
+        draw.rectangle(
+            xy=(
+                (label_x * tile_pixels, 1),
+                ((label_x + 1) * tile_pixels, tile_pixels),
+            ),
+            fill=empty_color,
+            outline=border_color,
+            width=1,
+        )
+        draw.text(
+            xy=(label_x * tile_pixels + tile_pixels / 2, tile_pixels / 2),
+            text=col_labels[label_x - 1],
+            font=font,
+            anchor="mm",
+            fill=font_color,
+        )
+    # Draw row labels/tile borders
+    for label_y in range(1, size + 1):
+        draw.rectangle(
+            xy=(
+                (1, label_y * tile_pixels),
+                (tile_pixels, (label_y + 1) * tile_pixels),
+            ),
+            fill=empty_color,
+            outline=border_color,
+            width=1,
+        )
+        draw.text(
+            xy=(
+                round(tile_pixels / 2),
+                label_y * tile_pixels + round(tile_pixels / 2),
+            ),
+            text=str(label_y),
+            font=font,
+            anchor="mm",
+            fill=font_color,
+        )
+    # Draw game tiles
+
+    default_font_size: int = 24
+
+    for (row, col), (tag, hit) in tiles.items():
+        # Fill tiles with correct color, if empty, skip to next
+        draw.rectangle(
+            xy=(
+                (col * tile_pixels, row * tile_pixels),
+                ((col + 1) * tile_pixels, (row + 1) * tile_pixels),
+            ),
+            fill=hit_color if hit else empty_color,
+            outline=border_color,
+            width=1,
+        )
+
+        if hit or draw_tags:
+            font = get_font(fit_font_size(tag, 0.8 * tile_pixels, default_font_size))
+
+            # Draw tile tag
+
+            draw.text(
+                xy=(
+                    col * tile_pixels + round(tile_pixels / 2),
+                    row * tile_pixels + round(tile_pixels / 2),
+                ),
+                text=tag,
+                anchor="mm",
+                fill=font_color,
+                font=font,
+            )
+
+    buffer = BytesIO()
+    board_img.save(buffer, format="PNG")
+    return buffer.getvalue()
@@ -27,10 +27,7 @@ class ResponsesCog(commands.GroupCog, name="response"):
             )
             return True
         if bd.config[ctx.guild_id]["LIMIT_USER_RESPONSES"]:
-            user_rsps = 0
-            for existing_response in bd.responses[ctx.guild_id]:
-                if existing_response.user_id == int(ctx.user.id):
-                    user_rsps += 1
+            user_rsps = bd.responses[ctx.guild_id].user_count(int(ctx.user.id))
             if user_rsps >= bd.config[ctx.guild_id]["MAX_USER_RESPONSES"]:
                 await ctx.response.send_message(
                     content=f"You currently have the maximum of "
@@ -44,11 +41,6 @@ class ResponsesCog(commands.GroupCog, name="response"):
             rsp.Response(exact, trigger.lower(), response, int(ctx.user.id)),
         )
 
-        # Update responses
-        bd.responses[ctx.guild_id] = rsp.load_responses(
-            f"{bd.parent}/Guilds/{ctx.guild_id}/responses.json"
-        )
-
         if not error:
             await ctx.response.send_message(content=bd.pass_str)
         else:
@@ -93,11 +85,6 @@ class ResponsesCog(commands.GroupCog, name="response"):
             await ctx.response.send_message(content=bd.fail_str)
             return True
 
-        # Update responses
-        bd.responses[ctx.guild_id] = rsp.load_responses(
-            f"{bd.parent}/Guilds/{ctx.guild_id}/responses.json"
-        )
-
     @remove.autocomplete("trigger")
     async def trigger_autocomplete(
         self, ctx: Interaction, current: str
@@ -117,8 +104,9 @@ class ResponsesCog(commands.GroupCog, name="response"):
         # Add autocomplete response options for the specified trigger.
         responses = [
             response.text
-            for response in bd.responses[ctx.guild_id]
-            if response.trig == ctx.namespace["trigger"]
+            for response in bd.responses[ctx.guild_id].with_trigger(
+                ctx.namespace["trigger"]
+            )
         ]
         choices = list(map(bu.autocomplete_filter, responses))
         if len(choices) > 25:
@@ -148,9 +136,9 @@ class ResponsesCog(commands.GroupCog, name="response"):
             )
             return True
 
-        f = open(f"{bd.parent}/Guilds/{ctx.guild_id}/responses.json", "w")
-        f.close()
-        bd.responses[ctx.guild_id] = []
+        if bd.responses[ctx.guild_id].clear():
+            await ctx.response.send_message(content=bd.fail_str)
+            return True
         logger.info(f"Cleared all responses from {ctx.guild_id}.")
         await ctx.response.send_message(content=bd.pass_str)
         return False
@@ -1,6 +1,10 @@
+from asyncio import Task, create_task, to_thread
 from emoji import emojize, demojize
+from itertools import islice
+from os import path, remove, replace
 import json
 import brbot.Core.botdata as bd
+from brbot.Features.Responses.matcher import TriggerIndex
 from brbot.Shared.buttons import PrevPgButton, NextPgButton
 import logging
 from discord.ui import View
@@ -9,6 +13,9 @@ from random import choice
 
 logger = logging.getLogger(__name__)
 
+# Change log records written before the log is compacted into the snapshot file
+compact_after: int = 200
+
 
 class Response:
     def __init__(self, exact: bool, trig: str, text: str, user_id: int = 0):
@@ -42,99 +49,308 @@ def dict_to_rsp(rsp_dict: dict) -> Response | None:
     return rsp
 
 
-def add_response(guild_id: int, rsp: Response) -> bool:
-    f_name: str = "responses.json"
-    rsp.trig, rsp.text = demojize(rsp.trig), demojize(rsp.text)
-    if not rsp.text:
-        return True
-    try:
-        with open(f"{bd.parent}/Guilds/{guild_id}/{f_name}", "r") as f:
+class ResponseStore:
+    """
+    In-memory responses of a guild, kept in insertion order with lookup indexes updated in place.
+
+    The store is persisted as a snapshot file plus an append-only change log. Each change appends one numbered
+    record to the log, and the log is folded into the snapshot in the background once it grows long.
+
+    Attributes:
+        filepath (str): Path of the snapshot file
+        log_path (str): Path of the change log
+        seq (int): Number of the last change applied
+        index (TriggerIndex): Trigger lookup used to match messages
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.log_path = f"{path.splitext(filepath)[0]}.log"
+        self.seq: int = 0
+        self.index = TriggerIndex()
+        self._responses: dict[Response, None] = {}  # Ordered set of responses
+        self._by_trig: dict[str, dict[Response, None]] = {}
+        self._user_counts: dict[int, int] = {}
+        self._log_records: int = 0
+        self._compaction: Task | None = None
+
+    def __iter__(self):
+        return iter(self._responses)
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def page(self, start: int, stop: int) -> list[Response]:
+        return list(islice(self._responses, start, stop))
+
+    def with_trigger(self, trig: str) -> list[Response]:
+        return list(self._by_trig.get(trig, ()))
+
+    def user_count(self, user_id: int) -> int:
+        return self._user_counts.get(user_id, 0)
+
+    def find(self, trig: str, text: str = "", exact: bool = None) -> Response | None:
+        """
+        Finds the first response matching a trigger, and optionally its text and exactness
+        Args:
+            trig: Response trigger
+            text: Response text, any text matches if not specified
+            exact: Response exactness, either matches if not specified
+        Returns:
+            Matching response, or None if there is no match
+        """
+        for rsp in self._by_trig.get(trig, ()):
+            if rsp.text == text or not text:
+                if rsp.exact == exact or exact is None:
+                    return rsp
+        return None
+
+    def _insert(self, rsp: Response) -> None:
+        self._responses[rsp] = None
+        self._by_trig.setdefault(rsp.trig, {})[rsp] = None
+        self._user_counts[rsp.user_id] = self._user_counts.get(rsp.user_id, 0) + 1
+        self.index.add(rsp)
+
+    def _delete(self, rsp: Response) -> None:
+        del self._responses[rsp]
+        same_trig = self._by_trig[rsp.trig]
+        del same_trig[rsp]
+        if not same_trig:
+            del self._by_trig[rsp.trig]
+        self._user_counts[rsp.user_id] -= 1
+        self.index.remove(rsp)
+
+    def _clear(self) -> None:
+        self._responses.clear()
+        self._by_trig.clear()
+        self._user_counts.clear()
+        self.index = TriggerIndex()
+
+    def _apply(self, record: dict) -> None:
+        # Applies a change log record to the in-memory responses
+        if record["op"] == "clear":
+            self._clear()
+            return None
+        rsp = dict_to_rsp(record)
+        if rsp is None:
+            return None
+        rsp.trig, rsp.text = emojize(rsp.trig), emojize(rsp.text)
+        if record["op"] == "add":
+            self._insert(rsp)
+        elif record["op"] == "remove":
+            match = self.find(rsp.trig, rsp.text, rsp.exact)
+            if match is not None:
+                self._delete(match)
+        return None
+
+    def _append(self, op: str, rsp: Response | None = None) -> bool:
+        # Writes a change to the log before it is applied in memory, returns True if the write failed
+        record = {"seq": self.seq + 1, "op": op}
+        if rsp is not None:
+            record.update(
+                exact=rsp.exact,
+                trig=demojize(rsp.trig),
+                text=demojize(rsp.text),
+                user_id=rsp.user_id,
+            )
+        try:
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        except (OSError, UnicodeError) as e:
+            logger.error(f"Could not write to {self.log_path}: {e}")
+            return True
+        self.seq += 1
+        self._log_records += 1
+        return False
+
+    def _check_compaction(self) -> None:
+        # Called once a logged change has also been applied in memory
+        if self._log_records >= compact_after:
+            self.schedule_compaction()
+
+    def add(self, rsp: Response) -> bool:
+        """
+        Adds a response
+        Args:
+            rsp: Response to add
+        Returns:
+            True if the response could not be added, False otherwise
+        """
+        rsp.trig, rsp.text = emojize(demojize(rsp.trig)), emojize(demojize(rsp.text))
+        if not rsp.text:
+            return True
+        if self.find(rsp.trig, rsp.text) is not None:  # Reject identical additions
+            return True
+        if self._append("add", rsp):
+            return True
+        self._insert(rsp)
+        self._check_compaction()
+        return False
+
+    def remove(self, delete_req: Response) -> bool:
+        """
+        Removes one response, narrowing matches by trigger, then text, then exactness until one remains
+        Args:
+            delete_req: Response describing which response to delete
+        Returns:
+            True if no single response matched the request or it could not be removed, False otherwise
+        """
+        to_del = self.with_trigger(emojize(demojize(delete_req.trig)))
+        if len(to_del) > 1:
+            text = emojize(demojize(delete_req.text))
+            to_del = [rsp for rsp in to_del if rsp.text == text]
+        if len(to_del) > 1:
+            to_del = [rsp for rsp in to_del if rsp.exact == delete_req.exact]
+        if len(to_del) != 1:
+            return True
+
+        if self._append("remove", to_del[0]):
+            return True
+        self._delete(to_del[0])
+        self._check_compaction()
+        return False
+
+    def clear(self) -> bool:
+        """
+        Removes all responses
+        Returns:
+            True if the responses could not be cleared, False otherwise
+        """
+        if self._append("clear"):
+            return True
+        self._clear()
+        self._check_compaction()
+        return False
+
+    def load(self) -> None:
+        """
+        Loads the snapshot file and replays changes logged after it
+        Returns:
+            None
+        """
+        try:
+            with open(self.filepath, "r") as f:
+                try:
+                    snapshot = json.load(f)
+                except ValueError:
+                    snapshot = []
+        except FileNotFoundError:
+            logger.warning(
+                f"Error loading response file {self.filepath}, blank file created"
+            )
+            f = open(self.filepath, "w")
+            f.close()
+            snapshot = []
+
+        # Older snapshots are a bare list of responses
+        if isinstance(snapshot, dict):
+            self.seq = snapshot.get("seq", 0)
+            snapshot = snapshot.get("responses", [])
+        for line in snapshot:
+            self._apply({"op": "add", **line})
+
+        # A rotated log is left behind if the bot stopped during compaction
+        rotated = f"{self.log_path}.1"
+        damaged = False
+        for log_path in (rotated, self.log_path):
             try:
-                lines: list = json.load(f)
-            except json.decoder.JSONDecodeError:
-                lines: list = []
-        duplicates = [next((x for x in lines if x["trig"] == rsp.trig), None)]
-        if duplicates != [None]:
-            for x in duplicates:
-                if x["text"] == rsp.text:  # Reject identical additions
-                    return True
-        lines.append(rsp.__dict__)
-    except FileNotFoundError:
-        f = open(f"{bd.parent}/Guilds/{guild_id}/{f_name}", "w")
-        f.close()
-    try:
-        with open(f"{bd.parent}/Guilds/{guild_id}/{f_name}", "w") as f:
-            json.dump(lines, f, indent=4)
-    except UnicodeError as e:
-        logger.error(f"Could not write to {f_name}: {e}")
-        return True
-    return False
+                with open(log_path, "r") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:  # Partially written final record
+                            damaged = True
+                            continue
+                        if record["seq"] <= self.seq:
+                            continue
+                        self._apply(record)
+                        self.seq = record["seq"]
+                        self._log_records += 1
+            except FileNotFoundError:
+                continue
+
+        # Fold leftover or damaged logs into the snapshot before appending new changes
+        if path.exists(rotated) or damaged:
+            self._write_snapshot(self.snapshot(), rotated)
+            self._log_records = 0
+            if path.exists(self.log_path):
+                remove(self.log_path)
+        return None
 
+    def snapshot(self) -> dict:
+        return {
+            "seq": self.seq,
+            "responses": [
+                {
+                    "exact": rsp.exact,
+                    "trig": demojize(rsp.trig),
+                    "text": demojize(rsp.text),
+                    "user_id": rsp.user_id,
+                }
+                for rsp in self._responses
+            ],
+        }
+
+    def _write_snapshot(self, snapshot: dict, rotated_log: str) -> None:
+        # Atomically replaces the snapshot file, then drops the log records it now contains
+        with open(f"{self.filepath}.tmp", "w") as f:
+            json.dump(snapshot, f, indent=4)
+        replace(f"{self.filepath}.tmp", self.filepath)
+        if path.exists(rotated_log):
+            remove(rotated_log)
+
+    def schedule_compaction(self) -> None:
+        """
+        Folds the change log into the snapshot file in a background thread. Changes made while compacting are
+        written to a new log.
+        Returns:
+            None
+        """
+        if self._compaction is not None and not self._compaction.done():
+            return None
+        rotated = f"{self.log_path}.1"
+        try:
+            if path.exists(rotated):  # Keep records of a failed compaction
+                with open(self.log_path, "r") as f, open(rotated, "a") as rotated_f:
+                    rotated_f.write(f.read())
+                remove(self.log_path)
+            else:
+                replace(self.log_path, rotated)
+        except OSError as e:
+            logger.error(f"Could not rotate {self.log_path}: {e}")
+            return None
+        self._log_records = 0
+        self._compaction = create_task(
+            to_thread(self._write_snapshot, self.snapshot(), rotated)
+        )
+        self._compaction.add_done_callback(self._compaction_done)
+        return None
 
-def rmv_response(guild_id: int, delete_req: Response) -> bool:
-    f_name: str = "responses.json"
-    try:
-        with open(f"{bd.parent}/Guilds/{guild_id}/{f_name}", "r") as f:
-            lines: list[dict] = json.load(f)
-    except json.decoder.JSONDecodeError or FileNotFoundError as e:
-        logger.warning(f"Error in response file {f_name} in server {guild_id}: {e}")
-        return True
-
-    # Search for desired index of response to delete. Filter by trigger, then text,
-    # then exact until there is only 1 option. Return an error if nothing matches the delete request
-    to_del: list = [
-        i for i, rsp in enumerate(lines) if rsp["trig"] == demojize(delete_req.trig)
-    ]
-    if len(to_del) > 1:
-        to_del: list = [
-            i for i in to_del if lines[i]["text"] == demojize(delete_req.text)
-        ]
-    if len(to_del) > 1:
-        to_del: list = [i for i in to_del if lines[i]["exact"] == delete_req.exact]
-    if not to_del or len(to_del) > 1:
-        return True
-
-    lines.pop(to_del[0])
-
-    with open(f"{bd.parent}/Guilds/{guild_id}/{f_name}", "w") as f:
-        if not lines:
-            f.write("[]")
+    def _compaction_done(self, task: Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to compact {self.log_path}: {task.exception()}")
         else:
-            json.dump(lines, f, indent=4)
+            logger.debug(f"Compacted {self.log_path} into {self.filepath}")
 
-    return False
 
+def add_response(guild_id: int, rsp: Response) -> bool:
+    return bd.responses[guild_id].add(rsp)
 
-def load_responses(file) -> list:
-    try:
-        with open(file, "r") as f:
-            try:
-                lines: list = json.load(f)
-            except ValueError:
-                lines: list = []
-        for idx, line in enumerate(lines):
-            lines[idx] = dict_to_rsp(line)
-        for rsp in lines:
-            rsp.trig = emojize(rsp.trig)
-            rsp.text = emojize(rsp.text)
-
-    except FileNotFoundError:
-        logger.warning(f"Error loading response file {file}, blank file created")
-        f = open(file, "w")
-        f.close()
-        lines: list = []
-    return lines
+
+def rmv_response(guild_id: int, delete_req: Response) -> bool:
+    return bd.responses[guild_id].remove(delete_req)
+
+
+def load_responses(file) -> ResponseStore:
+    store = ResponseStore(file)
+    store.load()
+    return store
 
 
 def get_resp(
     guild_id: int, trig: str, text: str = "", exact: bool = None
 ) -> Response | None:
-    for rsp in bd.responses[guild_id]:
-        if rsp.trig == trig:
-            if rsp.text == text or not text:
-                if rsp.exact == exact or exact is None:
-                    return rsp
-    return None
+    return bd.responses[guild_id].find(trig, text, exact)
 
 
 def gen_resp_list(guild: Guild, page: int) -> Embed:
@@ -151,22 +367,14 @@ def gen_resp_list(guild: Guild, page: int) -> Embed:
     list_msg.set_author(name=guild.name, icon_url=bd.bot_avatar_url)
     list_msg.set_thumbnail(url=guild.icon.url)
     list_msg.set_footer(text=f"Page {page}/{max_pages}")
-    nums: range = (
-        range((page - 1) * 10, len(bd.responses[guild_id]))
-        if page == max_pages
-        else range((page - 1) * 10, page * 10)
-    )
-    for i in nums:
-        pref: str = (
-            "**Exact Trigger:** "
-            if bd.responses[guild_id][i].exact
-            else "**Phrase Trigger:** "
-        )
-        rsp_field: str = f"{pref}{bd.responses[guild_id][i].trig} \n **Respond: ** {bd.responses[guild_id][i].text}"
+    start: int = (page - 1) * 10
+    for response in bd.responses[guild_id].page(start, start + 10):
+        pref: str = "**Exact Trigger:** " if response.exact else "**Phrase Trigger:** "
+        rsp_field: str = f"{pref}{response.trig} \n **Respond: ** {response.text}"
         if len(rsp_field) >= 1024:
             logger.debug(f"Response too long: {rsp_field}, showing shortened version")
             rsp_field: str = (
-                f"{pref}{bd.responses[guild_id][i].trig} \n "
+                f"{pref}{response.trig} \n "
                 f"**Respond: ** *[Really, really, really long response]*"
             )
 
@@ -182,12 +390,10 @@ def generate_response(message: Message) -> str | None:
         return None
 
     guild_id = message.guild.id
+    index = bd.responses[guild_id].index
+    content = message.content.lower()
 
-    to_send = [
-        response.text
-        for response in bd.responses[guild_id]
-        if response.trig == message.content.lower() and response.exact
-    ]
+    to_send = index.exact_matches(content)
     logger.debug(f"Exact response match found, 1/{len(to_send)} possible responses")
     if to_send:
         return choice(to_send)
@@ -195,11 +401,7 @@ def generate_response(message: Message) -> str | None:
     if not bd.config[guild_id]["ALLOW_PHRASES"]:
         return None
 
-    to_send = [
-        response.text
-        for response in bd.responses[guild_id]
-        if response.trig in message.content.lower() and not response.exact
-    ]
+    to_send = index.phrase_matches(content)
     logger.debug(f"Phrase response match found, 1/{len(to_send)} possible responses")
     if to_send:
         return choice(to_send)
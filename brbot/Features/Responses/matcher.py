@@ -0,0 +1,148 @@
+from collections import deque
+from typing import Iterable
+
+
+class PhraseAutomaton:
+    """
+    Aho-Corasick automaton finding every phrase contained in a text in one pass over the text.
+
+    Attributes:
+        phrases (list[str]): Phrases searched for, empty phrases are ignored
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases: list[str] = list(
+            dict.fromkeys(phrase for phrase in phrases if phrase)
+        )
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[frozenset[int]] = [frozenset()]
+
+        # Build trie of all phrases
+        own_out: list[set[int]] = [set()]
+        for phrase_idx, phrase in enumerate(self.phrases):
+            node = 0
+            for char in phrase:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    own_out.append(set())
+                node = next_node
+            own_out[node].add(phrase_idx)
+
+        # Breadth first pass to link each node to its longest proper suffix in the trie
+        self._out = [frozenset(out) for out in own_out]
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                suffix = self._goto[fallback].get(char, 0)
+                self._fail[child] = suffix if suffix != child else 0
+                self._out[child] = self._out[child] | self._out[self._fail[child]]
+
+    def find(self, text: str) -> set[str]:
+        """
+        Finds all phrases contained in a text
+        Args:
+            text: Text to search
+        Returns:
+            Set of phrases found in the text
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        found: set[int] = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found |= out[node]
+        return {self.phrases[idx] for idx in found}
+
+
+class TriggerIndex:
+    """
+    Compiled lookup of a guild's response triggers. Exact triggers are hashed and phrase triggers are matched with
+    one automaton, so the cost of matching a message does not grow with the number of responses. The automaton is
+    rebuilt on the next phrase lookup after phrase triggers change.
+
+    Attributes:
+        exact (dict[str, list[str]]): Response texts of each exact trigger
+        phrases (dict[str, list[str]]): Response texts of each phrase trigger
+    """
+
+    def __init__(self, responses: Iterable = ()):
+        self.exact: dict[str, list[str]] = {}
+        self.phrases: dict[str, list[str]] = {}
+        self._automaton: PhraseAutomaton | None = None
+        for response in responses:
+            self.add(response)
+
+    @property
+    def automaton(self) -> PhraseAutomaton:
+        if self._automaton is None:
+            self._automaton = PhraseAutomaton(self.phrases)
+        return self._automaton
+
+    def add(self, response) -> None:
+        """
+        Adds a response to the index
+        Args:
+            response: Response to add
+        Returns:
+            None
+        """
+        triggers = self.exact if response.exact else self.phrases
+        if not response.exact and response.trig not in triggers:
+            self._automaton = None
+        triggers.setdefault(response.trig, []).append(response.text)
+        return None
+
+    def remove(self, response) -> None:
+        """
+        Removes a response from the index
+        Args:
+            response: Response to remove
+        Returns:
+            None
+        """
+        triggers = self.exact if response.exact else self.phrases
+        texts = triggers.get(response.trig, [])
+        if response.text in texts:
+            texts.remove(response.text)
+        if not texts:
+            triggers.pop(response.trig, None)
+            if not response.exact:
+                self._automaton = None
+        return None
+
+    def exact_matches(self, content: str) -> list[str]:
+        """
+        Finds the response texts of exact triggers matching a message
+        Args:
+            content: Lowercase message content
+        Returns:
+            List of possible response texts
+        """
+        return self.exact.get(content, [])
+
+    def phrase_matches(self, content: str) -> list[str]:
+        """
+        Finds the response texts of phrase triggers contained in a message
+        Args:
+            content: Lowercase message content
+        Returns:
+            List of possible response texts
+        """
+        # Empty triggers are contained in every message
+        texts = list(self.phrases.get("", []))
+        for phrase in self.automaton.find(content):
+            texts += self.phrases[phrase]
+        return texts
@@ -0,0 +1,180 @@
+import logging
+from asyncio import Task, create_task
+from collections import deque
+from random import getrandbits
+
+import brbot.Core.botdata as bd
+import brbot.Core.renderpool as rp
+from brbot.Features.Trains.grid import TrainBoard
+from brbot.Features.Trains.service import TrainGame
+
+logger = logging.getLogger(__name__)
+
+# Fewest free tiles each start/end edge of a pooled board must have, lowered to half the edge on small boards
+min_free_edge_tiles: int = 8
+
+# Most boards generated for one request before giving up
+max_generation_attempts: int = 40
+
+# Smallest play area width/height, smaller boards rarely pass has_free_edges (8x8 passes about 1 in 10)
+min_play_area_size: int = 12
+
+
+def generate_board(
+    seed: int, play_area_size: tuple[int, int], river_ring: int
+) -> TrainBoard:
+    """
+    Generates a trains board from a seed, run in worker processes
+    Args:
+        seed: Generation seed
+        play_area_size: Size of the board inside the river ring (width, height)
+        river_ring: Width of the river border around the play area
+    Returns:
+        Generated board
+    """
+    width, height = play_area_size
+    game = TrainGame(
+        name=f"pool-{seed}", size=(width + 2 * river_ring, height + 2 * river_ring)
+    )
+    game.gen_trains_board(
+        play_area_size=play_area_size, river_ring=river_ring, seed=seed
+    )
+    return game.board
+
+
+def has_free_edges(board: TrainBoard, river_ring: int) -> bool:
+    """
+    Checks that every edge players can start or end on has enough empty tiles to place players
+    Args:
+        board: Generated board
+        river_ring: Width of the river border around the play area
+    Returns:
+        True if every edge has at least min_free_edge_tiles empty tiles, or half its tiles if it is shorter
+    """
+    width, height = board.size
+    first_row, last_row = 1 + river_ring, height - river_ring
+    first_col, last_col = 1 + river_ring, width - river_ring
+    free = (board.resource == 0) & (board.terrain == 0)
+    edges = (
+        free[first_row : last_row + 1, first_col],
+        free[first_row : last_row + 1, last_col],
+        free[first_row, first_col : last_col + 1],
+        free[last_row, first_col : last_col + 1],
+    )
+    return all(edge.sum() >= min(min_free_edge_tiles, len(edge) // 2) for edge in edges)
+
+
+class BoardPool:
+    """
+    Boards generated ahead of time for common board sizes, so creating a game does not wait on board generation.
+    Boards are generated in the render pool and refilled in the background whenever one is taken.
+
+    Attributes:
+        sizes (list[tuple[int, int]]): Play area sizes (width, height) kept ready
+        depth (int): Boards kept ready per size
+        river_ring (int): Width of the river border of pooled boards
+    """
+
+    def __init__(self, sizes: list[tuple[int, int]], depth: int, river_ring: int = 1):
+        self.sizes = sizes
+        self.depth = depth
+        self.river_ring = river_ring
+        self._boards: dict[tuple[int, int], deque[tuple[int, TrainBoard]]] = {
+            size: deque() for size in sizes
+        }
+        self._fillers: dict[tuple[int, int], Task] = {}
+
+    def start(self) -> None:
+        """
+        Starts generating boards for every pooled size
+        Returns:
+            None
+        """
+        for size in self.sizes:
+            self._refill(size)
+        return None
+
+    def stop(self) -> None:
+        """
+        Stops background board generation
+        Returns:
+            None
+        """
+        for task in self._fillers.values():
+            task.cancel()
+        self._fillers.clear()
+        return None
+
+    def ready(self, play_area_size: tuple[int, int]) -> int:
+        return len(self._boards.get(play_area_size, ()))
+
+    async def generate(
+        self, play_area_size: tuple[int, int], river_ring: int
+    ) -> tuple[int, TrainBoard]:
+        """
+        Generates a board that passes validation, trying new seeds until one does
+        Args:
+            play_area_size: Size of the board inside the river ring (width, height)
+            river_ring: Width of the river border around the play area
+        Returns:
+            Seed and generated board
+        Raises:
+            TrainGame.BoardGenError: If no valid board was generated in max_generation_attempts tries
+        """
+        for _ in range(max_generation_attempts):
+            seed = getrandbits(32)
+            board = await rp.render(generate_board, seed, play_area_size, river_ring)
+            if has_free_edges(board, river_ring):
+                return seed, board
+            logger.debug(f"Discarded generated board with seed {seed}")
+        raise TrainGame.BoardGenError(
+            f"No valid {play_area_size[0]}x{play_area_size[1]} board after {max_generation_attempts} attempts"
+        )
+
+    async def take(
+        self, play_area_size: tuple[int, int], river_ring: int
+    ) -> tuple[int, TrainBoard]:
+        """
+        Takes a ready board, generating one if none of the requested size is ready
+        Args:
+            play_area_size: Size of the board inside the river ring (width, height)
+            river_ring: Width of the river border around the play area
+        Returns:
+            Seed and board
+        Raises:
+            TrainGame.BoardGenError: If no board of the requested size is ready and none could be generated
+        """
+        if river_ring == self.river_ring and self._boards.get(play_area_size):
+            seed, board = self._boards[play_area_size].popleft()
+            self._refill(play_area_size)
+            return seed, board
+
+        seed, board = await self.generate(play_area_size, river_ring)
+        if river_ring == self.river_ring:
+            self._refill(play_area_size)
+        return seed, board
+
+    def _refill(self, play_area_size: tuple[int, int]) -> None:
+        if play_area_size not in self._boards:
+            return None
+        task = self._fillers.get(play_area_size)
+        if task is None or task.done():
+            self._fillers[play_area_size] = create_task(self._fill(play_area_size))
+        return None
+
+    async def _fill(self, play_area_size: tuple[int, int]) -> None:
+        boards = self._boards[play_area_size]
+        while len(boards) < self.depth:
+            try:
+                boards.append(await self.generate(play_area_size, self.river_ring))
+            except TrainGame.BoardGenError as e:
+                logger.error(f"Cannot pool {play_area_size} boards: {e}")
+                return None
+            except Exception as e:
+                logger.warning(f"Failed pre-generating a {play_area_size} board: {e}")
+                return None
+        logger.debug(f"Board pool for {play_area_size} is full")
+        return None
+
+
+boards = BoardPool(sizes=bd.trains_board_pool_sizes, depth=bd.trains_board_pool_depth)
@@ -1,4 +1,9 @@
-from brbot.Features.Trains.service import TrainGame, load_trains_game
+from brbot.Features.Trains.service import (
+    TrainGame,
+    load_trains_game,
+    rebuild_trains_game,
+)
+from brbot.Features.Trains.boardpool import boards, min_play_area_size
 from brbot.Features.Trains.data import (
     TrainShot,
     TrainPlayer,
@@ -10,10 +15,12 @@ from brbot.Features.Trains.data import (
 )
 import brbot.Core.anilist as al
 import brbot.Core.botdata as bd
+from brbot.Core.imagestore import images
+from brbot.Core.gameindex import get_index
+from brbot.Core.journal import get_journal
 import asyncio
-from os import path, listdir, mkdir
+from os import path, mkdir
 import brbot.Core.botutils as bu
-from shutil import copytree, ignore_patterns
 from datetime import datetime
 from io import BytesIO
 from discord import app_commands, Interaction, File, Member
@@ -24,12 +31,18 @@ logger = logging.getLogger(__name__)
 
 
 class TrainsCog(commands.GroupCog, name="trains"):
+    async def cog_load(self) -> None:
+        boards.start()
+
+    async def cog_unload(self) -> None:
+        boards.stop()
+
     @app_commands.command(name="newgame", description="Create a new trains game")
     @app_commands.describe(
         name="Trains game name",
         players="@ the participating players",
-        width="Board width (must be divisible by 4)",
-        height="Board height (must be divisible by 4)",
+        width=f"Board width (at least {min_play_area_size}, must be divisible by 4)",
+        height=f"Board height (at least {min_play_area_size}, must be divisible by 4)",
     )
     async def newgame(
         self,
@@ -51,6 +64,14 @@ class TrainsCog(commands.GroupCog, name="trains"):
         if path.exists(f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{name}"):
             await ctx.followup.send(content="Name already exists!")
             return True
+        if width < min_play_area_size or height < min_play_area_size:
+            await ctx.followup.send(
+                content=f"Width and height must be at least {min_play_area_size}."
+            )
+            return True
+        if width % 4 != 0 or height % 4 != 0:
+            await ctx.followup.send(content="Width and height must be divisible by 4.")
+            return True
 
         logger.info(f"Creating new trains game {name} in {ctx.guild.name}")
 
@@ -103,12 +124,25 @@ class TrainsCog(commands.GroupCog, name="trains"):
                 height + 2 * river_ring,
             ),  # Add space on board for river border
         )
-        try:
-            game.gen_trains_board(play_area_size=(width, height), river_ring=river_ring)
-            game.gen_player_locations(river_ring=river_ring)
-        except game.BoardGenError as e:
-            await ctx.followup.send(content=str(e))
-            return True
+        # Use a pre-generated board, trying other boards if players cannot be placed on one
+        board_attempts: int = 3
+        for attempt in range(board_attempts):
+            try:
+                game.seed, game.board = await boards.take(
+                    play_area_size=(width, height), river_ring=river_ring
+                )
+            except game.BoardGenError as e:
+                await ctx.followup.send(content=str(e))
+                return True
+            try:
+                game.gen_player_locations(river_ring=river_ring)
+                break
+            except game.BoardGenError as e:
+                if attempt == board_attempts - 1:
+                    await ctx.followup.send(content=str(e))
+                    return True
+                for player in game.players:
+                    player.vis_tiles.clear()
 
         game.get_player_tags()
 
@@ -173,11 +207,21 @@ class TrainsCog(commands.GroupCog, name="trains"):
 
         game = bd.active_trains[ctx.guild_id]
 
-        err = game.buy_item(itemname=name, showinfo=showinfo, ctx=ctx)
+        err = game.buy_item(itemname=name, showinfo=showinfo, player_id=ctx.user.id)
         if err:
             await ctx.response.send_message(content=bd.fail_str)
             return True
 
+        filepath = f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{game.name}"
+        get_journal(filepath).append(
+            "buy",
+            game.asdict,
+            player_id=ctx.user.id,
+            item=name,
+            showinfo=showinfo,
+        )
+        game.save_game(filepath)
+
         await ctx.response.send_message(content=bd.pass_str)
         return False
 
@@ -227,10 +271,18 @@ class TrainsCog(commands.GroupCog, name="trains"):
         game = bd.active_trains[ctx.guild_id]
 
         if item == "Bucket":
-            err = game.use_bucket(ctx=ctx, row=row, col=column)
+            err = game.use_bucket(player_id=ctx.user.id, row=row, col=column)
             if err:
                 await ctx.response.send_message(content=bd.fail_str)
                 return True
+            get_journal(f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{game.name}").append(
+                "use",
+                game.asdict,
+                player_id=ctx.user.id,
+                item=item,
+                row=row,
+                col=column,
+            )
             await ctx.response.send_message(content=bd.pass_str)
             await game.update_boards_after_shot(ctx=ctx, row=row, column=column)
         return False
@@ -252,14 +304,6 @@ class TrainsCog(commands.GroupCog, name="trains"):
             return True
 
         game = bd.active_trains[ctx.guild_id]
-
-        # This is bad and needs to be reworked
-        copytree(
-            f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{game.name}",
-            f"{bd.parent}/Guilds/{ctx.guild_id}/TrainBackups/[BACKUP] {game.name}",
-            dirs_exist_ok=True,
-            ignore=ignore_patterns("*.png"),
-        )
         # Get player, validate shot
         show_id = al.anilist_id_from_url(url=link)
         if show_id is None:
@@ -292,18 +336,38 @@ class TrainsCog(commands.GroupCog, name="trains"):
             info=info,
             time=datetime.now().strftime(bd.date_format),
         )
-        game.update_player_stats_after_shot(
+        changed_tiles = game.update_player_stats_after_shot(
             sender_idx=sender_idx, player=player, shot=shot
         )
+        get_journal(f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{game.name}").append(
+            "shot", game.asdict, player_id=ctx.user.id, **shot.__dict__
+        )
 
         # Save/update games
         await ctx.followup.send(content=bd.pass_str)
-        await game.update_boards_after_shot(ctx=ctx, row=row, column=column)
+        await game.update_boards_after_shot(
+            ctx=ctx, row=row, column=column, changed_tiles={sender_idx: changed_tiles}
+        )
         if not game.active:
-            await game.calculate_player_scores(ctx=ctx)
-            embed, image = game.gen_score_embed(ctx=ctx, page=0)
+            try:
+                await game.calculate_player_scores(ctx=ctx)
+            except game.ScoringError as e:
+                # Keep the game open so the final shot can be undone and taken again once anilist responds
+                logger.warning(f"Could not score game {game.name}: {e}")
+                game.active = True
+                bd.active_trains[ctx.guild_id] = game
+                game.save_game(f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{game.name}")
+                await ctx.followup.send(
+                    content="Error reading player anilists, the game could not be scored. Use /trains undo and "
+                    "take your last shot again in a few minutes."
+                )
+                return True
+            embed, image = await game.gen_score_embed(ctx=ctx, page=0)
             view = GameStatsView(game=game)
-            await ctx.followup.send(embed=embed, file=image, view=view)
+            if image:
+                await ctx.followup.send(embed=embed, file=image, view=view)
+            else:
+                await ctx.followup.send(embed=embed, view=view)
         return False
 
     @app_commands.command(name="undo", description="Undo your last shot.")
@@ -320,14 +384,6 @@ class TrainsCog(commands.GroupCog, name="trains"):
 
         game = bd.active_trains[ctx.guild_id]
 
-        # This is bad and needs to be reworked
-        copytree(
-            f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{game.name}",
-            f"{bd.parent}/Guilds/{ctx.guild_id}/TrainBackups/[BACKUP] {game.name}",
-            dirs_exist_ok=True,
-            ignore=ignore_patterns("*.png"),
-        )
-
         sender_idx, player = game.get_player(ctx.user.id)
         if not player.shots:
             await ctx.followup.send(
@@ -344,13 +400,21 @@ class TrainsCog(commands.GroupCog, name="trains"):
             )
             return True
 
-        game.update_player_stats_after_shot(
+        changed_tiles = game.update_player_stats_after_shot(
             sender_idx=sender_idx, player=player, undo=True, shot=shot
         )
+        get_journal(f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{game.name}").append(
+            "undo", game.asdict, player_id=ctx.user.id
+        )
 
         await ctx.followup.send(content=bd.pass_str)
         # Save/update games
-        await game.update_boards_after_shot(ctx=ctx, row=shot.row, column=shot.col)
+        await game.update_boards_after_shot(
+            ctx=ctx,
+            row=shot.row,
+            column=shot.col,
+            changed_tiles={sender_idx: changed_tiles},
+        )
         return False
 
     @app_commands.command(
@@ -379,12 +443,17 @@ class TrainsCog(commands.GroupCog, name="trains"):
             except FileNotFoundError:
                 await ctx.response.send_message(content="Game name does not exist.")
                 return True
+            except ConnectionError:
+                await ctx.response.send_message(
+                    content="Error connecting to anilist, please try again in a few minutes."
+                )
+                return True
             except TypeError or ValueError:
                 return True
         await ctx.response.defer()
 
         # Send stats
-        embed, image = game.gen_stats_embed(ctx=ctx)
+        embed, image = await game.gen_stats_embed(ctx=ctx)
         view = GameStatsView(game=game)
         if image:
             await ctx.followup.send(embed=embed, file=image, view=view)
@@ -394,8 +463,7 @@ class TrainsCog(commands.GroupCog, name="trains"):
 
     @stats.autocomplete("name")
     async def stats_autocomplete(self, ctx: Interaction, current: str):
-        games: list = listdir(f"{bd.parent}/Guilds/{ctx.guild_id}/Trains")
-        games = [gamename for gamename in games if current in gamename]
+        games = get_index(f"{bd.parent}/Guilds/{ctx.guild_id}").names("Trains", current)
         choices = list(map(bu.autocomplete_filter, games))
         if len(choices) > 25:
             choices = choices[:24]
@@ -420,18 +488,15 @@ class TrainsCog(commands.GroupCog, name="trains"):
             )
             return True
 
-        try:
-            with open(
-                f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{game.name}/{ctx.user.id}.png",
-                "rb",
-            ) as f:
-                file = BytesIO(f.read())
-        except FileNotFoundError:
+        board_png = images.get(
+            f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{game.name}/{ctx.user.id}.png"
+        )
+        if board_png is None:
             await ctx.response.send_message(bd.fail_str, ephemeral=True)
             return True
 
         await ctx.response.send_message(
-            file=File(file, filename="board_img.png"), ephemeral=True
+            file=File(BytesIO(board_png), filename="board_img.png"), ephemeral=True
         )
         return False
 
@@ -474,8 +539,11 @@ class TrainsCog(commands.GroupCog, name="trains"):
         name="restore",
         description="Restore an incomplete, archived game to active status. (admin only)",
     )
-    @app_commands.describe(name="Name of game to be restored")
-    async def restore(self, ctx: Interaction, name: str):
+    @app_commands.describe(
+        name="Name of game to be restored",
+        seq="Journal action (seq in journal/events.jsonl) to roll back to, defaults to the saved game",
+    )
+    async def restore(self, ctx: Interaction, name: str, seq: int | None = None):
         if not ctx.user.guild_permissions.administrator:
             await ctx.response.send_message(
                 content="You must be an administrator to use this command!",
@@ -487,14 +555,28 @@ class TrainsCog(commands.GroupCog, name="trains"):
                 "There is already an active game in this server!"
             )
             return True
+        filepath = f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{name}"
         try:
-            test_game = await load_trains_game(
-                filepath=f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{name}",
-                guild=ctx.guild,
-            )
+            if seq is None:
+                test_game = await load_trains_game(filepath=filepath, guild=ctx.guild)
+            else:
+                test_game = await rebuild_trains_game(
+                    filepath=filepath, guild=ctx.guild, seq=seq
+                )
         except FileNotFoundError:
             await ctx.response.send_message(content="Game name does not exist.")
             return True
+        except ConnectionError:
+            await ctx.response.send_message(
+                content="Error connecting to anilist, please try again in a few minutes."
+            )
+            return True
+        except ValueError as e:
+            logger.warning(f"Could not restore game {name}: {e}")
+            await ctx.response.send_message(
+                content="No readable game state to restore."
+            )
+            return True
         if not any(player.done is False for player in test_game.players):
             await ctx.response.send_message(
                 "You can not restore a completed game to active status."
@@ -503,17 +585,23 @@ class TrainsCog(commands.GroupCog, name="trains"):
 
         test_game.active = True
         logger.info(f"Restored game {name} to active status in {ctx.guild.name}")
-        test_game.save_game(
-            f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{test_game.name}"
-        )
+        test_game.save_game(filepath)
+        if seq is not None:
+            # Later rebuilds start from this snapshot instead of replaying the actions that were rolled back
+            journal = get_journal(filepath)
+            journal.append(
+                "restore", test_game.asdict, player_id=ctx.user.id, to_seq=seq
+            )
+            journal.snapshot(test_game.asdict())
         bd.active_trains[ctx.guild_id] = test_game
         await ctx.response.send_message(content=bd.pass_str)
         return False
 
     @restore.autocomplete("name")
     async def restore_autocomplete(self, ctx: Interaction, current: str):
-        games = listdir(f"{bd.parent}/Guilds/{ctx.guild_id}/Trains")
-        games = [gamename for gamename in games if current in gamename]
+        games = get_index(f"{bd.parent}/Guilds/{ctx.guild_id}").names(
+            "Trains", current, active=False
+        )
         choices = list(map(bu.autocomplete_filter, games))
         if len(choices) > 25:
             choices = choices[:24]
@@ -133,10 +133,9 @@ class TrainPlayer:
             "score": self.score,
             "shots": shot_list,
             "donetime": self.donetime,
-            "vis_tiles": self.vis_tiles,
+            "vis_areas": self.vis_tiles.asdict(),
             "inventory": item_dict,
             "anilist_id": self.anilist_id,
-            "starting_anilist": self.starting_anilist,
             "least_watched_genre": self.least_watched_genre,
         }
 
@@ -150,19 +149,39 @@ class TrainPlayer:
             self.inventory.pop(itemname)
 
 
+def index_anilist(anilist: list[dict]) -> dict[int, dict]:
+    """
+    Indexes anilist entries by media ID. Custom lists can hold a show more than once, the first entry is kept.
+    Args:
+        anilist: Anilist entries
+    Returns:
+        Entries by media ID
+    """
+    index: dict[int, dict] = {}
+    for entry in anilist:
+        index.setdefault(entry["mediaId"], entry)
+    return index
+
+
 def find_anilist_changes(
-    start_anilist: list[dict], end_anilist: list[dict]
+    start_anilist: list[dict],
+    end_anilist: list[dict],
+    start_index: dict[int, dict] | None = None,
 ) -> list[dict]:
+    """
+    Finds the shows added to or progressed in an anilist during a game
+    Args:
+        start_anilist: Anilist entries at the start of the game
+        end_anilist: Anilist entries at the end of the game
+        start_index: Start entries indexed by media ID, built from start_anilist if not given
+    Returns:
+        New entries, and changed entries with the episodes watched during the game as progress
+    """
+    if start_index is None:
+        start_index = index_anilist(start_anilist)
     anilist_changes = []
     for end_anime in end_anilist:
-        start_anime = next(
-            (
-                start_anime
-                for start_anime in start_anilist
-                if start_anime["mediaId"] == end_anime["mediaId"]
-            ),
-            None,
-        )
+        start_anime = start_index.get(end_anime["mediaId"])
         if (
             start_anime == end_anime
         ):  # Skip if the show is the same at the beginning and end of game
@@ -205,7 +224,7 @@ class GameStatsView(View):
         elif interaction.data["custom_id"] == "next_page":
             self.page += 1
 
-        embed, image = self.game.gen_stats_embed(interaction, self.page)
+        embed, image = await self.game.gen_stats_embed(interaction, self.page)
 
         if not image:
             await interaction.response.edit_message(
@@ -0,0 +1,294 @@
+import json
+import logging
+import struct
+import zlib
+from collections.abc import Callable
+
+import numpy as np
+
+from brbot.Features.Trains.grid import TrainBoard
+
+logger = logging.getLogger(__name__)
+
+# Version 1 games are stored in gamedata.brb, older games in gamedata.json
+game_format_version: int = 1
+gamefile_name: str = "gamedata.brb"
+legacy_gamefile_name: str = "gamedata.json"
+file_magic: bytes = b"BRBG"
+compression_level: int = 6
+
+
+def json_section(value) -> dict[str, np.ndarray]:
+    return {
+        "json": np.frombuffer(
+            json.dumps(value, separators=(",", ":")).encode("utf-8"), dtype=np.uint8
+        )
+    }
+
+
+def read_json_section(section: dict[str, np.ndarray]):
+    return json.loads(section["json"].tobytes().decode("utf-8"))
+
+
+def pack_shots(shots: list[list[dict]]) -> dict[str, np.ndarray]:
+    """
+    Converts the shots of every player to parallel arrays. Shot info is stored once per distinct text.
+    Args:
+        shots: Serialized shots of each player
+    Returns:
+        Shot arrays by name, with the index of the player taking each shot
+    """
+    rows = [
+        (idx, shot) for idx, player_shots in enumerate(shots) for shot in player_shots
+    ]
+    info_codes: dict[str, int] = {}
+    for _, shot in rows:
+        info_codes.setdefault(shot["info"], len(info_codes))
+    return {
+        "player": np.array([idx for idx, _ in rows], dtype=np.int16),
+        "row": np.array([shot["row"] for _, shot in rows], dtype=np.int16),
+        "col": np.array([shot["col"] for _, shot in rows], dtype=np.int16),
+        "show_id": np.array([shot["show_id"] for _, shot in rows], dtype=np.int32),
+        "info": np.array(
+            [info_codes[shot["info"]] for _, shot in rows], dtype=np.int32
+        ),
+        "infos": np.array(list(info_codes), dtype=np.str_),
+        "time": np.array([shot["time"] for _, shot in rows], dtype=np.str_),
+    }
+
+
+def unpack_shots(arrays: dict[str, np.ndarray], player_count: int) -> list[list[dict]]:
+    """
+    Converts shot arrays back to the serialized shots of every player
+    Args:
+        arrays: Shot arrays, as returned by pack_shots
+        player_count: Number of players in the game
+    Returns:
+        Serialized shots of each player, in the order they were taken
+    """
+    shots: list[list[dict]] = [[] for _ in range(player_count)]
+    infos = arrays["infos"].tolist()
+    for idx, row, col, show_id, info, time in zip(
+        arrays["player"].tolist(),
+        arrays["row"].tolist(),
+        arrays["col"].tolist(),
+        arrays["show_id"].tolist(),
+        arrays["info"].tolist(),
+        arrays["time"].tolist(),
+    ):
+        shots[idx].append(
+            {
+                "row": row,
+                "col": col,
+                "show_id": show_id,
+                "info": infos[info],
+                "time": time,
+            }
+        )
+    return shots
+
+
+def pack_game(
+    header: dict, players: list[dict], board: TrainBoard, known_shows: dict[int, dict]
+) -> dict[str, dict[str, np.ndarray]]:
+    """
+    Converts a game to the sections of a game file
+    Args:
+        header: Serialized game settings, e.g. name, size and shop
+        players: Serialized players, including their shots
+        board: Game board
+        known_shows: Anilist data of the shows referenced by the game, by show ID
+    Returns:
+        Arrays of each section by name
+    """
+    return {
+        "header": json_section(header),
+        "players": json_section(
+            [{k: v for k, v in player.items() if k != "shots"} for player in players]
+        ),
+        "board": board.asarrays(),
+        "shots": pack_shots([player["shots"] for player in players]),
+        # Show data is stored with the game, so the game can be scored without anilist
+        "media": {
+            "show_id": np.array(list(known_shows), dtype=np.int32),
+            **json_section(list(known_shows.values())),
+        },
+    }
+
+
+def write_game_file(filepath: str, sections: dict[str, dict[str, np.ndarray]]) -> None:
+    """
+    Writes a game file. The file starts with a magic number, the format version and a table of the sections, followed
+    by each section compressed on its own, holding its arrays back to back.
+    Args:
+        filepath: Path to write to
+        sections: Arrays of each section by name, as returned by pack_game
+    Returns:
+        None
+    """
+    table: dict[str, dict] = {}
+    blobs: list[bytes] = []
+    offset = 0
+    for section, arrays in sections.items():
+        layout = {}
+        raw = bytearray()
+        for name, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            layout[name] = [values.dtype.str, values.shape, len(raw), values.nbytes]
+            raw += values.tobytes()
+        blob = zlib.compress(bytes(raw), compression_level)
+        table[section] = {"offset": offset, "size": len(blob), "arrays": layout}
+        blobs.append(blob)
+        offset += len(blob)
+    table_bytes = json.dumps(table, separators=(",", ":")).encode("utf-8")
+    with open(filepath, "wb") as f:
+        f.write(file_magic)
+        f.write(struct.pack("<HI", game_format_version, len(table_bytes)))
+        f.write(table_bytes)
+        for blob in blobs:
+            f.write(blob)
+    return None
+
+
+class GameFile:
+    """
+    Stored Trains game. Opening the file reads only its table of sections, and each section is read and decompressed
+    when first used, so e.g. checking whether a game is active reads only its header.
+
+    Attributes:
+        filepath (str): Path of the game file
+        version (int): Format version the file was written with
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._file = open(filepath, "rb")
+        try:
+            if self._file.read(len(file_magic)) != file_magic:
+                raise ValueError(f"{filepath} is not a game file")
+            self.version, table_size = struct.unpack("<HI", self._file.read(6))
+            if self.version > game_format_version:
+                raise ValueError(
+                    f"{filepath} has game format version {self.version}, newer than supported version "
+                    f"{game_format_version}"
+                )
+            self._table: dict[str, dict] = json.loads(self._file.read(table_size))
+        except (struct.error, json.JSONDecodeError, UnicodeDecodeError) as e:
+            self._file.close()
+            raise ValueError(f"{filepath} is corrupt") from e
+        except ValueError:
+            self._file.close()
+            raise
+        self._data_start = self._file.tell()
+        self._sections: dict[str, dict[str, np.ndarray]] = {}
+
+    def section(self, section: str) -> dict[str, np.ndarray]:
+        """
+        Reads one section of the game file
+        Args:
+            section: Section name, e.g. "board"
+        Returns:
+            Arrays of the section by name
+        Raises:
+            ValueError: If the section is truncated or corrupt
+        """
+        if section not in self._sections:
+            try:
+                entry = self._table[section]
+                self._file.seek(self._data_start + entry["offset"])
+                raw = zlib.decompress(self._file.read(entry["size"]))
+                self._sections[section] = {
+                    name: np.frombuffer(
+                        raw,
+                        dtype=dtype,
+                        count=nbytes // np.dtype(dtype).itemsize,
+                        offset=start,
+                    ).reshape(shape)
+                    if nbytes
+                    else np.zeros(shape, dtype=dtype)
+                    for name, (dtype, shape, start, nbytes) in entry["arrays"].items()
+                }
+            except (zlib.error, KeyError, TypeError, ValueError) as e:
+                raise ValueError(
+                    f"{self.filepath} is corrupt, cannot read section {section}"
+                ) from e
+        return self._sections[section]
+
+    def decode(self, section: str, decoder: Callable[[dict[str, np.ndarray]], object]):
+        """
+        Reads one section of the game file and converts its arrays
+        Args:
+            section: Section name, e.g. "board"
+            decoder: Function converting the arrays of the section
+        Returns:
+            Converted section
+        Raises:
+            ValueError: If the section is truncated or corrupt
+        """
+        arrays = self.section(section)
+        try:
+            return decoder(arrays)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise ValueError(
+                f"{self.filepath} is corrupt, cannot decode section {section}"
+            ) from e
+
+    def header(self) -> dict:
+        return self.decode("header", read_json_section)
+
+    def players(self, shots: bool = True) -> list[dict]:
+        """
+        Reads the serialized players of the game
+        Args:
+            shots: Whether to read the shots of the players
+        Returns:
+            Serialized players, as returned by TrainPlayer.asdict
+        """
+        players = self.decode("players", read_json_section)
+        if shots:
+            for player, player_shots in zip(
+                players,
+                self.decode("shots", lambda arrays: unpack_shots(arrays, len(players))),
+            ):
+                player["shots"] = player_shots
+        return players
+
+    def board(self, size: tuple[int, int]) -> TrainBoard:
+        return self.decode("board", lambda arrays: TrainBoard.from_arrays(size, arrays))
+
+    def known_shows(self) -> dict[int, dict] | list[int]:
+        """
+        Reads the shows referenced by the game
+        Returns:
+            Anilist data of each show by show ID, or only the show IDs for files written before show data was stored
+        """
+
+        def decode_shows(arrays: dict[str, np.ndarray]) -> dict[int, dict] | list[int]:
+            show_ids = arrays["show_id"].tolist()
+            if "json" not in arrays:
+                return show_ids
+            return dict(zip(show_ids, read_json_section(arrays), strict=True))
+
+        return self.decode("media", decode_shows)
+
+    def game_dict(self) -> dict:
+        """
+        Reads the whole game. The board is returned as a TrainBoard instead of its serialized form.
+        Returns:
+            Serialized game, as returned by TrainGame.asdict
+        """
+        game_dict = self.header()
+        game_dict["players"] = self.players()
+        game_dict["board"] = self.board(tuple(game_dict["size"]))
+        game_dict["known_shows"] = self.known_shows()
+        return game_dict
+
+    def close(self) -> None:
+        self._file.close()
+        return None
+
+    def __enter__(self) -> "GameFile":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,607 @@
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from brbot.Features.Trains.data import TrainTile
+
+
+class RailList(list):
+    """
+    Rail tags of one tile, in the order they were placed. Changes are mirrored into the board's rail bitmask.
+    """
+
+    def __init__(self, board: "TrainBoard", coords: tuple[int, int], tags=()):
+        super().__init__(tags)
+        self._board = board
+        self._coords = coords
+
+    def _sync(self) -> None:
+        self._board.sync_rail_mask(self._coords, self)
+
+    def __reduce__(self):
+        # Pickle restores list items through append/extend, which sync before _board is set, so rebuild via __init__
+        return type(self), (self._board, self._coords, list(self))
+
+    def append(self, tag: str) -> None:
+        super().append(tag)
+        self._sync()
+
+    def extend(self, tags: Iterable[str]) -> None:
+        super().extend(tags)
+        self._sync()
+
+    def insert(self, idx: int, tag: str) -> None:
+        super().insert(idx, tag)
+        self._sync()
+
+    def remove(self, tag: str) -> None:
+        super().remove(tag)
+        self._sync()
+
+    def pop(self, idx: int = -1) -> str:
+        tag = super().pop(idx)
+        self._sync()
+        return tag
+
+    def clear(self) -> None:
+        super().clear()
+        self._sync()
+
+    def __iadd__(self, tags: Iterable[str]) -> "RailList":
+        self.extend(tags)
+        return self
+
+    def __setitem__(self, idx, tag) -> None:
+        super().__setitem__(idx, tag)
+        self._sync()
+
+    def __delitem__(self, idx) -> None:
+        super().__delitem__(idx)
+        self._sync()
+
+
+class TileView:
+    """
+    View of one tile of an array-backed board, with the same attributes as TrainTile. Setting an attribute writes
+    through to the board arrays.
+    """
+
+    __slots__ = ("_board", "_coords")
+
+    def __init__(self, board: "TrainBoard", coords: tuple[int, int]):
+        self._board = board
+        self._coords = coords
+
+    @property
+    def resource(self) -> str | None:
+        return self._board.resources[self._board.resource[self._coords]]
+
+    @resource.setter
+    def resource(self, value: str | None) -> None:
+        self._board.resource[self._coords] = self._board.code(
+            self._board.resources, value
+        )
+
+    @property
+    def terrain(self) -> str | None:
+        return self._board.terrains[self._board.terrain[self._coords]]
+
+    @terrain.setter
+    def terrain(self, value: str | None) -> None:
+        self._board.terrain[self._coords] = self._board.code(
+            self._board.terrains, value
+        )
+
+    @property
+    def zone(self) -> str | None:
+        return self._board.zones[self._board.zone[self._coords]]
+
+    @zone.setter
+    def zone(self, value: str | None) -> None:
+        self._board.zone[self._coords] = self._board.code(self._board.zones, value)
+
+    @property
+    def rails(self) -> RailList:
+        return self._board.rails_at(self._coords)
+
+    @rails.setter
+    def rails(self, tags: Iterable[str]) -> None:
+        self._board.rails_at(self._coords)[:] = tags
+
+    def asdict(self) -> dict:
+        return {
+            "resource": self.resource,
+            "terrain": self.terrain,
+            "zone": self.zone,
+            "rails": list(self.rails),
+        }
+
+    def __repr__(self) -> str:
+        return f"<TileView {self._coords} {self.asdict()}>"
+
+
+class TrainBoard:
+    """
+    Array-backed Trains board. Resources, terrain and zones are stored as small integer codes in parallel arrays,
+    and the players with a rail on each tile as a bitmask, so whole-board queries are vectorized. Arrays are indexed
+    by the 1-based (row, col) game coordinates and have a one tile border of empty tiles, so neighbour lookups never
+    go out of bounds.
+
+    The board can be used like the dict[(row, col), TrainTile] it replaces: indexing by coordinates returns a
+    TileView, and iterating yields the coordinates of every tile in row-major order.
+
+    Attributes:
+        size (tuple[int, int]): Board size (width, height)
+        resource (np.ndarray): int8 index into resources of each tile
+        terrain (np.ndarray): int8 index into terrains of each tile
+        zone (np.ndarray): int8 index into zones of each tile
+        rail_mask (np.ndarray): uint32 bitmask of the tags in tags with a rail on each tile
+        rail_counts (np.ndarray): int8 number of rails on each tile, a player passing a tile twice counts twice
+        resources (list[str | None]): Resource of each resource code, code 0 is no resource
+        terrains (list[str | None]): Terrain of each terrain code, code 0 is no terrain
+        zones (list[str | None]): Zone of each zone code, code 0 is no zone
+        tags (list[str]): Player tag of each rail mask bit
+    """
+
+    def __init__(self, size: tuple[int, int]):
+        width, height = size
+        self.size: tuple[int, int] = (width, height)
+        shape = (height + 2, width + 2)
+        self.resource = np.zeros(shape, dtype=np.int8)
+        self.terrain = np.zeros(shape, dtype=np.int8)
+        self.zone = np.zeros(shape, dtype=np.int8)
+        self.rail_mask = np.zeros(shape, dtype=np.uint32)
+        self.rail_counts = np.zeros(shape, dtype=np.int8)
+        self.resources: list[str | None] = [None]
+        self.terrains: list[str | None] = [None]
+        self.zones: list[str | None] = [None]
+        self.tags: list[str] = []
+        self._rails: dict[tuple[int, int], RailList] = {}
+
+    @classmethod
+    def from_tiles(
+        cls, size: tuple[int, int], tiles: dict[tuple[int, int], TrainTile]
+    ) -> "TrainBoard":
+        """
+        Creates an array-backed board from a dict of tiles
+        Args:
+            size: Board size (width, height)
+            tiles: Board tiles
+        Returns:
+            Board holding the same tiles
+        """
+        board = cls(size)
+        for coords, tile in tiles.items():
+            view = board[coords]
+            view.resource = tile.resource
+            view.terrain = tile.terrain
+            view.zone = tile.zone
+            if tile.rails:
+                view.rails = tile.rails
+        return board
+
+    @classmethod
+    def from_arrays(
+        cls, size: tuple[int, int], arrays: dict[str, np.ndarray]
+    ) -> "TrainBoard":
+        """
+        Creates a board from the arrays of a stored board
+        Args:
+            size: Board size (width, height)
+            arrays: Board arrays, as returned by asarrays
+        Returns:
+            Board holding the stored tiles
+        """
+        board = cls(size)
+        board.resource[:] = arrays["resource"]
+        board.terrain[:] = arrays["terrain"]
+        board.zone[:] = arrays["zone"]
+        board.resources = [None] + arrays["resources"].tolist()
+        board.terrains = [None] + arrays["terrains"].tolist()
+        board.zones = [None] + arrays["zones"].tolist()
+        board.tags = arrays["tags"].tolist()
+        tile_rails: dict[tuple[int, int], list[str]] = {}
+        for row, col, tag in arrays["rails"].tolist():
+            tile_rails.setdefault((row, col), []).append(board.tags[tag])
+        for coords, tags in tile_rails.items():
+            board.rails_at(coords)[:] = tags
+        return board
+
+    def asarrays(self) -> dict[str, np.ndarray]:
+        """
+        Converts the board to fixed-layout arrays for storage. Resources, terrain and zones are stored as their codes
+        with the code tables holding each name once, and rails as (row, col, tag code) rows in the order they were
+        placed on each tile.
+        Returns:
+            Board arrays by name
+        """
+        rails = [
+            (row, col, self.tags.index(tag))
+            for (row, col), tags in self._rails.items()
+            for tag in tags
+        ]
+        return {
+            "resource": self.resource.copy(),
+            "terrain": self.terrain.copy(),
+            "zone": self.zone.copy(),
+            "resources": np.array(self.resources[1:], dtype=np.str_),
+            "terrains": np.array(self.terrains[1:], dtype=np.str_),
+            "zones": np.array(self.zones[1:], dtype=np.str_),
+            "tags": np.array(self.tags, dtype=np.str_),
+            "rails": np.array(rails, dtype=np.int16).reshape(-1, 3),
+        }
+
+    @staticmethod
+    def code(table: list, value) -> int:
+        """
+        Finds the code of a value, adding the value to the code table if it is new
+        Args:
+            table: Code table
+            value: Value to encode
+        Returns:
+            Index of the value in the table
+        """
+        try:
+            return table.index(value)
+        except ValueError:
+            table.append(value)
+            return len(table) - 1
+
+    def tag_bit(self, tag: str) -> int:
+        """
+        Finds the rail mask bit of a player tag, assigning one if the tag is new
+        Args:
+            tag: Player tag
+        Returns:
+            Bit value of the tag
+        """
+        idx = self.code(self.tags, tag)
+        if idx >= 32:
+            raise ValueError("Boards support at most 32 rail tags")
+        return 1 << idx
+
+    def in_bounds(self, row: int, col: int) -> bool:
+        return 1 <= row <= self.size[1] and 1 <= col <= self.size[0]
+
+    def rails_at(self, coords: tuple[int, int]) -> RailList:
+        if coords not in self._rails:
+            self._rails[coords] = RailList(self, coords)
+        return self._rails[coords]
+
+    def sync_rail_mask(self, coords: tuple[int, int], tags: list[str]) -> None:
+        mask = 0
+        for tag in tags:
+            mask |= self.tag_bit(tag)
+        self.rail_mask[coords] = mask
+        self.rail_counts[coords] = len(tags)
+        return None
+
+    def rail_count(self, row: int, col: int) -> int:
+        """
+        Counts the rails on a tile
+        Args:
+            row: Tile row
+            col: Tile column
+        Returns:
+            Number of rails
+        """
+        return int(self.rail_counts[row, col])
+
+    def has_rail_near(
+        self, tag: str, row: int, col: int, exclude: tuple[int, int] | None = None
+    ) -> bool:
+        """
+        Checks if a player has a rail on a tile directly next to a tile
+        Args:
+            tag: Player tag
+            row: Tile row
+            col: Tile column
+            exclude: Neighbouring tile to ignore
+        Returns:
+            True if one of the four neighbouring tiles has a rail of the player
+        """
+        if tag not in self.tags:
+            return False
+        bit = self.tag_bit(tag)
+        for coords in ((row, col + 1), (row, col - 1), (row + 1, col), (row - 1, col)):
+            if coords != exclude and self.rail_mask[coords] & bit:
+                return True
+        return False
+
+    def resource_counts(self, claimed: bool = False) -> dict[str, int]:
+        """
+        Counts the tiles of each resource, in the order resources first appear on the board
+        Args:
+            claimed: Only count tiles with a rail on them
+        Returns:
+            Number of tiles of each resource
+        """
+        codes = (
+            self.resource[self.rail_counts != 0] if claimed else self.resource.ravel()
+        )
+        values, first_idx, counts = np.unique(
+            codes, return_index=True, return_counts=True
+        )
+        found = sorted(zip(first_idx, values, counts))
+        return {
+            self.resources[value]: int(count) for _, value, count in found if value != 0
+        }
+
+    def rail_tile_count(self) -> int:
+        return int(np.count_nonzero(self.rail_counts))
+
+    def crossing_count(self) -> int:
+        return int(np.count_nonzero(self.rail_counts > 1))
+
+    def asdict(self) -> dict[str, dict]:
+        return {str(coords): self[coords].asdict() for coords in self}
+
+    def __getitem__(self, coords: tuple[int, int]) -> TileView:
+        row, col = coords
+        if not self.in_bounds(row, col):
+            raise KeyError(coords)
+        return TileView(self, (row, col))
+
+    def __contains__(self, coords) -> bool:
+        try:
+            return self.in_bounds(*coords)
+        except TypeError:
+            return False
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        width, height = self.size
+        for row in range(1, height + 1):
+            for col in range(1, width + 1):
+                yield row, col
+
+    def __len__(self) -> int:
+        return self.size[0] * self.size[1]
+
+    def keys(self) -> Iterator[tuple[int, int]]:
+        return iter(self)
+
+    def values(self) -> Iterator[TileView]:
+        return (self[coords] for coords in self)
+
+    def items(self) -> Iterator[tuple[tuple[int, int], TileView]]:
+        return ((coords, self[coords]) for coords in self)
+
+    def get(self, coords: tuple[int, int], default=None) -> TileView | None:
+        return self[coords] if coords in self else default
+
+    def __repr__(self) -> str:
+        return f"<TrainBoard size={self.size} rails={self.rail_tile_count()}>"
+
+
+class ResourceProximity:
+    """
+    Distance from every tile of a board to the nearest tile of each resource, kept up to date as resources are placed
+    during board generation, so checking if a tile is near a resource is a single array lookup instead of a scan of
+    the surrounding tiles.
+
+    Distances follow the window of the original scan: a tile is within spread of a resource when the resource lies
+    between spread tiles before and spread - 1 tiles after it, in both directions.
+
+    Attributes:
+        board (TrainBoard): Board resources are placed on
+        max_spread (int): Largest spread that can be queried. Larger distances are not tracked.
+    """
+
+    def __init__(self, board: TrainBoard, max_spread: int = 8):
+        self.board = board
+        self.max_spread = max_spread
+        self._distance: dict[str, np.ndarray] = {}
+        self._adjacent: dict[str, np.ndarray] = {}
+
+    def _grids(self, resource: str) -> tuple[np.ndarray, np.ndarray]:
+        if resource not in self._distance:
+            shape = self.board.resource.shape
+            self._distance[resource] = np.full(
+                shape, self.max_spread + 1, dtype=np.int16
+            )
+            self._adjacent[resource] = np.zeros(shape, dtype=bool)
+            if resource in self.board.resources:
+                code = self.board.resources.index(resource)
+                for row, col in np.argwhere(self.board.resource == code):
+                    self._mark(resource, int(row), int(col))
+        return self._distance[resource], self._adjacent[resource]
+
+    def _mark(self, resource: str, row: int, col: int) -> None:
+        distance = self._distance[resource]
+        height, width = distance.shape
+        rows = np.arange(
+            max(row - self.max_spread + 1, 0), min(row + self.max_spread + 1, height)
+        )
+        cols = np.arange(
+            max(col - self.max_spread + 1, 0), min(col + self.max_spread + 1, width)
+        )
+        row_offsets = row - rows
+        col_offsets = col - cols
+        window = np.maximum.outer(
+            np.maximum(-row_offsets, row_offsets + 1),
+            np.maximum(-col_offsets, col_offsets + 1),
+        )
+        area = (slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1))
+        np.minimum(distance[area], window, out=distance[area])
+
+        adjacent = self._adjacent[resource]
+        adjacent[row - 1, col] = adjacent[row + 1, col] = True
+        adjacent[row, col - 1] = adjacent[row, col + 1] = True
+        return None
+
+    def place(self, row: int, col: int, resource: str) -> None:
+        """
+        Records a resource placed on the board
+        Args:
+            row: Tile row
+            col: Tile column
+            resource: Placed resource
+        Returns:
+            None
+        """
+        self._grids(resource)
+        self._mark(resource, row, col)
+        return None
+
+    def near(self, row: int, col: int, resource: str, spread: int) -> bool:
+        """
+        Checks if a tile is within spread tiles of a resource
+        Args:
+            row: Tile row
+            col: Tile column
+            resource: Resource to look for
+            spread: Search distance, at most max_spread
+        Returns:
+            True if the resource is within spread of the tile
+        """
+        if spread > self.max_spread:
+            raise ValueError(f"Spread {spread} is larger than {self.max_spread}")
+        return bool(self._grids(resource)[0][row, col] <= spread)
+
+    def next_to(self, row: int, col: int, resource: str) -> bool:
+        """
+        Checks if one of the four tiles directly next to a tile has a resource
+        Args:
+            row: Tile row
+            col: Tile column
+            resource: Resource to look for
+        Returns:
+            True if a neighbouring tile has the resource
+        """
+        return bool(self._grids(resource)[1][row, col])
+
+
+class VisibilityGrid:
+    """
+    Tiles of a board visible to one player. Every revealed area (a square around a shot or a start/end location)
+    adds one to the coverage count of the tiles it covers, and a tile is visible while its count is above zero, so
+    hiding an area again only hides tiles that no other area covers.
+
+    Iterating yields the coordinates of every visible tile, and `(row, col) in grid` checks if a tile is visible.
+
+    Attributes:
+        size (tuple[int, int]): Board size (width, height)
+        counts (np.ndarray): int16 number of revealed areas covering each tile
+        areas (list[tuple[int, int, int]]): Revealed areas as (row, col, distance), in the order they were revealed
+    """
+
+    def __init__(self, size: tuple[int, int], areas: Iterable[Iterable[int]] = ()):
+        width, height = size
+        self.size: tuple[int, int] = (width, height)
+        self.counts = np.zeros((height + 2, width + 2), dtype=np.int16)
+        self.areas: list[tuple[int, int, int]] = []
+        for row, col, dist in areas:
+            self.reveal(row, col, dist)
+
+    @classmethod
+    def from_tiles(
+        cls,
+        size: tuple[int, int],
+        tiles: Iterable[Iterable[int]],
+        areas: Iterable[Iterable[int]] = (),
+    ) -> "VisibilityGrid":
+        """
+        Creates a grid from a list of visible tiles, as stored by older games. Older games did not store the areas
+        that revealed the tiles, so each known area is revealed with the largest distance, up to its own, that only
+        covers visible tiles. Visible tiles outside every area are revealed on their own, so exactly the stored
+        tiles are visible.
+        Args:
+            size: Board size (width, height)
+            tiles: Visible tile coordinates
+            areas: Areas that revealed the tiles as (row, col, distance), in the order they were revealed
+        Returns:
+            Grid showing the stored tiles
+        """
+        grid = cls(size)
+        width, height = grid.size
+        visible = np.zeros(grid.counts.shape, dtype=bool)
+        for row, col in tiles:
+            if 1 <= row <= height and 1 <= col <= width:
+                visible[row, col] = True
+        for row, col, max_dist in areas:
+            for dist in range(max_dist, -1, -1):
+                if visible[grid._area(row, col, dist)].all():
+                    grid.reveal(row, col, dist)
+                    break
+        for row, col in np.argwhere(visible & (grid.counts == 0)).tolist():
+            grid.reveal(row, col, 0)
+        return grid
+
+    def _area(self, row: int, col: int, dist: int) -> tuple[slice, slice]:
+        width, height = self.size
+        return (
+            slice(max(row - dist, 1), min(row + dist, height) + 1),
+            slice(max(col - dist, 1), min(col + dist, width) + 1),
+        )
+
+    @staticmethod
+    def _area_tiles(
+        area: tuple[slice, slice], mask: np.ndarray
+    ) -> list[tuple[int, int]]:
+        # Coordinates of the tiles set in a mask of an area
+        rows, cols = np.nonzero(mask)
+        return list(
+            zip((rows + area[0].start).tolist(), (cols + area[1].start).tolist())
+        )
+
+    def reveal(self, row: int, col: int, dist: int) -> list[tuple[int, int]]:
+        """
+        Makes every tile within dist tiles of a tile visible
+        Args:
+            row: Center tile row
+            col: Center tile column
+            dist: Distance revealed around the center tile
+        Returns:
+            Tiles that were hidden before
+        """
+        area = self._area(row, col, dist)
+        self.areas.append((row, col, dist))
+        revealed = self._area_tiles(area, self.counts[area] == 0)
+        self.counts[area] += 1
+        return revealed
+
+    def hide(self, row: int, col: int) -> list[tuple[int, int]]:
+        """
+        Hides the area last revealed around a tile, using the distance it was revealed with. Tiles covered by other
+        areas stay visible.
+        Args:
+            row: Center tile row
+            col: Center tile column
+        Returns:
+            Tiles that are hidden now
+        """
+        for idx in range(len(self.areas) - 1, -1, -1):
+            if self.areas[idx][:2] == (row, col):
+                area = self._area(row, col, self.areas.pop(idx)[2])
+                self.counts[area] -= 1
+                return self._area_tiles(area, self.counts[area] == 0)
+        return []
+
+    def clear(self) -> None:
+        self.areas.clear()
+        self.counts[:] = 0
+        return None
+
+    def asdict(self) -> list[list[int]]:
+        return [list(area) for area in self.areas]
+
+    def __contains__(self, coords) -> bool:
+        try:
+            row, col = coords
+        except (TypeError, ValueError):
+            return False
+        return (
+            1 <= row <= self.size[1]
+            and 1 <= col <= self.size[0]
+            and bool(self.counts[row, col])
+        )
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        for row, col in np.argwhere(self.counts > 0).tolist():
+            yield row, col
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.counts))
+
+    def __repr__(self) -> str:
+        return f"<VisibilityGrid size={self.size} visible={len(self)}>"
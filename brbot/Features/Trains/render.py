@@ -0,0 +1,593 @@
+import logging
+from collections import OrderedDict
+from contextlib import suppress
+from glob import glob
+from hashlib import sha1
+from io import BytesIO
+from os import getpid, remove, replace
+from typing import Iterable, NamedTuple
+
+import matplotlib.font_manager
+import matplotlib.pyplot as plt
+from PIL import Image, ImageDraw
+
+from brbot.Features.Trains.data import TrainTile, genre_colors
+from brbot.Shared.emoji_atlas import draw_emoji_text, get_atlas
+from brbot.Shared.fonts import get_font
+
+logger = logging.getLogger(__name__)
+
+# Board image layout
+label_offset: int = 1
+tile_pixels: int = 50
+default_font_size: int = 24
+hidden_tile_color: tuple[int, int, int] = (255, 255, 255)
+border_color: tuple[int, int, int] = (190, 190, 190)
+font_color: tuple[int, int, int] = (0, 0, 0)
+hatch_color: tuple[int, int, int] = (40, 40, 40)
+
+# Most boards whose static layers are kept in memory
+layer_cache_size: int = 8
+
+
+class BoardLayers(NamedTuple):
+    """
+    Static images of a board, which only change if the board terrain changes.
+
+    Attributes:
+        hidden: Labels and blank tiles, used for tiles hidden from a player
+        terrain: Labels, genre zones and rivers
+        base: Terrain with resources drawn on top
+    """
+
+    hidden: Image.Image
+    terrain: Image.Image
+    base: Image.Image
+
+
+_layer_cache: OrderedDict[str, BoardLayers] = OrderedDict()
+
+
+# Fitted font size of each tile text, by (resource text, rail text)
+_tile_font_sizes: dict[tuple[str, str], int] = {}
+
+
+def fit_tile_font_size(resource_text: str, rail_text: str) -> int:
+    """
+    Finds the font size tile text must be drawn at to fit a tile, leaving room for the resource emoji
+    Args:
+        resource_text: Resource emoji of the tile
+        rail_text: Rail tags or start/end text of the tile
+    Returns:
+        Fitted font size
+    """
+    key = (resource_text, rail_text)
+    if key in _tile_font_sizes:
+        return _tile_font_sizes[key]
+
+    font_size = default_font_size
+    emoji_pixels: int = font_size - 4
+    text_pixels = get_font(font_size).getlength(resource_text + rail_text)
+    if resource_text and rail_text:
+        text_pixels += emoji_pixels
+
+    while text_pixels > 0.8 * tile_pixels and font_size > 6:
+        font_size -= 2
+        emoji_pixels -= 2
+        text_pixels = get_font(font_size).getlength(resource_text + rail_text)
+        if resource_text:
+            text_pixels += emoji_pixels
+    _tile_font_sizes[key] = font_size
+    return font_size
+
+
+def board_signature(
+    size: tuple[int, int], board: dict[tuple[int, int], TrainTile]
+) -> str:
+    """
+    Identifies the static content of a board
+    Args:
+        size: Board size (width, height)
+        board: Board tiles
+    Returns:
+        Hex digest of the board size, emoji atlas and the zone, terrain and resource of every tile
+    """
+    digest = sha1(f"{size}:{tile_pixels}:{get_atlas().version}".encode())
+    for coords in sorted(board):
+        tile = board[coords]
+        digest.update(f"{coords}{tile.zone}|{tile.terrain}|{tile.resource};".encode())
+    return digest.hexdigest()[:16]
+
+
+def tile_box(row: int, col: int, image: Image.Image) -> tuple[int, int, int, int]:
+    # Pixel box of a tile including its border, clipped to the image
+    return (
+        col * tile_pixels,
+        row * tile_pixels,
+        min((col + 1) * tile_pixels + 1, image.width),
+        min((row + 1) * tile_pixels + 1, image.height),
+    )
+
+
+def copy_tile(dest: Image.Image, source: Image.Image, row: int, col: int) -> None:
+    box = tile_box(row, col, dest)
+    dest.paste(source.crop(box), box)
+
+
+def draw_hatch_pattern(draw: ImageDraw.ImageDraw, row: int, col: int) -> None:
+    padding: int = 1
+    x_start: int = tile_pixels * col
+    y_start: int = tile_pixels * row
+
+    x, y = x_start, y_start
+    while y < y_start + tile_pixels:
+        xy = (
+            (x_start + padding, y + padding),
+            (x + tile_pixels - padding, y_start + tile_pixels - padding),
+        )
+        draw.line(xy=xy, fill=hatch_color, width=1)
+        x -= 4
+        y += 4
+
+    x, y = x_start, y_start
+    while x < x_start + tile_pixels:
+        xy = (
+            (x + padding, y_start + padding),
+            (x_start + tile_pixels - padding, y + tile_pixels - padding),
+        )
+        draw.line(xy=xy, fill=hatch_color, width=1)
+        x += 4
+        y -= 4
+
+
+def draw_tile_text(
+    image: Image.Image,
+    draw: ImageDraw.ImageDraw,
+    row: int,
+    col: int,
+    resource_text: str,
+    rail_text: str,
+) -> None:
+    """
+    Draws the resource emoji and rail text of a tile, shrinking the text until it fits the tile
+    Args:
+        image: Board image
+        draw: Drawing context of the board image
+        row: Tile row
+        col: Tile column
+        resource_text: Resource emoji of the tile
+        rail_text: Rail tags or start/end text of the tile
+    Returns:
+        None
+    """
+    # Dynamic font/emoji sizing depending on length of text
+    font_size = fit_tile_font_size(resource_text, rail_text)
+    font = get_font(font_size)
+    if resource_text and rail_text:
+        text_offset = round((default_font_size - 4) * 0.4)
+    else:
+        text_offset = 0
+
+    draw_emoji_text(
+        image,
+        draw,
+        xy=(
+            col * tile_pixels + round(tile_pixels / 2) - text_offset,
+            row * tile_pixels + round(tile_pixels / 2),
+        ),
+        text=rail_text + resource_text,
+        anchor="mm",
+        fill=font_color,
+        font=font,
+        emoji_position_offset=(-round(font_size / 2), -round(font_size / 2)),
+        emoji_scale_factor=1.1,
+    )
+
+
+def draw_layers(
+    size: tuple[int, int], board: dict[tuple[int, int], TrainTile]
+) -> BoardLayers:
+    """
+    Draws the static layers of a board
+    Args:
+        size: Board size (width, height)
+        board: Board tiles
+    Returns:
+        Static board layers
+    """
+    hidden = Image.new(
+        mode="RGB",
+        size=(
+            (size[0] + label_offset) * tile_pixels,
+            (size[1] + label_offset) * tile_pixels,
+        ),
+        color=0xFFFFFF,
+    )
+    draw = ImageDraw.Draw(hidden)
+    font = get_font(default_font_size)
+
+    # Draw column labels/tile borders
+    for label_x in range(1, size[0] + 1):
+        draw.rectangle(
+            xy=((label_x * tile_pixels, 1), ((label_x + 1) * tile_pixels, tile_pixels)),
+            fill=hidden_tile_color,
+            outline=border_color,
+            width=1,
+        )
+        draw.text(
+            xy=(label_x * tile_pixels + tile_pixels / 2, tile_pixels / 2),
+            text=str(label_x),
+            font=font,
+            anchor="mm",
+            fill=font_color,
+        )
+    # Draw row labels/tile borders
+    for label_y in range(1, size[1] + 1):
+        draw.rectangle(
+            xy=((1, label_y * tile_pixels), (tile_pixels, (label_y + 1) * tile_pixels)),
+            fill=hidden_tile_color,
+            outline=border_color,
+            width=1,
+        )
+        draw.text(
+            xy=(round(tile_pixels / 2), label_y * tile_pixels + round(tile_pixels / 2)),
+            text=str(label_y),
+            font=font,
+            anchor="mm",
+            fill=font_color,
+        )
+
+    terrain = hidden.copy()
+    terrain_draw = ImageDraw.Draw(terrain)
+    for (row, col), tile in board.items():
+        tile_xy = (
+            (col * tile_pixels, row * tile_pixels),
+            ((col + 1) * tile_pixels, (row + 1) * tile_pixels),
+        )
+        draw.rectangle(
+            xy=tile_xy, fill=hidden_tile_color, outline=border_color, width=1
+        )
+        terrain_draw.rectangle(
+            xy=tile_xy,
+            fill=(255, 255, 255) if tile.zone is None else genre_colors[tile.zone],
+            outline=border_color,
+            width=1,
+        )
+        if tile.terrain == "river":
+            draw_hatch_pattern(terrain_draw, row, col)
+
+    base = terrain.copy()
+    base_draw = ImageDraw.Draw(base)
+    for (row, col), tile in board.items():
+        if tile.resource:
+            draw_tile_text(base, base_draw, row, col, tile.resource, "")
+
+    return BoardLayers(hidden=hidden, terrain=terrain, base=base)
+
+
+def get_layers(
+    size: tuple[int, int],
+    board: dict[tuple[int, int], TrainTile],
+    cache_dir: str | None = None,
+) -> BoardLayers:
+    """
+    Retrieves the static layers of a board from memory or disk, drawing them if the board has changed
+    Args:
+        size: Board size (width, height)
+        board: Board tiles
+        cache_dir: Directory to keep the layers in across restarts, memory only if not specified
+    Returns:
+        Static board layers
+    """
+    signature = board_signature(size, board)
+    if signature in _layer_cache:
+        _layer_cache.move_to_end(signature)
+        return _layer_cache[signature]
+
+    layers = None
+    if cache_dir is not None:
+        try:
+            layers = BoardLayers(
+                *(
+                    Image.open(
+                        f"{cache_dir}/board_layer_{signature}_{name}.png"
+                    ).convert("RGB")
+                    for name in BoardLayers._fields
+                )
+            )
+        except (OSError, ValueError):
+            layers = None
+
+    if layers is None:
+        logger.debug(f"Drawing static board layers {signature}")
+        layers = draw_layers(size, board)
+        if cache_dir is not None:
+            # Render workers can draw layers of the same board at once, so layers another worker already removed
+            # are skipped and each layer is written to a file of its own before being moved into place
+            for old_layer in glob(f"{cache_dir}/board_layer_*.png"):
+                if not old_layer.startswith(f"{cache_dir}/board_layer_{signature}_"):
+                    with suppress(FileNotFoundError):
+                        remove(old_layer)
+            try:
+                for name, layer in zip(BoardLayers._fields, layers):
+                    filepath = f"{cache_dir}/board_layer_{signature}_{name}.png"
+                    layer.save(f"{filepath}.{getpid()}.tmp", format="PNG")
+                    replace(f"{filepath}.{getpid()}.tmp", filepath)
+            except OSError as e:
+                logger.warning(f"Could not save board layers to {cache_dir}: {e}")
+
+    _layer_cache[signature] = layers
+    if len(_layer_cache) > layer_cache_size:
+        _layer_cache.popitem(last=False)
+    return layers
+
+
+def tile_rail_text(
+    coords: tuple[int, int],
+    tile: TrainTile,
+    start: tuple[int, int] | None,
+    end: tuple[int, int] | None,
+) -> str:
+    # Start/end text is shown until a rail is placed on the tile
+    if coords == start and not tile.rails:
+        return "Start"
+    elif coords == end and not tile.rails:
+        return "End"
+    return "".join(tile.rails)
+
+
+def render_board(
+    size: tuple[int, int],
+    board: dict[tuple[int, int], TrainTile],
+    cache_dir: str | None = None,
+    vis_tiles: list[tuple[int, int]] | None = None,
+    start: tuple[int, int] | None = None,
+    end: tuple[int, int] | None = None,
+) -> Image.Image:
+    """
+    Renders a board by compositing rails, start/end text and hidden tiles over the cached static layers
+    Args:
+        size: Board size (width, height)
+        board: Board tiles
+        cache_dir: Directory to keep the static layers in across restarts
+        vis_tiles: Tiles visible to the player, all tiles are shown if not specified
+        start: Player start location
+        end: Player end location
+    Returns:
+        Board image
+    """
+    layers = get_layers(size, board, cache_dir)
+    board_img = (layers.base if vis_tiles is None else layers.hidden).copy()
+
+    # Only tiles that differ from the starting layer need to be painted
+    if vis_tiles is None:
+        tiles = [coords for coords, tile in board.items() if tile.rails]
+        tiles += [tuple(coords) for coords in (start, end) if coords is not None]
+    else:
+        tiles = vis_tiles
+    paint_tiles(board_img, layers, board, tiles, vis_tiles, start, end)
+    return board_img
+
+
+def paint_tiles(
+    board_img: Image.Image,
+    layers: BoardLayers,
+    board: dict[tuple[int, int], TrainTile],
+    tiles: Iterable[tuple[int, int]],
+    vis_tiles: list[tuple[int, int]] | None,
+    start: tuple[int, int] | None,
+    end: tuple[int, int] | None,
+) -> None:
+    # Paints each tile from the static layers, drawing rail and start/end text over visible tiles
+    if start is not None:
+        start = tuple(start)
+    if end is not None:
+        end = tuple(end)
+    visible = None if vis_tiles is None else set(map(tuple, vis_tiles))
+
+    draw = ImageDraw.Draw(board_img)
+    for coords in sorted(set(map(tuple, tiles))):
+        tile = board.get(coords)
+        if tile is None:
+            continue
+        if visible is not None and coords not in visible:
+            copy_tile(board_img, layers.hidden, *coords)
+            continue
+
+        rail_text = tile_rail_text(coords, tile, start, end)
+        if not rail_text:
+            copy_tile(board_img, layers.base, *coords)
+            continue
+        copy_tile(board_img, layers.terrain, *coords)
+        draw_tile_text(board_img, draw, *coords, tile.resource or "", rail_text)
+    return None
+
+
+class TileSpec(NamedTuple):
+    """
+    Drawing state of one tile, with the same attributes render functions read from TrainTile.
+    """
+
+    resource: str | None
+    terrain: str | None
+    zone: str | None
+    rails: tuple[str, ...]
+
+
+class BoardSpec(NamedTuple):
+    """
+    Compact, picklable description of one board image, sent to render worker processes.
+
+    Attributes:
+        size: Board size (width, height)
+        tiles: Drawing state of every tile
+        vis_tiles: Tiles visible to the player, all tiles are shown if None
+        start: Player start location
+        end: Player end location
+    """
+
+    size: tuple[int, int]
+    tiles: dict[tuple[int, int], TileSpec]
+    vis_tiles: frozenset[tuple[int, int]] | None
+    start: tuple[int, int] | None
+    end: tuple[int, int] | None
+
+
+def describe_board(
+    size: tuple[int, int],
+    board: dict[tuple[int, int], TrainTile],
+    vis_tiles: list[tuple[int, int]] | None = None,
+    start: tuple[int, int] | None = None,
+    end: tuple[int, int] | None = None,
+    tiles: Iterable[tuple[int, int]] | None = None,
+) -> BoardSpec:
+    """
+    Describes a board image for rendering in a worker process
+    Args:
+        size: Board size (width, height)
+        board: Board tiles
+        vis_tiles: Tiles visible to the player, all tiles are shown if not specified
+        start: Player start location
+        end: Player end location
+        tiles: Only describe these tiles, all tiles are described if not specified
+    Returns:
+        Board description
+    """
+    if tiles is None:
+        described = board.items()
+        visible = None if vis_tiles is None else frozenset(map(tuple, vis_tiles))
+    else:
+        coords = {tuple(c) for c in tiles if tuple(c) in board}
+        described = ((c, board[c]) for c in coords)
+        visible = (
+            None
+            if vis_tiles is None
+            else frozenset(c for c in coords if c in vis_tiles)
+        )
+    return BoardSpec(
+        size=tuple(size),
+        tiles={
+            coords: TileSpec(tile.resource, tile.terrain, tile.zone, tuple(tile.rails))
+            for coords, tile in described
+        },
+        vis_tiles=visible,
+        start=None if start is None else tuple(start),
+        end=None if end is None else tuple(end),
+    )
+
+
+def redraw_tiles(
+    board_img: Image.Image,
+    tiles: dict[tuple[int, int], TileSpec],
+    vis_tiles: frozenset[tuple[int, int]] | None,
+    start: tuple[int, int] | None,
+    end: tuple[int, int] | None,
+) -> None:
+    # Draws tiles over a previously rendered image, the same way the static layers and paint_tiles draw them
+    draw = ImageDraw.Draw(board_img)
+    for (row, col), tile in sorted(tiles.items()):
+        visible = vis_tiles is None or (row, col) in vis_tiles
+        if not visible:
+            fill = hidden_tile_color
+        else:
+            fill = (255, 255, 255) if tile.zone is None else genre_colors[tile.zone]
+        draw.rectangle(
+            xy=(
+                (col * tile_pixels, row * tile_pixels),
+                ((col + 1) * tile_pixels, (row + 1) * tile_pixels),
+            ),
+            fill=fill,
+            outline=border_color,
+            width=1,
+        )
+        if not visible:
+            continue
+        if tile.terrain == "river":
+            draw_hatch_pattern(draw, row, col)
+        rail_text = tile_rail_text((row, col), tile, start, end)
+        if tile.resource or rail_text:
+            draw_tile_text(board_img, draw, row, col, tile.resource or "", rail_text)
+    return None
+
+
+def render_board_png(
+    spec: BoardSpec,
+    cache_dir: str | None = None,
+    previous: bytes | None = None,
+) -> bytes:
+    """
+    Renders a board to PNG, run in render worker processes. Given the previous image of the board, only the described
+    tiles are redrawn on it.
+    Args:
+        spec: Board description, of only the tiles that changed since the previous image if it is given
+        cache_dir: Directory to keep the static layers in across restarts
+        previous: PNG encoded board image to redraw the described tiles on
+    Returns:
+        PNG encoded board image
+    Raises:
+        ValueError: If the previous image is not the size of the board
+    """
+    if previous is None:
+        board_img = render_board(
+            size=spec.size,
+            board=spec.tiles,
+            cache_dir=cache_dir,
+            vis_tiles=spec.vis_tiles,
+            start=spec.start,
+            end=spec.end,
+        )
+    else:
+        with Image.open(BytesIO(previous)) as image:
+            board_img = image.convert("RGB")
+        expected = tuple((length + label_offset) * tile_pixels for length in spec.size)
+        if board_img.size != expected:
+            raise ValueError(
+                f"Previous board image is {board_img.size}, expected {expected}"
+            )
+        redraw_tiles(board_img, spec.tiles, spec.vis_tiles, spec.start, spec.end)
+
+    buffer = BytesIO()
+    board_img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def draw_genre_chart(genre_counts: dict[str, int]) -> bytes:
+    """
+    Draws the shot genre pie chart of a player's stats page, run in render worker processes
+    Args:
+        genre_counts: Number of shots on shows of each genre
+    Returns:
+        PNG encoded chart
+    """
+    plt.style.use("dark_background")
+    fig, ax = plt.subplots()
+
+    plt.rcParams["font.size"] = 14
+    plt.rcParams["font.family"] = "gg sans"
+    plt.rcParams["font.weight"] = "bold"
+    wedges, text, autotexts = ax.pie(list(genre_counts.values()), autopct="%1.1f%%")
+    plt.setp(autotexts, size=16, weight="medium", color="black")
+    plt.title(
+        label="Shot Genre Percentages              ",
+        weight="bold",
+        size=17,
+        family="gg sans",
+        horizontalalignment="right",
+    )
+    plt.legend(
+        genre_counts.keys(),
+        title="Genres",
+        loc="lower left",
+        framealpha=0,
+        bbox_to_anchor=(-0.45, 0.2, 0.75, 1),
+        prop=matplotlib.font_manager.FontProperties(
+            family="gg sans", weight="medium", size=15, style="italic"
+        ),
+        title_fontproperties=matplotlib.font_manager.FontProperties(
+            family="gg sans", weight="medium", size=17
+        ),
+    )
+    buffer = BytesIO()
+    plt.savefig(buffer, format="png", transparent=True)
+    plt.close(fig)
+    return buffer.getvalue()
@@ -1,23 +1,27 @@
 import asyncio
-import io
 import json
+from concurrent.futures import BrokenExecutor
 from datetime import datetime, timedelta
 from math import log
-from os import path
-from random import randint, shuffle, choice
+from random import Random, getrandbits
 from typing import Union
 from io import BytesIO
+from os import path
 
 import logging
-import matplotlib.font_manager
-import matplotlib.pyplot as plt
-from PIL import Image, ImageFont, ImageDraw
-from pilmoji import Pilmoji
 
-from discord import Interaction, Guild, Embed, File
+import numpy as np
+
+from discord import Interaction, Guild, Embed, File, HTTPException
 
 import brbot.Core.anilist as al
 import brbot.Core.botdata as bd
+import brbot.Core.renderpool as rp
+from brbot.Core.gameindex import record_game
+from brbot.Core.gamesaves import saves
+from brbot.Core.imagestore import images
+from brbot.Core.journal import get_journal
+from brbot.Core.listsnapshots import LazyAnilist, store_starting_anilists
 from brbot.Features.Trains.data import (
     TrainTile,
     TrainItem,
@@ -27,10 +31,27 @@ from brbot.Features.Trains.data import (
     genre_colors,
     default_shop,
     find_anilist_changes,
+    index_anilist,
+)
+from brbot.Features.Trains.gamefile import (
+    GameFile,
+    gamefile_name,
+    legacy_gamefile_name,
+    pack_game,
+    write_game_file,
+)
+from brbot.Features.Trains.grid import ResourceProximity, TrainBoard, VisibilityGrid
+from brbot.Features.Trains.render import (
+    describe_board,
+    draw_genre_chart,
+    render_board_png,
 )
 
 logger = logging.getLogger(__name__)
 
+# Distance revealed around the start location and each shot, before telescopes
+default_render_dist: int = 4
+
 
 class TrainGame:
     def __init__(
@@ -38,12 +59,13 @@ class TrainGame:
         name: str = None,
         date: str = None,
         players: list[TrainPlayer] = None,
-        board: dict[tuple[int, int], TrainTile] = None,
+        board: TrainBoard | dict[tuple[int, int], TrainTile] = None,
         gameid: int = None,
         active: bool = True,
         size: tuple = None,
         shop: dict[str, TrainItem] = None,
         known_shows: dict[int, dict] = None,
+        seed: int = None,
     ):
         if players is None:
             players: list[TrainPlayer] = []
@@ -51,6 +73,11 @@ class TrainGame:
             shop = default_shop()
         if known_shows is None:
             known_shows = {}
+        if isinstance(board, dict):
+            board = TrainBoard.from_tiles(size, board)
+        for player in players:
+            if not isinstance(player.vis_tiles, VisibilityGrid):
+                player.vis_tiles = legacy_vis_grid(size, player)
         self.name = name
         self.date = date
         self.players = players
@@ -60,29 +87,54 @@ class TrainGame:
         self.board = board
         self.shop = shop
         self.known_shows = known_shows
-
-    def asdict(self) -> dict:
-        player_list = []
-        for player in self.players:
-            player_list.append(player.asdict())
-        board_dict = {}
-        for coord, tile in self.board.items():
-            board_dict[str(coord)] = tile.__dict__
+        self.seed = seed
+        # Whether the starting anilists of the players are stored in the game's sidecar file
+        self.anilists_stored = False
+        # Board images that show the current game state, so only changed tiles need to be redrawn on them
+        self.drawn_boards: set[str] = set()
+        self.board_locks: dict[str, asyncio.Lock] = {}
+
+    def header(self) -> dict:
         item_dict = {}
         for name, item in self.shop.items():
             item_dict[name] = item.__dict__
         return {
             "name": self.name,
             "date": self.date,
-            "players": player_list,
             "gameid": self.gameid,
             "active": self.active,
             "size": self.size,
-            "board": board_dict,
             "shop": item_dict,
+            "seed": self.seed,
+        }
+
+    def asdict(self) -> dict:
+        player_list = []
+        for player in self.players:
+            player_list.append(player.asdict())
+        return {
+            **self.header(),
+            "players": player_list,
+            "board": self.board.asdict(),
             "known_shows": self.known_shows,
         }
 
+    def summary(self) -> dict:
+        return {
+            "active": self.active,
+            "size": self.size,
+            "players": [player.member.id for player in self.players],
+            "created": self.date,
+        }
+
+    def sections(self) -> dict[str, dict[str, np.ndarray]]:
+        return pack_game(
+            self.header(),
+            [player.asdict() for player in self.players],
+            self.board,
+            self.known_shows,
+        )
+
     def __repr__(self) -> str:
         return (
             f"<name={self.name}> <date={self.date}> <players={self.players}> <gameid={self.gameid}> "
@@ -92,6 +144,9 @@ class TrainGame:
     class BoardGenError(Exception):
         pass
 
+    class ScoringError(Exception):
+        pass
+
     def is_done(self) -> bool:
         done = True
         for player in self.players:
@@ -118,53 +173,47 @@ class TrainGame:
         return player_idx, player
 
     def save_game(self, filepath: str) -> None:
-        with open(f"{filepath}/gamedata.json", "w") as f:
-            json.dump(self.asdict(), f, separators=(",", ":"))
+        if not self.anilists_stored:
+            self.anilists_stored = store_starting_anilists(
+                filepath, {p.member.id: p.starting_anilist for p in self.players}
+            )
+        saves.schedule(
+            f"{filepath}/{gamefile_name}", self.sections, write=write_game_file
+        )
+        record_game(filepath, self.summary())
 
     def gen_trains_board(
-        self, play_area_size: tuple[int, int] = (16, 16), river_ring: int = 0
+        self,
+        play_area_size: tuple[int, int] = (16, 16),
+        river_ring: int = 0,
+        seed: int = None,
     ) -> None:
+        """
+        Generates the game board. The same seed, size and river ring always generate the same board.
+        Args:
+            play_area_size: Size of the board inside the river ring (width, height), both divisible by 4
+            river_ring: Width of the river border around the play area
+            seed: Generation seed, a random seed is picked if not given
+        Returns:
+            None
+        """
+        if seed is None:
+            seed = getrandbits(32)
+        self.seed = seed
+        rng = Random(seed)
         width = self.size[0]
         height = self.size[1]
         play_width, play_height = play_area_size
-        logger.info(f"Generating {width}x{height} board for {self.name}")
+        logger.info(f"Generating {width}x{height} board for {self.name} (seed {seed})")
 
         def next_to_resource(tilepos, resource) -> bool:
             # Returns true if the grid tile is directly adjacent to the specified resource
-            x = tilepos[0]
-            y = tilepos[1]
-
-            for x_new in (x - 1, x + 1):
-                try:
-                    if self.board[(x_new, y)].resource == resource:
-                        return True
-                except KeyError:
-                    pass
-
-            for y_new in (y - 1, y + 1):
-                try:
-                    if self.board[(x, y_new)].resource == resource:
-                        return True
-                except KeyError:
-                    pass
-
-            return False
+            return proximity.next_to(tilepos[0], tilepos[1], resource)
 
         def near_resource(tilepos, resource, spread) -> bool:
             # Returns true if the grid tile is within {spread} tiles of the specified resource
             # Tilepos is (x, y)
-            x = tilepos[0]
-            y = tilepos[1]
-
-            for x_new in range(x - spread, x + spread):
-                for y_new in range(y - spread, y + spread):
-                    try:
-                        if self.board[(x_new, y_new)].resource == resource:
-                            return True
-                    except KeyError:
-                        pass
-
-            return False
+            return proximity.near(tilepos[0], tilepos[1], resource, spread)
 
         def generate_random_resources(tilepos) -> None | str:
             # Tilepos is (x, y)
@@ -180,34 +229,34 @@ class TrainGame:
             house_chance: int = 70
             house_near_chance: int = 35
 
-            if self.board[tilepos].resource is not None:
-                return self.board[tilepos].resource
+            if self.board.resource[tilepos]:
+                return self.board.resources[self.board.resource[tilepos]]
 
-            if self.board[tilepos].terrain is not None:
+            if self.board.terrain[tilepos]:
                 return None
 
             # Wheat
             if near_resource(tilepos, game_emoji["wheat"], 3):
-                if randint(1, 1000) <= wheat_near_chance:
+                if rng.randint(1, 1000) <= wheat_near_chance:
                     return game_emoji["wheat"]
             else:
-                if randint(1, 1000) <= wheat_chance:
+                if rng.randint(1, 1000) <= wheat_chance:
                     return game_emoji["wheat"]
 
             # Wood
             if near_resource(tilepos, game_emoji["wood"], 2):
-                if randint(1, 1000) <= wood_near_chance:
+                if rng.randint(1, 1000) <= wood_near_chance:
                     return game_emoji["wood"]
             else:
-                if randint(1, 1000) <= wood_chance:
+                if rng.randint(1, 1000) <= wood_chance:
                     return game_emoji["wood"]
 
             # Houses
             if next_to_resource(tilepos, game_emoji["house"]):
-                if randint(1, 1000) <= house_near_chance:
+                if rng.randint(1, 1000) <= house_near_chance:
                     return game_emoji["house"]
             else:
-                if randint(1, 1000) <= house_chance:
+                if rng.randint(1, 1000) <= house_chance:
                     return game_emoji["house"]
 
             return None
@@ -221,15 +270,16 @@ class TrainGame:
             while added < count:
                 attempts += 1
 
-                y = randint(1, width)
-                x = randint(1, height)
+                y = rng.randint(1, width)
+                x = rng.randint(1, height)
                 # Add resource if tile is empty and meets the minimum spread requirement
                 if (
-                    self.board[(x, y)].resource is None
-                    and self.board[(x, y)].terrain is None
+                    not self.board.resource[x, y]
+                    and not self.board.terrain[x, y]
                     and not near_resource((x, y), resource, min_spread)
                 ):
                     self.board[(x, y)].resource = resource
+                    proximity.place(x, y, resource)
                     added += 1
                     attempts = 0
                 # Reduces minimum spread requirement at 15 attempts and tries again
@@ -247,9 +297,10 @@ class TrainGame:
             # for 16 zones.
 
             def add_zone(z_width, z_height, start_pos, genre) -> None:
-                for row in range(start_pos[0], start_pos[0] + z_height):
-                    for col in range(start_pos[1], start_pos[1] + z_width):
-                        self.board[(row, col)].zone = genre
+                self.board.zone[
+                    start_pos[0] : start_pos[0] + z_height,
+                    start_pos[1] : start_pos[1] + z_width,
+                ] = self.board.code(self.board.zones, genre)
 
             if play_width % 4 != 0 or play_height % 4 != 0:
                 logger.error(
@@ -260,7 +311,7 @@ class TrainGame:
             zone_width: int = play_width // 4
             zone_height: int = play_height // 4
             zone_order: list = list(genre_colors.keys())
-            shuffle(zone_order)
+            rng.shuffle(zone_order)
 
             for i in range(16):
                 zone_pos = (
@@ -282,78 +333,78 @@ class TrainGame:
 
             if direction == "Right":
                 river_start = (
-                    randint(round(width * 0.25), round(width * 0.75)),
-                    randint(1, round(width * 0.25)),
+                    rng.randint(round(width * 0.25), round(width * 0.75)),
+                    rng.randint(1, round(width * 0.25)),
                 )
                 river_tiles.append(river_start)
                 river_center = [river_start[0]]
 
                 for col in range(river_start[1] + 1, width + 1):
-                    if randint(1, 1000) <= base_chance * 1000:
-                        river_center.append(river_center[-1] + randint(-1, 1))
+                    if rng.randint(1, 1000) <= base_chance * 1000:
+                        river_center.append(river_center[-1] + rng.randint(-1, 1))
                     else:
                         break
                     for row in range(1, height + 1):
                         diff = abs(row - river_center[-1])
                         chance = 1000 * (base_chance - 0.25 / avg_width * diff**density)
-                        if randint(1, 1000) <= chance:
+                        if rng.randint(1, 1000) <= chance:
                             river_tiles.append((row, col))
 
             elif direction == "DownRight":
                 river_start = (
-                    randint(1, round(width * 0.25)),
-                    randint(1, round(width * 0.25)),
+                    rng.randint(1, round(width * 0.25)),
+                    rng.randint(1, round(width * 0.25)),
                 )
                 river_tiles.append(river_start)
                 river_center = [river_start[0]]
 
                 for col in range(river_start[1] + 1, width + 1):
-                    if randint(1, 1000) <= base_chance * 1000:
-                        river_center.append(river_center[-1] + randint(0, 2))
+                    if rng.randint(1, 1000) <= base_chance * 1000:
+                        river_center.append(river_center[-1] + rng.randint(0, 2))
                     else:
                         break
                     for row in range(1, height + 1):
                         diff = abs(row - river_center[-1])
                         chance = 1000 * (base_chance - 0.25 / avg_width * diff**density)
-                        if randint(1, 1000) <= chance:
+                        if rng.randint(1, 1000) <= chance:
                             river_tiles.append((row, col))
 
             elif direction == "Down":
                 river_start = (
-                    randint(1, round(width * 0.25)),
-                    randint(round(width * 0.25), round(width * 0.75)),
+                    rng.randint(1, round(width * 0.25)),
+                    rng.randint(round(width * 0.25), round(width * 0.75)),
                 )
                 river_tiles.append(river_start)
                 river_center = [river_start[1]]
 
                 for row in range(river_start[0] + 1, height + 1):
-                    if randint(1, 1000) <= base_chance * 1000:
-                        river_center.append(river_center[-1] + randint(-1, 1))
+                    if rng.randint(1, 1000) <= base_chance * 1000:
+                        river_center.append(river_center[-1] + rng.randint(-1, 1))
                     else:
                         break
                     for col in range(1, width + 1):
                         diff = abs(col - river_center[-1])
                         chance = 1000 * (base_chance - 0.25 / avg_width * diff**density)
-                        if randint(1, 1000) <= chance:
+                        if rng.randint(1, 1000) <= chance:
                             river_tiles.append((row, col))
 
             elif direction == "DownLeft":
                 river_start = (
-                    randint(round(height * 0.75), height),
-                    randint(1, round(width * 0.25)),
+                    rng.randint(round(height * 0.75), height),
+                    rng.randint(1, round(width * 0.25)),
                 )
                 river_tiles.append(river_start)
                 river_center = [river_start[0]]
 
                 for col in range(river_start[1] + 1, width + 1):
-                    if randint(1, 1000) <= base_chance * 1000:
-                        river_center.append(river_center[-1] + randint(-2, 0))
+                    if rng.randint(1, 1000) <= base_chance * 1000:
+                        river_center.append(river_center[-1] + rng.randint(-2, 0))
                     else:
                         break
                     for row in range(1, height + 1):
                         diff = abs(row - river_center[-1])
                         chance = 1000 * (base_chance - 0.25 / avg_width * diff**density)
-                        if randint(1, 1000) <= chance:
+                        if rng.randint(1, 1000) <= chance:
                             river_tiles.append((row, col))
             else:
                 pass
@@ -364,23 +415,23 @@ class TrainGame:
 
         # For zones to generate, both board dimensions must be divisible by 4
 
-        # Generate empty board
-        self.board = {}
-        for r in range(height):
-            for c in range(width):
-                if r + 1 <= river_ring or r + 1 > height - river_ring:
-                    terrain = "river"
-                elif c + 1 <= river_ring or c + 1 > width - river_ring:
-                    terrain = "river"
-                else:
-                    terrain = None
-                self.board[(r + 1, c + 1)] = TrainTile(terrain=terrain)
+        # Generate empty board, surrounded by a ring of river tiles
+        self.board = TrainBoard(self.size)
+        self.board.terrain[1 : height + 1, 1 : width + 1] = self.board.code(
+            self.board.terrains, "river"
+        )
+        self.board.terrain[
+            1 + river_ring : height + 1 - river_ring,
+            1 + river_ring : width + 1 - river_ring,
+        ] = 0
+        # Distances to placed resources, updated as resources are placed
+        proximity = ResourceProximity(self.board, max_spread=8)
 
         # Add terrain (chance out of 1000)
         river_chance = 900
-        if randint(1, 1000) <= river_chance:
+        if rng.randint(1, 1000) <= river_chance:
             river_dir = ("Down", "DownLeft", "DownRight", "Right")
-            river_dir = choice(river_dir)
+            river_dir = rng.choice(river_dir)
             logger.debug(f"Generating river tiles in {river_dir} for {self.name}")
             self.board = generate_river(river_dir)
 
@@ -406,9 +457,10 @@ class TrainGame:
         # Add random resources
         for c in range(width):
             for r in range(height):
-                self.board[(r + 1, c + 1)].resource = generate_random_resources(
-                    (r + 1, c + 1)
-                )
+                resource = generate_random_resources((r + 1, c + 1))
+                if resource is not None:
+                    self.board[(r + 1, c + 1)].resource = resource
+                    proximity.place(r + 1, c + 1, resource)
 
         # Add genre zones
         self.board = generate_zones()
@@ -420,46 +472,61 @@ class TrainGame:
         shot_row: int,
         shot_col: int,
         remove: bool = False,
-        render_dist: int = 4,
-    ):
-        if "Telescope" in self.players[player_idx].inventory:
-            render_dist += self.players[player_idx].inventory["Telescope"].amount
-
-        for row in range(shot_row - render_dist, shot_row + render_dist + 1):
-            for col in range(shot_col - render_dist, shot_col + render_dist + 1):
-                if (row, col) in self.players[
-                    player_idx
-                ].vis_tiles:  # Already rendered tiles
-                    if remove:
-                        if not any(
-                            (
-                                abs(player_shot.row - row) <= render_dist
-                                and abs(player_shot.col - col) <= render_dist
-                                for player_shot in self.players[player_idx].shots
-                            )
-                        ):
-                            self.players[player_idx].vis_tiles.remove((row, col))
-                    else:
-                        continue
-                elif self.in_bounds(row, col):
-                    self.players[player_idx].vis_tiles.append((row, col))
+        render_dist: int = default_render_dist,
+    ) -> list[tuple[int, int]]:
+        """
+        Reveals the tiles around a tile to a player, or hides them again when a shot is undone
+        Args:
+            player_idx: Index of the player
+            shot_row: Center tile row
+            shot_col: Center tile column
+            remove: Hide the area revealed around the tile instead
+            render_dist: Distance revealed around the tile, increased by the player's telescopes
+        Returns:
+            Tiles whose visibility changed
+        """
+        player = self.players[player_idx]
+        if not isinstance(player.vis_tiles, VisibilityGrid):
+            player.vis_tiles = legacy_vis_grid(self.size, player)
+        vis_tiles: VisibilityGrid = player.vis_tiles
+        if remove:
+            return vis_tiles.hide(shot_row, shot_col)
+
+        if "Telescope" in player.inventory:
+            render_dist += player.inventory["Telescope"].amount
+        return vis_tiles.reveal(shot_row, shot_col, render_dist)
 
     def gen_player_locations(self, river_ring: int) -> None:
+        """
+        Picks the start and end locations of every player. Locations are derived from the board seed, so the same
+        seed and players always get the same locations.
+        Args:
+            river_ring: Width of the river border around the play area
+        Returns:
+            None
+        """
+        rng = Random(f"{self.seed}:players") if self.seed is not None else Random()
         row_bounds: tuple[int, int] = (1 + river_ring, self.size[1] - river_ring)
         col_bounds: tuple[int, int] = (1 + river_ring, self.size[0] - river_ring)
         taken_spaces: list = []
 
         for player_idx, player in enumerate(self.players):
-            quadrant: str = choice(("Left", "Top"))
+            quadrant: str = rng.choice(("Left", "Top"))
 
             # Generate start locations (NOTE: game.size is (width, height) while coordinates are in (row, col)
             attempts: int = 0
             start_loc = None
             while attempts <= 40:
                 if quadrant == "Left":
-                    start_loc = (randint(row_bounds[0], row_bounds[1]), col_bounds[0])
+                    start_loc = (
+                        rng.randint(row_bounds[0], row_bounds[1]),
+                        col_bounds[0],
+                    )
                 else:
-                    start_loc = (row_bounds[0], randint(col_bounds[0], col_bounds[1]))
+                    start_loc = (
+                        row_bounds[0],
+                        rng.randint(col_bounds[0], col_bounds[1]),
+                    )
 
                 if (
                     self.board[start_loc].terrain is None
@@ -485,9 +552,9 @@ class TrainGame:
             end_loc = None
             while attempts <= 40:
                 if quadrant == "Left":
-                    end_loc = (randint(row_bounds[0], row_bounds[1]), col_bounds[1])
+                    end_loc = (rng.randint(row_bounds[0], row_bounds[1]), col_bounds[1])
                 else:
-                    end_loc = (row_bounds[1], randint(col_bounds[0], col_bounds[1]))
+                    end_loc = (row_bounds[1], rng.randint(col_bounds[0], col_bounds[1]))
 
                 if (
                     self.board[end_loc].terrain is None
@@ -549,7 +616,7 @@ class TrainGame:
             return False
 
         if (
-            len(self.board[(shot_row, shot_col)].rails) >= 2
+            self.board.rail_count(shot_row, shot_col) >= 2
         ):  # Tiles with too many players on them
             return False
 
@@ -567,19 +634,10 @@ class TrainGame:
             return False
 
         # Tiles that run next to your current rails
-
-        test_coords = (
-            (shot_row, shot_col + 1),
-            (shot_row, shot_col - 1),
-            (shot_row + 1, shot_col),
-            (shot_row - 1, shot_col),
-        )
-
-        for coord in test_coords:
-            if not self.in_bounds(coord[0], coord[1]) or coord == base_coords:
-                continue
-            elif player.tag in self.board[coord].rails:
-                return False
+        if self.board.has_rail_near(
+            player.tag, shot_row, shot_col, exclude=base_coords
+        ):
+            return False
 
         return True
 
@@ -609,52 +667,65 @@ class TrainGame:
         except Exception as e:
             raise e
 
-    async def push_player_update(self, ctx: Interaction, p: TrainPlayer, p_idx: int):
+    async def push_player_update(
+        self,
+        ctx: Interaction,
+        p: TrainPlayer,
+        p_idx: int,
+        changed_tiles: set[tuple[int, int]] | None = None,
+    ):
         try:
             board_name: str = str(p.member.id)
-            self.draw_board_img(
+            board_png = await self.draw_board_img(
                 filepath=f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{self.name}",
-                board_name=str(p.member.id),
+                board_name=board_name,
                 player_idx=p_idx,
                 player_board=True,
+                changed_tiles=changed_tiles,
             )
-            board_img_path: str = (
-                f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{self.name}/{board_name}.png"
-            )
-            try:
-                with open(board_img_path, "rb") as f:
-                    file = BytesIO(f.read())
-            except FileNotFoundError:
+            if board_png is None:
                 logger.error(
-                    f'Unable to find board image "{board_name}" in "{board_img_path} '
+                    f'Unable to draw board image "{board_name}" '
                     f"for game {self.name} in {ctx.guild.name}"
                 )
-                await ctx.response.send_message(bd.fail_str, ephemeral=True)
-                return True
+                return None
 
             await p.dmchannel.send(
-                file=File(file, filename=board_img_path),
+                file=File(BytesIO(board_png), filename=f"{board_name}.png"),
                 content=f'## Train board update for "{self.name}" in {ctx.guild.name}!',
             )
 
         except AttributeError:
             logger.warning(f"Could not find user with ID {p.member.id}, removing.")
             del self.players[p_idx]
+        except (OSError, ValueError, BrokenExecutor, HTTPException) as e:
+            # A board that fails to render or send must not keep the game state from being updated
+            logger.error(
+                f"Could not send board update to {p.member.id} for game {self.name} in {ctx.guild.name}: {e}"
+            )
 
     async def update_boards_after_shot(
-        self, ctx: Interaction, row: int, column: int
+        self,
+        ctx: Interaction,
+        row: int,
+        column: int,
+        changed_tiles: dict[int, list[tuple[int, int]]] | None = None,
     ) -> None:
-        # Push updates to player boards, check if game is finished
+        # Push updates to player boards, check if game is finished. Besides the shot tile, the tiles in changed_tiles
+        # are redrawn on the boards of the players they are listed under, by player index.
+        if changed_tiles is None:
+            changed_tiles = {}
         tasks: list = []
         for player_idx, player in enumerate(self.players):
-            if (row, column) in player.vis_tiles:
+            if (row, column) in player.vis_tiles or changed_tiles.get(player_idx):
                 logger.debug(
                     f"Sending board update with shot ({row}, {column}) to "
                     f"{player.member.name} for game {self.name} in {ctx.guild.name}"
                 )
+                tiles = {(row, column), *changed_tiles.get(player_idx, ())}
                 tasks.append(
                     asyncio.create_task(
-                        self.push_player_update(ctx, player, player_idx)
+                        self.push_player_update(ctx, player, player_idx, tiles)
                     )
                 )
         await asyncio.gather(*tasks)
@@ -682,11 +753,13 @@ class TrainGame:
         await asyncio.gather(*tasks)
 
         # Update master board/game state
-        self.save_game(f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{self.name}")
+        filepath = f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{self.name}"
+        self.save_game(filepath)
+        get_journal(filepath).snapshot(self.asdict())
         bd.active_trains[ctx.guild_id] = self
         return None
 
-    def gen_stats_embed(
+    async def gen_stats_embed(
         self, ctx: Interaction, page: int = 0
     ) -> tuple[Embed, Union[None, File]]:
         embed: Embed = Embed()
@@ -698,25 +771,10 @@ class TrainGame:
 
         # Game stats page
         if page == 1:
-            resource_count: dict = {}
-            claimed_resource_count: dict = {}
-            rail_count: int = 0
-            intersection_count: int = 0
-            for coord, tile in self.board.items():
-                if tile.resource:
-                    try:
-                        resource_count[tile.resource] += 1
-                    except KeyError:
-                        resource_count[tile.resource] = 1
-                if tile.rails:
-                    rail_count += 1
-                    if tile.resource:
-                        try:
-                            claimed_resource_count[tile.resource] += 1
-                        except KeyError:
-                            claimed_resource_count[tile.resource] = 1
-                    if len(tile.rails) > 1:
-                        intersection_count += 1
+            resource_count: dict = self.board.resource_counts()
+            claimed_resource_count: dict = self.board.resource_counts(claimed=True)
+            rail_count: int = self.board.rail_tile_count()
+            intersection_count: int = self.board.crossing_count()
 
             embed.title = "Game Stats"
             embed.description = f"*{self.name}*\n\u200b"
@@ -745,25 +803,19 @@ class TrainGame:
             )
 
             if self.is_done():
-                self.draw_board_img(
+                board_png = await self.draw_board_img(
                     filepath=f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{self.name}",
                     board_name="MASTER",
                     player_board=False,
                 )
-                board_img_path = (
-                    f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{self.name}/MASTER.png"
-                )
-                try:
-                    with open(board_img_path, "rb") as f:
-                        file = BytesIO(f.read())
-                except FileNotFoundError:
+                if board_png is None:
                     logger.warning(
-                        f"Could not find image at {board_img_path} for "
+                        f"Could not draw master board for "
                         f"game {self.name} in {ctx.guild.name}, skipping image send"
                     )
                     return embed, None
 
-                image = File(file, filename="MASTER.png")
+                image = File(BytesIO(board_png), filename="MASTER.png")
                 embed.set_image(url="attachment://MASTER.png")
                 return embed, image
             else:
@@ -868,258 +920,65 @@ class TrainGame:
                 else:
                     genre_counts[genre] = 1
 
-        plt.style.use("dark_background")
-        fig, ax = plt.subplots()
-
-        plt.rcParams["font.size"] = 14
-        plt.rcParams["font.family"] = "gg sans"
-        plt.rcParams["font.weight"] = "bold"
-        wedges, text, autotexts = ax.pie(list(genre_counts.values()), autopct="%1.1f%%")
-        plt.setp(autotexts, size=16, weight="medium", color="black")
-        plt.title(
-            label="Shot Genre Percentages              ",
-            weight="bold",
-            size=17,
-            family="gg sans",
-            horizontalalignment="right",
-        )
-        plt.legend(
-            genre_counts.keys(),
-            title="Genres",
-            loc="lower left",
-            framealpha=0,
-            bbox_to_anchor=(-0.45, 0.2, 0.75, 1),
-            prop=matplotlib.font_manager.FontProperties(
-                family="gg sans", weight="medium", size=15, style="italic"
-            ),
-            title_fontproperties=matplotlib.font_manager.FontProperties(
-                family="gg sans", weight="medium", size=17
-            ),
-        )
-        filepath = f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{self.name}/stats_img.png"
-        plt.savefig(filepath, transparent=True)
-        plt.close(fig)
-
-        with open(filepath, "rb") as f:
-            file = io.BytesIO(f.read())
-        image = File(file, filename="stats_img.png")
+        chart_png = await rp.render(draw_genre_chart, genre_counts)
+        image = File(BytesIO(chart_png), filename="stats_img.png")
 
         embed.set_image(url="attachment://stats_img.png")
         return embed, image
 
-    def draw_board_img(
+    async def draw_board_img(
         self,
         filepath: str,
         board_name: str,
         player_board: bool = False,
         player_idx: int = 0,
-    ):
-        # Generate board image. If player board: only generate tiles which are rendered.
-        # Grey out other tiles.
-
-        # Adjustments
-        label_offset: int = 1
-        label_font_size: int = 24
-        tile_pixels: int = 50
-        hidden_tile_color: tuple[int, int, int] = (255, 255, 255)
-        border_color: tuple[int, int, int] = (190, 190, 190)
-        font_color: tuple[int, int, int] = (0, 0, 0)
-        font_path = f"{bd.parent}/Shared/ggsans/ggsans-Bold.ttf"
-        default_font = False
-
-        try:
-            base_font = ImageFont.truetype(font_path, label_font_size)
-        except FileNotFoundError:
-            logger.warning(
-                f"Could not find ggsans-Bold at {font_path}, using default font"
-            )
-            default_font = True
-            base_font = ImageFont.load_default()
-        font = base_font
-
+        changed_tiles: set[tuple[int, int]] | None = None,
+    ) -> bytes | None:
+        # Generate board image in a render worker. If player board: only generate tiles which are rendered.
+        # Grey out other tiles. Static layers are cached in the game folder and redrawn when the terrain changes.
+        # If the stored image of the board showed the game before changed_tiles changed, only those tiles are redrawn
+        # on it. The encoded image is kept in memory and written to the game folder in the background.
         player = self.players[player_idx]
-        board_img = Image.new(
-            mode="RGB",
-            size=(
-                (self.size[0] + label_offset) * tile_pixels,
-                (self.size[1] + label_offset) * tile_pixels,
-            ),
-            color=0xFFFFFF,
-        )
-        draw: ImageDraw = ImageDraw.Draw(board_img)
-        pilmoji: Pilmoji = Pilmoji(board_img)
-
-        def draw_hatch_pattern(hatch_row: int, hatch_col: int):
-            hatch_row += label_offset
-            hatch_col += label_offset
-            hatch_color: tuple[int, int, int] = (40, 40, 40)
-            padding: int = 1
-
-            x_start: int = tile_pixels * (hatch_col - 1)
-            y_start: int = tile_pixels * (hatch_row - 1)
-
-            x, y = x_start, y_start
-            while y < y_start + tile_pixels:
-                xy = (
-                    (x_start + padding, y + padding),
-                    (x + tile_pixels - padding, y_start + tile_pixels - padding),
-                )
-                draw.line(xy=xy, fill=hatch_color, width=1)
-                x -= 4
-                y += 4
-
-            x, y = x_start, y_start
-            while x < x_start + tile_pixels:
-                xy = (
-                    (x + padding, y_start + padding),
-                    (x_start + tile_pixels - padding, y + tile_pixels - padding),
-                )
-                draw.line(xy=xy, fill=hatch_color, width=1)
-                x += 4
-                y -= 4
-
-        # Draw column labels/tile borders
-
-        for label_x in range(1, self.size[0] + 1):
-            draw.rectangle(
-                xy=(
-                    (label_x * tile_pixels, 1),
-                    ((label_x + 1) * tile_pixels, tile_pixels),
-                ),
-                fill=hidden_tile_color,
-                outline=border_color,
-                width=1,
+        board_path = f"{filepath}/{board_name}.png"
+        # Renders of one board run one at a time, so each redraws the image stored by the one before
+        async with self.board_locks.setdefault(board_path, asyncio.Lock()):
+            previous = None
+            if changed_tiles is not None and board_path in self.drawn_boards:
+                previous = images.get(board_path)
+            self.drawn_boards.discard(board_path)
+            board_args = dict(
+                size=self.size,
+                board=self.board,
+                vis_tiles=player.vis_tiles if player_board else None,
+                start=player.start,
+                end=player.end,
             )
-            draw.text(
-                xy=(label_x * tile_pixels + tile_pixels / 2, tile_pixels / 2),
-                text=str(label_x),
-                font=font,
-                anchor="mm",
-                fill=font_color,
-            )
-        # Draw row labels/tile borders
-        for label_y in range(1, self.size[1] + 1):
-            draw.rectangle(
-                xy=(
-                    (1, label_y * tile_pixels),
-                    (tile_pixels, (label_y + 1) * tile_pixels),
-                ),
-                fill=hidden_tile_color,
-                outline=border_color,
-                width=1,
-            )
-            draw.text(
-                xy=(
-                    round(tile_pixels / 2),
-                    label_y * tile_pixels + round(tile_pixels / 2),
-                ),
-                text=str(label_y),
-                font=font,
-                anchor="mm",
-                fill=font_color,
-            )
-        # Draw game tiles
-
-        default_font_size: int = 24
-        font_size = default_font_size
-        emoji_pixels: int = font_size - 4
-        if not default_font:
-            font = ImageFont.truetype(font_path, font_size)
-
-        for coords in self.board.keys():
-            (row, col) = coords
-
-            # Draw hidden tile as gray, skip to next tile
-            if player_board and coords not in player.vis_tiles:
-                draw.rectangle(
-                    xy=(
-                        (col * tile_pixels, row * tile_pixels),
-                        ((col + 1) * tile_pixels, (row + 1) * tile_pixels),
-                    ),
-                    fill=hidden_tile_color,
-                    outline=border_color,
-                    width=1,
-                )
-                continue
-
-            # Draw non-hidden tiles
-
-            tile_zone = self.board[coords].zone
-            if tile_zone is None:
-                tile_color: tuple[int, int, int] = (255, 255, 255)
-            else:
-                tile_color = genre_colors[tile_zone]
-
-            draw.rectangle(
-                xy=(
-                    (col * tile_pixels, row * tile_pixels),
-                    (col * tile_pixels + tile_pixels, row * tile_pixels + tile_pixels),
-                ),
-                fill=tile_color,
-                outline=border_color,
-                width=1,
-            )
-            if self.board[coords].terrain == "river":
-                draw_hatch_pattern(row, col)
-
-            resource_text = (
-                self.board[coords].resource if self.board[coords].resource else ""
-            )
-
-            # Draw start/end text
-            if coords == player.start and not self.board[coords].rails:
-                rail_text = "Start"
-            elif coords == player.end and not self.board[coords].rails:
-                rail_text = "End"
-            else:
-                rail_text = "".join(self.board[coords].rails)
-            text_pixels = draw.textlength(text=resource_text + rail_text, font=font)
-
-            # Dynamic font/emoji sizing depending on length of text
-            if resource_text and rail_text:
-                text_pixels += emoji_pixels
-                text_offset = round(emoji_pixels * 0.4)
-            else:
-                text_offset = 0
-
-            while text_pixels > 0.8 * tile_pixels and font_size > 6:
-                font_size -= 2
-                emoji_pixels -= 2
-                if not default_font:
-                    font = ImageFont.truetype(
-                        f"{bd.parent}/Shared/ggsans/ggsans-Bold.ttf", font_size
-                    )
-                text_pixels = draw.textlength(text=resource_text + rail_text, font=font)
-                if resource_text:
-                    text_pixels += emoji_pixels
-
-            # Draw tile resource and rails
-            pilmoji.text(
-                xy=(
-                    col * tile_pixels + round(tile_pixels / 2) - text_offset,
-                    row * tile_pixels + round(tile_pixels / 2),
-                ),
-                text=rail_text + resource_text,
-                anchor="mm",
-                fill=font_color,
-                font=font,
-                emoji_position_offset=(-round(font_size / 2), -round(font_size / 2)),
-                emoji_scale_factor=1.1,
-            )
-            if font_size != default_font_size:
-                font_size = default_font_size
-                emoji_pixels = font_size - 4
-                if not default_font:
-                    font = ImageFont.truetype(
-                        f"{bd.parent}/Shared/ggsans/ggsans-Bold.ttf", font_size
+            board_png = None
+            try:
+                if previous is not None:
+                    try:
+                        board_png = await rp.render(
+                            render_board_png,
+                            describe_board(**board_args, tiles=changed_tiles),
+                            previous=previous,
+                        )
+                    except (OSError, ValueError) as e:
+                        logger.warning(
+                            f"Could not redraw board {board_name} at {filepath}, drawing it again: {e}"
+                        )
+                if board_png is None:
+                    board_png = await rp.render(
+                        render_board_png,
+                        describe_board(**board_args),
+                        cache_dir=filepath,
                     )
-
-        try:
-            board_img.save(f"{filepath}/{board_name}.png")
-        except PermissionError:
-            logger.error(f"Permission denied for board {board_name} at {filepath}")
-            return "Could not write the board. Try again in a few seconds..."
-        return None
+            except PermissionError:
+                # Static layers are still written to the game folder
+                logger.error(f"Permission denied for board {board_name} at {filepath}")
+                return None
+            images.put(board_path, board_png)
+            self.drawn_boards.add(board_path)
+        return board_png
 
     def update_player_stats_after_shot(
         self,
@@ -1127,7 +986,8 @@ class TrainGame:
         player: TrainPlayer,
         undo: bool = False,
         shot: TrainShot = None,
-    ):
+    ) -> list[tuple[int, int]]:
+        # Returns the tiles that look different on the sender's board
         check_gem_time = False
         if self.board[shot.coords()].resource == game_emoji["gems"]:
             shot_list = player.shots[:-1] if undo else player.shots
@@ -1158,25 +1018,9 @@ class TrainGame:
                     datetime.strptime(shot.time, bd.date_format).timestamp()
                 )
 
-        self.update_vis_tiles(
+        changed_tiles = self.update_vis_tiles(
             player_idx=sender_idx, shot_row=shot.row, shot_col=shot.col, remove=undo
         )
-        if undo:
-            shot = player.shots[-1]
-            self.update_vis_tiles(
-                player_idx=sender_idx, shot_row=shot.row, shot_col=shot.col
-            )
-            self.update_vis_tiles(
-                player_idx=sender_idx,
-                shot_row=player.start[0],
-                shot_col=player.start[1],
-            )
-            self.update_vis_tiles(
-                player_idx=sender_idx,
-                shot_row=player.end[0],
-                shot_col=player.end[1],
-                render_dist=0,
-            )
 
         if self.board[shot.coords()].terrain == "river":
             if "Pontoon Bridge" in player.inventory:
@@ -1193,9 +1037,10 @@ class TrainGame:
             self.players[sender_idx].rails -= rails
         else:
             self.players[sender_idx].rails += rails
+        return [shot.coords(), *changed_tiles]
 
-    def buy_item(self, itemname: str, showinfo: str, ctx: Interaction) -> bool:
-        player_idx, player = self.get_player(ctx.user.id)
+    def buy_item(self, itemname: str, showinfo: str, player_id: int) -> bool:
+        player_idx, player = self.get_player(player_id)
         if player is None or self.shop[itemname].amount < 1 or not player.shots:
             return True
 
@@ -1219,14 +1064,13 @@ class TrainGame:
 
         player.shops_used.append(player_loc)
         logger.debug(
-            f"Player {player.member.name} bought {itemname} for game {self.name} in {ctx.guild.name}"
+            f"Player {player.member.name} bought {itemname} for game {self.name}"
         )
         self.shop[itemname].amount -= 1
-        self.save_game(f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{self.name}")
         return False
 
-    def use_bucket(self, ctx: Interaction, row: int, col: int) -> bool:
-        player_idx, player = self.get_player(ctx.user.id)
+    def use_bucket(self, player_id: int, row: int, col: int) -> bool:
+        player_idx, player = self.get_player(player_id)
         if player is None:
             return True
 
@@ -1238,7 +1082,100 @@ class TrainGame:
         player.update_item_count("Bucket")
         return False
 
+    def apply_event(self, entry: dict) -> None:
+        """
+        Replays an action recorded in the game journal
+        Args:
+            entry: Journal entry of the action
+        Returns:
+            None
+        """
+        player_idx, player = self.get_player(entry["player_id"])
+        if entry["event"] == "shot":
+            shot = TrainShot(
+                row=entry["row"],
+                col=entry["col"],
+                show_id=entry["show_id"],
+                info=entry["info"],
+                time=entry["time"],
+            )
+            self.update_player_stats_after_shot(
+                sender_idx=player_idx, player=player, shot=shot
+            )
+        elif entry["event"] == "undo":
+            self.update_player_stats_after_shot(
+                sender_idx=player_idx, player=player, undo=True, shot=player.shots[-1]
+            )
+        elif entry["event"] == "buy":
+            self.buy_item(entry["item"], entry["showinfo"], entry["player_id"])
+        elif entry["event"] == "use" and entry["item"] == "Bucket":
+            self.use_bucket(entry["player_id"], entry["row"], entry["col"])
+        else:
+            logger.warning(f"Unknown journal event {entry['event']} in {self.name}")
+        self.active = not self.is_done()
+        return None
+
     async def calculate_player_scores(self, ctx: Interaction) -> None:
+        """
+        Scores all players at the end of the game and saves the game
+        Args:
+            ctx: Interaction that ended the game
+        Returns:
+            None
+        Raises:
+            TrainGame.ScoringError: If the starting or ending anilist of any player could not be read, nothing is
+                scored
+        """
+        for player in self.players:
+            try:
+                # Starting anilists are read from the sidecar file on first use
+                len(player.starting_anilist)
+            except ValueError as e:
+                raise self.ScoringError(str(e)) from e
+        ending_anilists = await self.fetch_ending_anilists()
+        missing = [
+            player.member.name
+            for player in self.players
+            if ending_anilists.get(player.anilist_id) is None
+        ]
+        if missing:
+            raise self.ScoringError(
+                f"Could not fetch the anilists of {', '.join(missing)}"
+            )
+        self.score_players(ending_anilists)
+        self.save_game(f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{self.name}")
+        return None
+
+    async def fetch_ending_anilists(self) -> dict[int, list | None]:
+        """
+        Fetches the anilist of every player at the end of the game, all players at once
+        Returns:
+            Anilist entries by anilist ID, None for lists that could not be fetched
+        """
+        max_concurrent = asyncio.Semaphore(6)
+
+        async def fetch_anilist(anilist_id: int) -> tuple[int, list | None]:
+            async with max_concurrent:
+                return anilist_id, await al.query_user_animelist(anilist_id)
+
+        anilist_ids = {player.anilist_id for player in self.players}
+        return dict(await asyncio.gather(*(fetch_anilist(i) for i in anilist_ids)))
+
+    def score_players(
+        self, ending_anilists: dict[int, list | None], rng: Random = None
+    ) -> None:
+        """
+        Scores all players from the board, their shots and their anilist changes. Does no I/O, so it can be run and
+        timed on its own.
+        Args:
+            ending_anilists: Anilist entries of every player at the end of the game, by anilist ID
+            rng: Random source for city seasons
+        Returns:
+            None
+        """
+        if rng is None:
+            rng = Random()
+
         def add_to_score(p: TrainPlayer, key: str, val: int):
             if key in player.score:
                 p.score[key] += val
@@ -1252,11 +1189,14 @@ class TrainGame:
 
         # Find player prison counts and gun effects before counting score for intersection scoring
         player_prison_counts = {}
-        player_starting_anilists = []
+        # Starting anilists by media ID, and the shows on any player's starting anilist
+        starting_indexes: dict[str, dict[int, dict]] = {}
+        all_starting_ids: set[int] = set()
 
         for player in self.players:
             player.score = {}  # Avoid re-adding to non-zero score
-            player_starting_anilists += player.starting_anilist
+            starting_indexes[player.tag] = index_anilist(player.starting_anilist)
+            all_starting_ids |= starting_indexes[player.tag].keys()
             track_resources = [
                 self.board[shot.coords()].resource for shot in player.shots
             ]
@@ -1270,10 +1210,20 @@ class TrainGame:
         for idx, player in enumerate(self.players):
             # Quest Scoring
 
-            ending_anilist = await al.query_user_animelist(player.anilist_id)
+            ending_anilist = ending_anilists.get(player.anilist_id)
+            if ending_anilist is None:
+                raise self.ScoringError(
+                    f"No ending anilist for {player.member.name} in {self.name}"
+                )
             anilist_changes = find_anilist_changes(
-                player.starting_anilist, ending_anilist
+                player.starting_anilist,
+                ending_anilist,
+                start_index=starting_indexes[player.tag],
             )
+            # Shows and the episodes watched of them during the game
+            watched_changes = {
+                (anime["mediaId"], anime["progress"]) for anime in anilist_changes
+            }
 
             # Fast finish scoring
             if idx == 0:
@@ -1310,11 +1260,7 @@ class TrainGame:
                     tag["name"] == "Trains" and tag["rank"] > 40
                     for tag in shot_anime_info["tags"]
                 ):
-                    if any(
-                        anime["mediaId"] == shot.show_id
-                        and anime["progress"] == shot_anime_info["episodes"]
-                        for anime in anilist_changes
-                    ):
+                    if (shot.show_id, shot_anime_info["episodes"]) in watched_changes:
                         train_tag_quest_complete = True
                 if len(shot_tile.rails) > 1:
                     intersecting_player_tag = [
@@ -1329,7 +1275,7 @@ class TrainGame:
                 if shot_tile.resource == game_emoji["city"]:
                     has_city = True
                     if shot.coords() not in city_coords:
-                        city_coords[shot.coords()] = choice(
+                        city_coords[shot.coords()] = rng.choice(
                             ["SPRING", "SUMMER", "AUTUMN", "WINTER"]
                         )
                     if shot_anime_info["season"] == city_coords[shot.coords()]:
@@ -1360,10 +1306,9 @@ class TrainGame:
                     anime_sources.append(shot_anime_info["source"])
                 if shot_tile.zone in shot_anime_info["genres"]:
                     genre_zone_matched = True
-                if any(
-                    shot.show_id == d["mediaId"] for d in player_starting_anilists
-                ) and not any(
-                    d["mediaId"] == shot.show_id for d in player.starting_anilist
+                if (
+                    shot.show_id in all_starting_ids
+                    and shot.show_id not in starting_indexes[player.tag]
                 ):
                     if shot.show_id not in different_player_anime_shots:
                         different_player_anime_shots.append(shot.show_id)
@@ -1390,10 +1335,9 @@ class TrainGame:
                 player.score["quest: train tag"] = 3
 
             player.score["total"] = sum(player.score.values())
+        return None
 
-        self.save_game(f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{self.name}")
-
-    def gen_score_embed(
+    async def gen_score_embed(
         self, ctx: Interaction, page: int = 0
     ) -> tuple[Embed, Union[None, File]]:
         embed = Embed()
@@ -1424,19 +1368,17 @@ class TrainGame:
             board_img_path = (
                 f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{self.name}/MASTER.png"
             )
-            if not path.exists(board_img_path):
-                self.draw_board_img(
+            board_png = images.get(board_img_path)
+            if board_png is None:
+                board_png = await self.draw_board_img(
                     filepath=f"{bd.parent}/Guilds/{ctx.guild_id}/Trains/{self.name}",
                     board_name="MASTER",
                     player_board=False,
                 )
-            try:
-                with open(board_img_path, "rb") as f:
-                    file = BytesIO(f.read())
-            except FileNotFoundError:
+            if board_png is None:
                 return embed, None
 
-            image = File(file, filename="MASTER.png")
+            image = File(BytesIO(board_png), filename="MASTER.png")
             embed.set_image(url="attachment://MASTER.png")
             return embed, image
 
@@ -1452,26 +1394,99 @@ class TrainGame:
 async def load_trains_game(
     filepath: str, guild: Guild, active_only: bool = False
 ) -> TrainGame | None:
-    with open(f"{filepath}/gamedata.json", "r") as f:
-        game_dict = json.load(f)
-    if (
-        active_only and not game_dict["active"]
-    ):  # Skip loading inactive games if specified for faster loads
-        return TrainGame(active=False)
-
-    # Convert str/list keys back into tuple for use in game
-    board: dict = {}
-    for key, val in game_dict["board"].items():
-        coords = key[1:-1].split(",")
-        coords[0] = int(coords[0])
-        coords[1] = int(coords[1])
-        coords = tuple(coords)
-        board[coords] = TrainTile(
-            resource=game_dict["board"][key]["resource"],
-            zone=game_dict["board"][key]["zone"],
-            rails=game_dict["board"][key]["rails"],
-            terrain=game_dict["board"][key]["terrain"],
-        )
+    await saves.settle(f"{filepath}/{gamefile_name}")
+    if not path.exists(f"{filepath}/{gamefile_name}"):
+        # Games saved before the compact game format are read from JSON until they are next saved
+        with open(f"{filepath}/{legacy_gamefile_name}", "r") as f:
+            game_dict = json.load(f)
+        if active_only and not game_dict["active"]:
+            return TrainGame(active=False)
+        return await trains_game_from_dict(game_dict, guild, filepath)
+
+    with GameFile(f"{filepath}/{gamefile_name}") as gamefile:
+        if (
+            active_only and not gamefile.header()["active"]
+        ):  # Skip loading inactive games if specified for faster loads
+            return TrainGame(active=False)
+        game_dict = gamefile.game_dict()
+    return await trains_game_from_dict(game_dict, guild, filepath)
+
+
+def read_trains_summary(filepath: str) -> dict:
+    """
+    Reads the summary of a stored game for the game index, without reading its board or shots
+    Args:
+        filepath: Game folder
+    Returns:
+        Game summary, as returned by TrainGame.summary
+    """
+    if path.exists(f"{filepath}/{gamefile_name}"):
+        with GameFile(f"{filepath}/{gamefile_name}") as gamefile:
+            game_dict = gamefile.header()
+            game_dict["players"] = gamefile.players(shots=False)
+    else:
+        with open(f"{filepath}/{legacy_gamefile_name}", "r") as f:
+            game_dict = json.load(f)
+    return {
+        "active": game_dict["active"],
+        "size": game_dict["size"],
+        "players": [player["member_id"] for player in game_dict["players"]],
+        "created": game_dict["date"],
+    }
+
+
+def legacy_vis_grid(size: tuple[int, int], player: TrainPlayer) -> VisibilityGrid:
+    """
+    Converts the visible tiles stored by older games to a visibility grid. The areas revealed around the player's
+    start location, end location and shots are rebuilt with the distances update_vis_tiles reveals them with, so
+    undoing a shot later hides the same tiles it would have in a new game.
+    Args:
+        size: Board size (width, height)
+        player: Player whose vis_tiles holds a list of visible tiles
+    Returns:
+        Visibility grid showing the same tiles
+    """
+    render_dist = default_render_dist
+    if "Telescope" in player.inventory:
+        # Telescopes may have been bought mid-game, from_tiles shrinks areas revealed before that to fit
+        render_dist += player.inventory["Telescope"].amount
+    areas = []
+    if player.start is not None:
+        areas.append((*player.start, render_dist))
+    if player.end is not None:
+        areas.append((*player.end, 0))
+    areas += [(shot.row, shot.col, render_dist) for shot in player.shots]
+    return VisibilityGrid.from_tiles(size, player.vis_tiles, areas)
+
+
+async def trains_game_from_dict(
+    game_dict: dict, guild: Guild, filepath: str
+) -> TrainGame:
+    """
+    Creates a game from its serialized state
+    Args:
+        game_dict: Serialized game, as returned by TrainGame.asdict. The board may also be a TrainBoard.
+        guild: Guild the game is played in
+        filepath: Game folder
+    Returns:
+        Game
+    """
+    if isinstance(game_dict["board"], TrainBoard):
+        board = game_dict["board"]
+    else:
+        # Convert str/list keys back into tuple for use in game
+        board = {}
+        for key, val in game_dict["board"].items():
+            coords = key[1:-1].split(",")
+            coords[0] = int(coords[0])
+            coords[1] = int(coords[1])
+            coords = tuple(coords)
+            board[coords] = TrainTile(
+                resource=game_dict["board"][key]["resource"],
+                zone=game_dict["board"][key]["zone"],
+                rails=game_dict["board"][key]["rails"],
+                terrain=game_dict["board"][key]["terrain"],
+            )
 
     shop: dict = {}
 
@@ -1512,7 +1527,7 @@ async def load_trains_game(
                 amount=item["amount"],
                 cost=item["cost"],
                 showinfo=item["showinfo"],
-                uses=item["showinfo"],
+                uses=item["uses"],
             )
 
         member = await guild.fetch_member(player["member_id"])
@@ -1530,10 +1545,18 @@ async def load_trains_game(
                 end=tuple(player["end"]),
                 score=player["score"],
                 shots=shot_list,
-                vis_tiles=[tuple(tile) for tile in player["vis_tiles"]],
+                # Visible tiles of older games are converted by TrainGame once the player is complete
+                vis_tiles=(
+                    VisibilityGrid(game_dict["size"], player["vis_areas"])
+                    if "vis_areas" in player
+                    else player["vis_tiles"]
+                ),
                 donetime=player["donetime"],
                 inventory=item_dict,
-                starting_anilist=player["starting_anilist"],
+                # Older games store starting anilists in the game data
+                starting_anilist=player.get(
+                    "starting_anilist", LazyAnilist(filepath, player["member_id"])
+                ),
                 anilist_id=player["anilist_id"],
                 least_watched_genre=player["least_watched_genre"],
             )
@@ -1548,9 +1571,80 @@ async def load_trains_game(
         active=game_dict["active"],
         size=tuple(game_dict["size"]),
         shop=shop,
-        known_shows={
+        seed=game_dict.get("seed"),
+    )
+    game.anilists_stored = all(
+        "starting_anilist" not in player for player in game_dict["players"]
+    )
+
+    # Games store copies of show data, except compact game files written before show data was stored with them
+    if isinstance(game_dict["known_shows"], dict):
+        game.known_shows = {
             int(show_id): show_info
             for show_id, show_info in game_dict["known_shows"].items()
-        },
+        }
+        al.cache_entries("media", game.known_shows)
+        show_ids = set()
+    else:
+        show_ids = set(game_dict["known_shows"])
+
+    await resolve_known_shows(game, show_ids, guild)
+    return game
+
+
+async def resolve_known_shows(
+    game: TrainGame, show_ids: set[int], guild: Guild
+) -> None:
+    """
+    Resolves the shows referenced by a game and its shots, fetching missing shows in one batched request
+    Args:
+        game: Game to resolve shows of
+        show_ids: Show IDs referenced by the game besides its shots
+        guild: Guild the game is played in
+    Returns:
+        None
+    Raises:
+        ConnectionError: If a show could not be fetched, as the game could not be scored or undone without it
+    """
+    show_ids = show_ids | {
+        shot.show_id for player in game.players for shot in player.shots
+    }
+    missing_show_ids = show_ids - game.known_shows.keys()
+    if missing_show_ids:
+        logger.debug(
+            f"Resolving {len(missing_show_ids)} shows for game {game.name} in {guild.name}"
+        )
+        for show_id, show_info in (
+            await al.query_media_batch(missing_show_ids)
+        ).items():
+            if show_info is not None:
+                game.known_shows[show_id] = show_info
+        missing_show_ids -= game.known_shows.keys()
+        if missing_show_ids:
+            raise ConnectionError(
+                f"Could not fetch anilist data of shows {sorted(missing_show_ids)} for game {game.name}"
+            )
+    return None
+
+
+async def rebuild_trains_game(
+    filepath: str, guild: Guild, seq: int | None = None
+) -> TrainGame:
+    """
+    Rebuilds the state of a game after an action recorded in its journal
+    Args:
+        filepath: Game folder
+        guild: Guild the game is played in
+        seq: Sequence number of the action, defaults to the last recorded action
+    Returns:
+        Game as it was after the action
+    """
+    state, entries = get_journal(filepath).history(seq)
+    game = await trains_game_from_dict(state, guild, filepath)
+    # Shots are scored against show genres, so shows must be known before replaying
+    await resolve_known_shows(
+        game, {entry["show_id"] for entry in entries if entry["event"] == "shot"}, guild
     )
+    for entry in entries:
+        game.apply_event(entry)
     return game
@@ -0,0 +1,215 @@
+import json
+import logging
+import math
+from hashlib import sha1
+from os import path
+from time import monotonic
+
+from PIL import Image, ImageDraw, ImageFont
+from pilmoji.helpers import NodeType, to_nodes
+from pilmoji.source import BaseSource, TwitterEmojiSource
+
+logger = logging.getLogger(__name__)
+
+atlas_dir: str = f"{path.dirname(path.realpath(__file__))}/twemoji"
+atlas_image_path: str = f"{atlas_dir}/atlas.png"
+atlas_index_path: str = f"{atlas_dir}/atlas.json"
+
+# Most scaled sprites kept in memory
+sprite_cache_size: int = 512
+
+# Seconds before an emoji that could not be fetched is tried again
+fetch_retry_delay: int = 300
+
+# Emoji checked at startup when the atlas is missing, to make sure emoji can be fetched instead
+probe_emoji: str = "🚂"
+
+
+class EmojiAtlas:
+    """
+    Pre-rasterized emoji sprites packed into one image, loaded once and scaled on demand. Emoji missing from the
+    atlas, or every emoji if no atlas was found, are fetched once from Pilmoji's Twemoji source instead.
+
+    Attributes:
+        sheet (Image.Image | None): Atlas image holding every sprite, None if no atlas was found
+        index (dict[str, tuple[int, int, int, int]]): Box of each emoji's sprite in the sheet
+        version (str): Digest of the atlas index, changes when the atlas is rebuilt
+        source (BaseSource): Emoji source used for emoji missing from the atlas
+    """
+
+    def __init__(self, image_path: str, index_path: str):
+        self.sheet: Image.Image | None = None
+        self.index: dict[str, tuple[int, int, int, int]] = {}
+        self.version: str = "pilmoji"
+        self.source: BaseSource = TwitterEmojiSource()
+        self._sprites: dict[tuple[str, int], Image.Image] = {}
+        # Unscaled sprites fetched from the source, None if the source has no sprite for the emoji
+        self._fetched: dict[str, Image.Image | None] = {}
+        # Time of the last failed fetch of each emoji
+        self._failed: dict[str, float] = {}
+        try:
+            with open(index_path, "rb") as f:
+                raw_index = f.read()
+            self.index = {
+                emoji: tuple(box) for emoji, box in json.loads(raw_index).items()
+            }
+            with Image.open(image_path) as sheet:
+                self.sheet = sheet.convert("RGBA")
+            self.version = sha1(raw_index).hexdigest()[:8]
+            logger.info(f"Loaded emoji atlas with {len(self.index)} sprites")
+        except (OSError, ValueError) as e:
+            self.index = {}
+            self.version = "pilmoji"
+            logger.warning(
+                f"Could not load emoji atlas from {atlas_dir} ({e}), emoji will be fetched with Pilmoji. "
+                f"Build it with python -m brbot.Tools.build_emoji_atlas"
+            )
+
+    @property
+    def loaded(self) -> bool:
+        return self.sheet is not None
+
+    def fetch(self, emoji: str) -> Image.Image | None:
+        """
+        Fetches the sprite of an emoji missing from the atlas, keeping it for later use
+        Args:
+            emoji: Emoji to fetch
+        Returns:
+            Unscaled RGBA sprite, or None if the emoji could not be fetched
+        """
+        if emoji not in self._fetched:
+            if (
+                monotonic() - self._failed.get(emoji, -fetch_retry_delay)
+                < fetch_retry_delay
+            ):
+                return None
+            try:
+                stream = self.source.get_emoji(emoji)
+                if stream is None:
+                    self._fetched[emoji] = None
+                else:
+                    with Image.open(stream) as sprite:
+                        self._fetched[emoji] = sprite.convert("RGBA")
+            except (OSError, ValueError) as e:
+                # Failed fetches are retried after a delay, so an outage does not slow down every render
+                logger.warning(f"Could not fetch emoji {emoji} with Pilmoji: {e}")
+                self._failed[emoji] = monotonic()
+                return None
+        return self._fetched[emoji]
+
+    def __contains__(self, emoji: str) -> bool:
+        return emoji in self.index
+
+    def sprite(self, emoji: str, width: int) -> Image.Image | None:
+        """
+        Retrieves an emoji sprite scaled to a width, keeping its aspect ratio
+        Args:
+            emoji: Emoji to retrieve
+            width: Sprite width in pixels
+        Returns:
+            RGBA sprite, or None if the emoji is neither in the atlas nor available from the source
+        """
+        key = (emoji, width)
+        if key in self._sprites:
+            return self._sprites[key]
+        if width < 1:
+            return None
+
+        if emoji in self.index:
+            sprite = self.sheet.crop(self.index[emoji])
+        else:
+            sprite = self.fetch(emoji)
+            if sprite is None:
+                return None
+        size = width, math.ceil(sprite.height / sprite.width * width)
+        sprite = sprite.resize(size, Image.Resampling.LANCZOS)
+        if len(self._sprites) >= sprite_cache_size:
+            del self._sprites[next(iter(self._sprites))]
+        self._sprites[key] = sprite
+        return sprite
+
+
+_atlas: EmojiAtlas | None = None
+
+
+def get_atlas() -> EmojiAtlas:
+    """
+    Loads the bundled emoji atlas on first use
+    Returns:
+        Shared emoji atlas
+    """
+    global _atlas
+    if _atlas is None:
+        _atlas = EmojiAtlas(atlas_image_path, atlas_index_path)
+    return _atlas
+
+
+def check_emoji_rendering() -> None:
+    """
+    Checks that game boards can draw emoji, either from the atlas or by fetching them with Pilmoji
+    Returns:
+        None
+    """
+    atlas = get_atlas()
+    if atlas.loaded:
+        return None
+    if atlas.fetch(probe_emoji) is None:
+        logger.warning(
+            f"No emoji atlas found in {atlas_dir} and emoji could not be fetched with Pilmoji, boards are drawn "
+            f"without emoji until the fetch succeeds. Build the atlas with python -m brbot.Tools.build_emoji_atlas"
+        )
+        return None
+    logger.warning(
+        "Drawing emoji with Pilmoji, build the emoji atlas for faster board rendering"
+    )
+    return None
+
+
+def draw_emoji_text(
+    image: Image.Image,
+    draw: ImageDraw.ImageDraw,
+    xy: tuple[int, int],
+    text: str,
+    font: ImageFont.FreeTypeFont | ImageFont.ImageFont,
+    fill: tuple[int, int, int],
+    anchor: str | None = None,
+    emoji_scale_factor: float = 1.0,
+    emoji_position_offset: tuple[int, int] = (0, 0),
+) -> None:
+    """
+    Draws a line of text containing emoji, pasting atlas sprites in place of emoji. Lays text out the same way as
+    Pilmoji.text, only fetching emoji over the network if they are missing from the atlas.
+    Args:
+        image: Image to draw on
+        draw: Drawing context of the image
+        xy: Text position
+        text: Text to draw
+        font: Text font
+        fill: Text color
+        anchor: Text anchor, applied to each run of text
+        emoji_scale_factor: Emoji width relative to the font size
+        emoji_position_offset: Emoji offset from the text position
+    Returns:
+        None
+    """
+    atlas = get_atlas()
+    x, y = xy
+    for line in to_nodes(text):
+        x = xy[0]
+        for node in line:
+            content = node.content
+            width = int(font.getlength(content))
+            sprite = None
+            if node.type is NodeType.emoji:
+                sprite = atlas.sprite(content, int(emoji_scale_factor * font.size))
+
+            if sprite is None:
+                draw.text((x, y), content, fill=fill, font=font, anchor=anchor)
+                x += width
+                continue
+
+            ox, oy = emoji_position_offset
+            image.paste(sprite, (x + ox, y + oy), sprite)
+            x += sprite.width
+        y += 4 + font.size
+    return None
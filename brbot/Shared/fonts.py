@@ -0,0 +1,78 @@
+import logging
+from io import BytesIO
+from os import path
+
+from PIL import ImageFont
+
+logger = logging.getLogger(__name__)
+
+font_dir: str = f"{path.dirname(path.realpath(__file__))}/ggsans"
+
+_faces: dict[str, bytes | None] = {}
+_fonts: dict[tuple[str, int], ImageFont.FreeTypeFont | ImageFont.ImageFont] = {}
+_fitted_sizes: dict[tuple[str, str, float, int, int], int] = {}
+
+
+def get_font(
+    size: int, face: str = "Bold"
+) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    """
+    Retrieves a ggsans font. Each face is read from disk once, and each size is only loaded once.
+    Args:
+        size: Font size
+        face: ggsans face name, e.g. "Bold" or "Medium"
+    Returns:
+        Font, or PIL's default font if the face could not be found
+    """
+    key = (face, size)
+    if key in _fonts:
+        return _fonts[key]
+
+    if face not in _faces:
+        try:
+            with open(f"{font_dir}/ggsans-{face}.ttf", "rb") as f:
+                _faces[face] = f.read()
+        except OSError:
+            logger.warning(
+                f"Could not find ggsans-{face} in {font_dir}, using default font"
+            )
+            _faces[face] = None
+
+    if _faces[face] is None:
+        font = ImageFont.load_default()
+    else:
+        font = ImageFont.truetype(BytesIO(_faces[face]), size)
+    _fonts[key] = font
+    return font
+
+
+def fit_font_size(
+    text: str,
+    max_pixels: float,
+    size: int,
+    face: str = "Bold",
+    min_size: int = 6,
+) -> int:
+    """
+    Finds the font size text must be drawn at to fit a width, shrinking the font 2 points at a time. Results are
+    remembered, so fitting text that was fitted before is a lookup.
+    Args:
+        text: Text to fit
+        max_pixels: Width the text must fit in
+        size: Starting font size
+        face: ggsans face name
+        min_size: Size below which the font is not shrunk further
+    Returns:
+        Fitted font size
+    """
+    key = (text, face, max_pixels, size, min_size)
+    if key in _fitted_sizes:
+        return _fitted_sizes[key]
+
+    fitted = size
+    font = get_font(fitted, face)
+    while font.getlength(text) > max_pixels and fitted > min_size:
+        fitted -= 2
+        font = get_font(fitted, face)
+    _fitted_sizes[key] = fitted
+    return fitted
@@ -0,0 +1,287 @@
+"""
+Local stand-in for the anilist GraphQL API, used to run and benchmark the bot without network access.
+
+Responses are replayed from fixture files. In record mode, requests are forwarded to the real API and the responses
+are saved as fixtures. Point the bot at the stand-in by setting ANILIST_URL, e.g. ANILIST_URL=http://127.0.0.1:8642
+
+Usage:
+    python -m brbot.Tools.anilist_standin [--fixtures DIR] [--record https://graphql.anilist.co]
+        [--latency SECONDS] [--jitter SECONDS] [--error-rate FRACTION] [--rate-limit PER_MINUTE]
+"""
+
+import argparse
+import json
+import logging
+import re
+from asyncio import sleep
+from collections import deque
+from hashlib import sha1
+from os import makedirs, path, replace
+from random import random, uniform
+from time import monotonic, time
+
+import httpx
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+default_fixtures: str = f"{path.dirname(path.realpath(__file__))}/fixtures/anilist"
+
+# Batch operations are stored as one fixture per entity so any combination of IDs can be replayed
+batch_operations: dict[str, tuple[str, str]] = {
+    "MediaBatch": ("media", "Media"),
+    "CharacterBatch": ("characters", "Character"),
+}
+
+
+def operation_name(query: str) -> str:
+    """
+    Finds the operation name of a GraphQL query document
+    Args:
+        query: GraphQL query document
+    Returns:
+        Operation name, or "Anonymous" for unnamed queries
+    """
+    match = re.search(r"\bquery\s+(\w+)", query)
+    return match.group(1) if match else "Anonymous"
+
+
+def fixture_key(query: str, variables: dict) -> str:
+    """
+    Identifies a query by its normalized document and variables
+    Args:
+        query: GraphQL query document
+        variables: GraphQL query variables
+    Returns:
+        Hex digest identifying the query
+    """
+    normalized = " ".join(query.split())
+    serialized = json.dumps(variables, sort_keys=True, separators=(",", ":"))
+    return sha1(f"{normalized}\n{serialized}".encode()).hexdigest()[:16]
+
+
+class FixtureStore:
+    """
+    Recorded anilist responses on disk.
+
+    Attributes:
+        directory (str): Fixture root directory, with one subdirectory per operation name
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, operation: str, name: str) -> str:
+        return f"{self.directory}/{operation}/{name}.json"
+
+    def load(self, operation: str, name: str) -> dict | None:
+        try:
+            with open(self._path(operation, name), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, operation: str, name: str, data: dict) -> None:
+        filepath = self._path(operation, name)
+        makedirs(path.dirname(filepath), exist_ok=True)
+        with open(f"{filepath}.tmp", "w") as f:
+            json.dump(data, f, indent=2)
+        replace(f"{filepath}.tmp", filepath)
+        logger.info(f"Recorded {operation}/{name}")
+
+    def replay(self, query: str, variables: dict) -> dict | None:
+        """
+        Finds the recorded response body of a query
+        Args:
+            query: GraphQL query document
+            variables: GraphQL query variables
+        Returns:
+            Response body, or None if the query has not been recorded
+        """
+        operation = operation_name(query)
+        if operation in batch_operations:
+            page_field, entity_type = batch_operations[operation]
+            entities = [
+                self.load(entity_type, str(entity_id))
+                for entity_id in variables.get("ids", [])
+            ]
+            # Anilist omits unknown IDs from id_in results
+            entities = [entity for entity in entities if entity is not None]
+            return {"data": {"Page": {page_field: entities}}}
+        return self.load(operation, fixture_key(query, variables))
+
+    def record(self, query: str, variables: dict, body: dict) -> None:
+        """
+        Saves a successful response body as a fixture
+        Args:
+            query: GraphQL query document
+            variables: GraphQL query variables
+            body: Response body
+        Returns:
+            None
+        """
+        operation = operation_name(query)
+        if operation in batch_operations:
+            page_field, entity_type = batch_operations[operation]
+            for entity in body["data"]["Page"][page_field]:
+                self.save(entity_type, str(entity["id"]), entity)
+            return None
+        self.save(operation, fixture_key(query, variables), body)
+        return None
+
+
+class RateLimiter:
+    """
+    Sliding one minute request window imitating anilist's rate limit headers.
+
+    Attributes:
+        limit (int): Requests allowed per minute, 0 for unlimited
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.sent: deque[float] = deque()
+
+    def check(self) -> tuple[bool, dict[str, str]]:
+        """
+        Counts a request against the window
+        Returns:
+            Whether the request is allowed, and the rate limit headers to send
+        """
+        if not self.limit:
+            return True, {}
+        now = monotonic()
+        while self.sent and now - self.sent[0] >= 60:
+            self.sent.popleft()
+
+        if len(self.sent) >= self.limit:
+            retry_after = max(int(60 - (now - self.sent[0])) + 1, 1)
+            return False, {
+                "X-RateLimit-Limit": str(self.limit),
+                "X-RateLimit-Remaining": "0",
+                "Retry-After": str(retry_after),
+                "X-RateLimit-Reset": str(int(time()) + retry_after),
+            }
+        self.sent.append(now)
+        return True, {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.limit - len(self.sent)),
+        }
+
+
+def graphql_error(status: int, message: str, headers: dict | None = None):
+    return web.json_response(
+        {"data": None, "errors": [{"message": message, "status": status}]},
+        status=status,
+        headers=headers,
+    )
+
+
+def create_app(
+    fixtures: FixtureStore,
+    record_url: str | None = None,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    rate_limit: int = 0,
+) -> web.Application:
+    """
+    Creates the stand-in web application
+    Args:
+        fixtures: Fixture store to replay from and record to
+        record_url: Upstream anilist URL to forward and record requests, replay only if not specified
+        latency: Added response delay in seconds
+        jitter: Largest random variation of the response delay in seconds
+        error_rate: Fraction of requests answered with a 500 error
+        rate_limit: Requests allowed per minute before answering with 429, 0 for unlimited
+    Returns:
+        aiohttp application
+    """
+    limiter = RateLimiter(rate_limit)
+    app = web.Application()
+
+    async def handle_query(request: web.Request) -> web.Response:
+        try:
+            payload = await request.json()
+            query = payload["query"]
+            variables = payload.get("variables") or {}
+        except (json.JSONDecodeError, KeyError, TypeError):
+            return graphql_error(400, "Invalid GraphQL request")
+
+        delay = latency + uniform(-jitter, jitter)
+        if delay > 0:
+            await sleep(delay)
+
+        allowed, headers = limiter.check()
+        if not allowed:
+            return graphql_error(429, "Too Many Requests.", headers)
+        if random() < error_rate:
+            return graphql_error(500, "Simulated server error", headers)
+
+        if record_url is not None:
+            upstream = await app["client"].post(
+                record_url, json={"query": query, "variables": variables}
+            )
+            for header in ("X-RateLimit-Limit", "X-RateLimit-Remaining", "Retry-After"):
+                if header in upstream.headers:
+                    headers[header] = upstream.headers[header]
+            if upstream.status_code == 200:
+                fixtures.record(query, variables, upstream.json())
+            return web.Response(
+                body=upstream.content,
+                status=upstream.status_code,
+                content_type="application/json",
+                headers=headers,
+            )
+
+        body = fixtures.replay(query, variables)
+        if body is None:
+            logger.warning(f"No fixture for {operation_name(query)} {variables}")
+            return graphql_error(404, "Not Found.", headers)
+        return web.json_response(body, headers=headers)
+
+    async def start_client(app: web.Application) -> None:
+        app["client"] = httpx.AsyncClient(timeout=30)
+
+    async def close_client(app: web.Application) -> None:
+        await app["client"].aclose()
+
+    app.router.add_post("/", handle_query)
+    if record_url is not None:
+        app.on_startup.append(start_client)
+        app.on_cleanup.append(close_client)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8642)
+    parser.add_argument("--fixtures", default=default_fixtures)
+    parser.add_argument(
+        "--record", metavar="URL", help="Forward requests to URL and save fixtures"
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        format="%(asctime)s %(levelname)s:%(name)s: %(message)8s",
+        level=logging.INFO,
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    app = create_app(
+        fixtures=FixtureStore(args.fixtures),
+        record_url=args.record,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+    )
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Builds the emoji atlas drawn on game board images, so boards render without fetching emoji over the network.
+
+Sprites of every game emoji are downloaded once with pilmoji's Twemoji source, or read from a local copy of the Twemoji
+assets/72x72 folder with --assets, and packed into one image, written to brbot/Shared/twemoji/atlas.png with the sprite
+boxes in atlas.json. Rerun after adding emoji to the games.
+
+Usage:
+    python -m brbot.Tools.build_emoji_atlas [--assets DIR] [--sprite-pixels PIXELS] [--columns COLUMNS] [EXTRA_EMOJI ...]
+"""
+
+import argparse
+import json
+import logging
+from io import BytesIO
+from os import makedirs, path, replace
+
+from PIL import Image
+from pilmoji.source import TwitterEmojiSource
+
+from brbot.Features.Bingo.data import col_emojis, row_emojis
+from brbot.Features.Trains.data import game_emoji
+from brbot.Shared.emoji_atlas import atlas_dir, atlas_image_path, atlas_index_path
+
+logger = logging.getLogger(__name__)
+
+# Emoji used by the games outside of their emoji tables
+extra_emoji: tuple[str, ...] = ("🔺", "🔻", "🟥", "🟩")
+
+
+def atlas_emoji(extra: tuple[str, ...] = ()) -> list[str]:
+    """
+    Lists the emoji included in the atlas
+    Args:
+        extra: Additional emoji to include
+    Returns:
+        Emoji without duplicates, in a stable order
+    """
+    emoji = (*game_emoji.values(), *col_emojis, *row_emojis, *extra_emoji, *extra)
+    return list(dict.fromkeys(emoji))
+
+
+class LocalTwemojiSource:
+    """
+    Reads Twemoji sprites from a local assets folder, named like the files on the Twemoji CDN
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def get_emoji(self, emoji: str) -> BytesIO | None:
+        codepoints = [f"{ord(char):x}" for char in emoji]
+        # Twemoji drops the variation selector from file names except in ZWJ sequences
+        if "200d" not in codepoints:
+            codepoints = [code for code in codepoints if code != "fe0f"]
+        filepath = path.join(self.directory, f"{'-'.join(codepoints)}.png")
+        if not path.exists(filepath):
+            return None
+        with open(filepath, "rb") as f:
+            return BytesIO(f.read())
+
+
+def build_atlas(
+    emoji: list[str],
+    sprite_pixels: int,
+    columns: int,
+    source: LocalTwemojiSource | TwitterEmojiSource | None = None,
+) -> tuple[Image.Image, dict[str, list[int]]]:
+    """
+    Downloads emoji sprites and packs them into a grid
+    Args:
+        emoji: Emoji to include
+        sprite_pixels: Width and height of each sprite in the atlas
+        columns: Sprites per atlas row
+        source: Where to read sprites from, defaults to downloading them with pilmoji
+    Returns:
+        Atlas image, and the box of each emoji's sprite in the image
+    """
+    source = source or TwitterEmojiSource()
+    sprites: dict[str, Image.Image] = {}
+    for char in emoji:
+        stream = source.get_emoji(char)
+        if stream is None:
+            logger.warning(f"No sprite found for {char}, it will be drawn as text")
+            continue
+        with Image.open(stream) as sprite:
+            sprites[char] = sprite.convert("RGBA").resize(
+                (sprite_pixels, sprite_pixels), Image.Resampling.LANCZOS
+            )
+
+    rows = max(-(-len(sprites) // columns), 1)
+    sheet = Image.new("RGBA", (columns * sprite_pixels, rows * sprite_pixels))
+    index: dict[str, list[int]] = {}
+    for idx, (char, sprite) in enumerate(sprites.items()):
+        x, y = (idx % columns) * sprite_pixels, (idx // columns) * sprite_pixels
+        sheet.paste(sprite, (x, y))
+        index[char] = [x, y, x + sprite_pixels, y + sprite_pixels]
+    return sheet, index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--assets", help="Local Twemoji assets/72x72 folder to read sprites from"
+    )
+    parser.add_argument("--sprite-pixels", type=int, default=72)
+    parser.add_argument("--columns", type=int, default=16)
+    parser.add_argument("extra", nargs="*", help="Additional emoji to include")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        format="%(asctime)s %(levelname)s:%(name)s: %(message)8s",
+        level=logging.INFO,
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    source = LocalTwemojiSource(args.assets) if args.assets else None
+    sheet, index = build_atlas(
+        atlas_emoji(tuple(args.extra)), args.sprite_pixels, args.columns, source
+    )
+
+    makedirs(atlas_dir, exist_ok=True)
+    sheet.save(f"{atlas_image_path}.tmp", format="PNG", optimize=True)
+    with open(f"{atlas_index_path}.tmp", "w") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    replace(f"{atlas_image_path}.tmp", atlas_image_path)
+    replace(f"{atlas_index_path}.tmp", atlas_index_path)
+    logger.info(f"Wrote {len(index)} sprites to {atlas_image_path}")
+
+
+if __name__ == "__main__":
+    main()
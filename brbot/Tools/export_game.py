@@ -0,0 +1,62 @@
+"""
+Exports a stored Trains game to JSON for debugging.
+
+Games are stored in the compact gamedata.brb format. The export has the same layout as the gamedata.json files of
+older games, with board tiles keyed by "(row, col)". Single sections can be exported on their own.
+
+Usage:
+    python -m brbot.Tools.export_game GAME_FOLDER [--output FILE] [--indent INDENT]
+        [--section {header,players,board,media}]
+"""
+
+import argparse
+import json
+import sys
+
+from brbot.Features.Trains.gamefile import GameFile, gamefile_name
+
+
+def export_game(directory: str, section: str | None = None) -> dict | list:
+    """
+    Reads a stored game as JSON serializable data
+    Args:
+        directory: Game folder
+        section: Section to export, defaults to the whole game
+    Returns:
+        Serialized game or section
+    """
+    with GameFile(f"{directory}/{gamefile_name}") as gamefile:
+        if section == "header":
+            return {"version": gamefile.version, **gamefile.header()}
+        if section == "players":
+            return gamefile.players()
+        if section == "media":
+            return gamefile.known_shows()
+        game_dict = gamefile.game_dict()
+    game_dict["board"] = game_dict["board"].asdict()
+    if section == "board":
+        return game_dict["board"]
+    return game_dict
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("directory", help="Game folder")
+    parser.add_argument("--output", help="File to write, defaults to stdout")
+    parser.add_argument("--indent", type=int, default=4)
+    parser.add_argument(
+        "--section", choices=("header", "players", "board", "media"), default=None
+    )
+    args = parser.parse_args()
+
+    exported = export_game(args.directory.rstrip("/"), args.section)
+    if args.output is None:
+        json.dump(exported, sys.stdout, ensure_ascii=False, indent=args.indent)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w") as f:
+            json.dump(exported, f, ensure_ascii=False, indent=args.indent)
+
+
+if __name__ == "__main__":
+    main()